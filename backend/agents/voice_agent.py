@@ -14,6 +14,9 @@ from config import OPENAI_API_KEY, LIVEKIT_API_KEY, LIVEKIT_API_SECRET, LIVEKIT_
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Upper bound on how long a single simulation session is kept alive
+SESSION_MAX_DURATION = 3600
+
 class KannadaSimulationAgent(Agent):
     def __init__(self, simulation_config: dict) -> None:
         self._tasks = []
@@ -138,8 +141,32 @@ def get_simulation_config(simulation_type: str) -> dict:
     
     return simulations.get(simulation_type, simulations["auto_driver_sim"])
 
-async def entrypoint(ctx: agents.JobContext):
-    """Main entry point for the LiveKit agent"""
+def create_agent_session(config: dict) -> AgentSession:
+    """Build the STT/LLM/TTS pipeline used for a simulation"""
+    return AgentSession(
+        stt=openai.STT(
+            model="gpt-4o-transcribe",
+            language="en",  # Whisper can handle multilingual including Kannada
+        ),
+        llm=openai.LLM(
+            model="gpt-4.1-2025-04-14",
+            temperature=0.8
+        ),
+        tts=openai.TTS(
+            voice=config["voice"],
+            model="gpt-4o-mini-tts",
+            speed=1.0,
+        ),
+        vad=silero.VAD.load(),
+    )
+
+async def entrypoint(ctx: agents.JobContext, session_factory=create_agent_session,
+                     max_duration: float = SESSION_MAX_DURATION):
+    """Main entry point for the LiveKit agent
+
+    `session_factory` and `max_duration` are only overridden by the local
+    room simulator (loadtest/agent_sim.py); LiveKit calls this with `ctx` alone.
+    """
     logger.info(f"Agent started for room: {ctx.room.name}")
     
     # Parse simulation type from room metadata
@@ -160,22 +187,7 @@ async def entrypoint(ctx: agents.JobContext):
     agent = KannadaSimulationAgent(config)
     
     # Create agent session with the pipeline components
-    session = AgentSession(
-        stt=openai.STT(
-            model="gpt-4o-transcribe",
-            language="en",  # Whisper can handle multilingual including Kannada
-        ),
-        llm=openai.LLM(
-            model="gpt-4.1-2025-04-14",
-            temperature=0.8
-        ),
-        tts=openai.TTS(
-            voice=config["voice"],
-            model="gpt-4o-mini-tts",
-            speed=1.0,
-        ),
-        vad=silero.VAD.load(),
-    )
+    session = session_factory(config)
     
     # Connect to room
     await ctx.connect()
@@ -196,7 +208,7 @@ async def entrypoint(ctx: agents.JobContext):
         logger.info(f"Session started successfully for {config['name']}")
         
         # Keep the session running
-        await asyncio.sleep(3600)  # 1 hour max conversation
+        await asyncio.sleep(max_duration)
         
     except Exception as e:
         logger.error(f"Session failed: {e}")
@@ -1,10 +1,18 @@
 # backend/api/game_routes.py
+import logging
 from flask import Blueprint, jsonify, request
 from core.database import mongo, USERS_COLLECTION, LESSON_PROGRESS_COLLECTION, LEADERBOARD_COLLECTION
-from services.gamification import GamificationService
+from services.gamification import (
+    GamificationService, LESSON_ATTEMPTED, LESSON_COMPLETED, STREAK_UPDATED, LEVEL_UP, LESSONS_COMPLETED, PERFECT_LESSONS,
+    streak_zone, local_time,
+)
+from services.http_cache import cached_json
+from core import xp_ledger
 from datetime import datetime
 from bson import ObjectId
 
+logger = logging.getLogger(__name__)
+
 game_bp = Blueprint('game', __name__)
 
 @game_bp.route('/submit-lesson', methods=['POST'])
@@ -63,63 +71,75 @@ def submit_lesson():
         )
         
         # Update user stats
+        now = datetime.utcnow()
         user_updates = {
             "xp": user.get('xp', 0) + xp_earned,
-            "last_active": datetime.utcnow()
+            "last_active": now
         }
         
-        # Update streak
-        if GamificationService.calculate_streak(user.get('last_active')):
-            user_updates['streak'] = user.get('streak', 0) + 1
-        else:
-            user_updates['streak'] = 1
+        # Update streak by calendar day in the user's time zone; expired streaks
+        # are reset by core.streak_maintenance, not here
+        zone = streak_zone(user.get('timezone'))
+        user_updates['streak'], user_updates['streak_expires_at'] = GamificationService.update_streak(
+            user.get('streak', 0), user.get('last_active'), zone, now
+        )
         
         # Calculate new level
+        previous_level = user.get('level', 1)
         new_level = GamificationService.calculate_level(user_updates['xp'])
-        if new_level > user.get('level', 1):
-            user_updates['level'] = new_level
-            level_up = True
-        else:
-            level_up = False
+        level_up = new_level > previous_level
+        
+        # Counters the achievement rules read, maintained here instead of scanning history.
+        # lesson_progress.completed drops back on a failed retry, so distinct
+        # completions are counted against completed_lessons
+        lesson_key = f"{track_id}:{lesson_id}"
+        counters = user.setdefault('counters', {})
+        bumped = []
+        if score >= 80 and lesson_key not in user.get('completed_lessons', []):
+            bumped.append(LESSONS_COMPLETED)
+        if score == 100 and (existing_progress or {}).get('best_score', 0) < 100:
+            bumped.append(PERFECT_LESSONS)
+        for name in bumped:
+            counters[name] = counters.get(name, 0) + 1
         
         # Check for new achievements
         user['xp'] = user_updates['xp']
         user['streak'] = user_updates['streak']
         user['level'] = new_level
         
-        new_achievements = GamificationService.check_achievements(
-            user, 
-            'lesson_completed' if score >= 80 else 'lesson_attempted',
-            {'score': score, 'lesson_id': lesson_id}
-        )
-        
-        # Award achievement XP
-        achievement_xp = sum(ach['xp_reward'] for ach in new_achievements)
-        if achievement_xp > 0:
-            user_updates['xp'] += achievement_xp
-            xp_earned += achievement_xp
-        
-        # Add achievements to user
-        if new_achievements:
-            current_achievements = user.get('achievements', [])
-            for ach in new_achievements:
-                if ach['id'] not in current_achievements:
-                    current_achievements.append(ach['id'])
-            user_updates['achievements'] = current_achievements
+        events = [LESSON_COMPLETED if score >= 80 else LESSON_ATTEMPTED, STREAK_UPDATED]
+        if level_up:
+            events.append(LEVEL_UP)
+        new_achievements, achievement_xp = GamificationService.award_achievements(user, events, local_time(now, zone).hour)
+        xp_earned += achievement_xp
+        # Achievement XP can push the user over the next threshold
+        if user['level'] > new_level:
+            new_level = user['level']
+            level_up = True
         
         # Add completed lesson if score >= 80
         if score >= 80:
             completed_lessons = user.get('completed_lessons', [])
-            lesson_key = f"{track_id}:{lesson_id}"
             if lesson_key not in completed_lessons:
                 completed_lessons.append(lesson_key)
                 user_updates['completed_lessons'] = completed_lessons
         
-        # Update user in database
-        mongo.db[USERS_COLLECTION].update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": user_updates}
-        )
+        # Update user in database; XP, streak, achievements and counters go through the ledger
+        events = [xp_ledger.xp_event(xp_earned - achievement_xp, "lesson", lesson_key), xp_ledger.streak_event(user_updates['streak'], user_updates['streak_expires_at'])]
+        events += [xp_ledger.counter_event(name) for name in bumped]
+        events += [xp_ledger.achievement_event(ach) for ach in new_achievements]
+        
+        user_update = {
+            "$set": {k: v for k, v in user_updates.items() if k != "xp"},
+            "$inc": {"xp": xp_earned, **{f"counters.{name}": 1 for name in bumped}},
+            "$max": {"level": new_level},
+        }
+        if new_achievements:
+            user_update["$addToSet"] = {"achievements": {"$each": [ach['id'] for ach in new_achievements]}}
+        before = xp_ledger.record(ObjectId(user_id), user_update, events) or user
+        # Exact even if another request for this user landed in between
+        user_updates['xp'] = before.get('xp', 0) + xp_earned
+        new_level = max(new_level, before.get('level', 1))
         
         # Update leaderboard
         mongo.db[LEADERBOARD_COLLECTION].update_one(
@@ -130,15 +150,14 @@ def submit_lesson():
                     "xp": user_updates['xp'],
                     "level": new_level,
                     "streak": user_updates['streak'],
-                    "updated_at": datetime.utcnow()
+                    "streak_expires_at": user_updates['streak_expires_at'],
+                    "updated_at": now
                 }
             },
             upsert=True
         )
         
-        # Calculate XP for next level
-        xp_needed, next_level_xp = GamificationService.xp_for_next_level(user_updates['xp'])
-        
+        level = GamificationService.level_info(user_updates['xp'])
         return jsonify({
             "success": True,
             "xp_earned": xp_earned,
@@ -147,13 +166,14 @@ def submit_lesson():
             "level_up": level_up,
             "streak": user_updates['streak'],
             "new_achievements": new_achievements,
-            "xp_for_next_level": xp_needed,
-            "next_level_total": next_level_xp,
+            "xp_for_next_level": level.xp_to_next,
+            "next_level_total": level.next_threshold or 0,
+            "level_progress_percentage": level.progress,
             "lesson_completed": score >= 80
         }), 200
         
     except Exception as e:
-        print(f"Error in submit_lesson: {e}")
+        logger.error("Error in submit_lesson: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 @game_bp.route('/leaderboard', methods=['GET'])
@@ -172,16 +192,32 @@ def get_leaderboard():
         }), 200
         
     except Exception as e:
-        print(f"Error getting leaderboard: {e}")
+        logger.error("Error getting leaderboard: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 @game_bp.route('/achievements', methods=['GET'])
+@cached_json()
 def get_all_achievements():
     """Get list of all possible achievements"""
     return jsonify({
         "achievements": list(GamificationService.ACHIEVEMENTS.values())
     }), 200
 
+@game_bp.route('/user/<user_id>/xp-history', methods=['GET'])
+def get_xp_history(user_id):
+    """Recent XP ledger events and the totals they add up to (latest snapshot + tail)"""
+    try:
+        limit = min(int(request.args.get('limit', 20)), 100)
+        state, seq = xp_ledger.state(ObjectId(user_id))
+        return jsonify({
+            "state": state,
+            "seq": seq,
+            "events": xp_ledger.recent_events(ObjectId(user_id), limit)
+        }), 200
+    except Exception as e:
+        logger.error("Error getting XP history: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
 @game_bp.route('/user/<user_id>/progress', methods=['GET'])
 def get_user_progress(user_id):
     """Get detailed progress for a user"""
@@ -200,21 +236,12 @@ def get_user_progress(user_id):
             {"user_id": ObjectId(user_id)}
         ))
         
-        # Convert ObjectIds to strings
-        for progress in lesson_progress:
-            progress['_id'] = str(progress['_id'])
-            progress['user_id'] = str(progress['user_id'])
-        
         # Get user's rank
         user_rank = mongo.db[LEADERBOARD_COLLECTION].count_documents({
             "xp": {"$gt": user.get('xp', 0)}
         }) + 1
         
-        # Calculate progress to next level
-        xp_needed, next_level_xp = GamificationService.xp_for_next_level(user.get('xp', 0))
-        current_level_xp = LEVELS.get(user.get('level', 1), 0)
-        progress_percentage = ((user.get('xp', 0) - current_level_xp) / 
-                            (next_level_xp - current_level_xp) * 100) if next_level_xp > current_level_xp else 100
+        level = GamificationService.level_info(user.get('xp', 0))
         
         # Get achievement details
         achievement_details = []
@@ -224,7 +251,7 @@ def get_user_progress(user_id):
         
         return jsonify({
             "user": {
-                "_id": str(user['_id']),
+                "_id": user['_id'],
                 "username": user.get('username'),
                 "xp": user.get('xp', 0),
                 "level": user.get('level', 1),
@@ -237,13 +264,15 @@ def get_user_progress(user_id):
             "lesson_progress": lesson_progress,
             "stats": {
                 "global_rank": user_rank,
-                "xp_to_next_level": xp_needed,
-                "level_progress_percentage": progress_percentage,
+                "xp_to_next_level": level.xp_to_next,
+                "level_floor_xp": level.floor,
+                "next_level_xp": level.next_threshold,
+                "level_progress_percentage": level.progress,
                 "total_lessons_completed": len(user.get('completed_lessons', [])),
                 "perfect_lessons": sum(1 for p in lesson_progress if p.get('best_score', 0) == 100)
             }
         }), 200
         
     except Exception as e:
-        print(f"Error getting user progress: {e}")
+        logger.error("Error getting user progress: %s", e)
         return jsonify({"error": "Internal server error"}), 500
\ No newline at end of file
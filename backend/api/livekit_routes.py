@@ -1,9 +1,13 @@
+import logging
 from flask import Blueprint, request, jsonify
-from livekit.api import LiveKitAPI, CreateRoomRequest, DeleteRoomRequest, AccessToken, VideoGrants
-import json
+from livekit.api import DeleteRoomRequest, AccessToken, VideoGrants
+import asyncio
 import uuid
-from datetime import datetime, timedelta
+from datetime import timedelta
 from config import LIVEKIT_API_KEY, LIVEKIT_API_SECRET, LIVEKIT_URL
+from services.livekit_client import livekit_client, room_pool, build_room_metadata, create_room_request
+
+logger = logging.getLogger(__name__)
 
 livekit_bp = Blueprint('livekit', __name__)
 
@@ -66,27 +70,18 @@ async def create_session():  # Make this async
     age_verified = data.get('age_verified', True)
 
     try:
-        room_name = f"sim_{simulation_type}_{uuid.uuid4().hex[:8]}"
-        user_id = f"user_{uuid.uuid4().hex[:8]}"
-        
-        room_metadata = {
-            "simulation_type": simulation_type,
-            "user_id": user_id,
-            "age_verified": age_verified,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        lk_api = LiveKitAPI(LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        
-        # Now we can use await directly
-        await lk_api.room.create_room(
-            CreateRoomRequest(
-                name=room_name,
-                metadata=json.dumps(room_metadata),
-                max_participants=2,
-                empty_timeout=300,
-            )
-        )
+        pooled = room_pool.acquire(simulation_type, age_verified)
+        if pooled:
+            room_name, user_id = pooled["room_name"], pooled["user_id"]
+            room_future = None
+        else:
+            room_name = f"sim_{simulation_type}_{uuid.uuid4().hex[:8]}"
+            user_id = f"user_{uuid.uuid4().hex[:8]}"
+            room_metadata = build_room_metadata(simulation_type, user_id, age_verified)
+
+            # Start room creation, then sign the token while it is in flight
+            room_request = create_room_request(room_name, room_metadata)
+            room_future = livekit_client.submit(lambda api: api.room.create_room(room_request))
         
         grant = VideoGrants(
             room=room_name,
@@ -97,19 +92,23 @@ async def create_session():  # Make this async
         )
         
         token = AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET).with_identity(user_id).with_name(f"User").with_grants(grant).with_ttl(timedelta(hours=1))
+        access_token = token.to_jwt()
         
         simulation_details = get_simulation_details(simulation_type)
         
+        if room_future is not None:
+            await asyncio.wrap_future(room_future)
+        
         return jsonify({
             "room_name": room_name,
-            "access_token": token.to_jwt(),
+            "access_token": access_token,
             "livekit_url": LIVEKIT_URL,
             "user_id": user_id,
             "simulation": simulation_details
         })
         
     except Exception as e:
-        print(f"Error creating session: {e}")
+        logger.error("Error creating session: %s", e)
         return jsonify({"error": f"Failed to create session: {str(e)}"}), 500
 
 @livekit_bp.route("/end-session", methods=['POST'])
@@ -120,13 +119,10 @@ async def end_session():  # Make this async too
         return jsonify({"error": "room_name is required"}), 400
         
     try:
-        lk_api = LiveKitAPI(LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        
-        # Now we can use await directly
-        await lk_api.room.delete_room(DeleteRoomRequest(room=room_name))
+        await livekit_client.run(lambda api: api.room.delete_room(DeleteRoomRequest(room=room_name)))
         
         return jsonify({"success": True, "message": "Session ended successfully"})
         
     except Exception as e:
-        print(f"Error ending session: {e}")
+        logger.error("Error ending session: %s", e)
         return jsonify({"success": True, "message": "Session ended"})
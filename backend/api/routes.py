@@ -1,15 +1,23 @@
+import logging
 from flask import Blueprint, jsonify, request, send_file
-from core import lesson_manager, simulation_manager, duel_manager
+from core import lesson_manager, lesson_bundles, simulation_manager, duel_manager
 from services.openai_client import OpenAIService
 from services.content_filter import ContentFilter
+from services.ai_gateway import UpstreamOverloaded
+from services import audio_store
+from services.http_cache import cached_json
+from config import LESSON_TTS_VOICE
 import json
 import io
+import os
 
+logger = logging.getLogger(__name__)
 
 api_bp = Blueprint('api', __name__)
 
 
 @api_bp.route('/duel/round/<int:round_id>', methods=['GET'])
+@cached_json()
 def get_duel_round(round_id):
     data = duel_manager.get_round(round_id)
     if not data:
@@ -22,12 +30,14 @@ def status():
     return jsonify({"status": "ok"}), 200
 
 @api_bp.route('/tracks', methods=['GET'])
+@cached_json(version=lesson_manager.catalog_version)
 def get_tracks():
     """Endpoint to get all learning tracks."""
     tracks = lesson_manager.get_all_tracks()
     return jsonify(tracks), 200
 
 @api_bp.route('/tracks/<string:track_id>', methods=['GET'])
+@cached_json(version=lesson_manager.catalog_version)
 def get_track(track_id):
     """Endpoint to get a specific track and its lessons."""
     track = lesson_manager.get_track_by_id(track_id)
@@ -35,6 +45,39 @@ def get_track(track_id):
         return jsonify(track), 200
     return jsonify({"error": "Track not found"}), 404
 
+@api_bp.route('/tracks/<string:track_id>/bundle/version', methods=['GET'])
+def get_track_bundle_version(track_id):
+    """Current offline bundle version; clients re-download only when it changes"""
+    path, version = lesson_bundles.get_bundle(track_id, build=False)
+    if version is None:
+        return jsonify({"error": "Track not found"}), 404
+    return jsonify({
+        "track_id": track_id,
+        "version": version,
+        "built": path is not None,
+        "url": f"/api/tracks/{track_id}/bundle"
+    }), 200
+
+@api_bp.route('/tracks/<string:track_id>/bundle', methods=['GET'])
+def get_track_bundle(track_id):
+    """Download a whole track (lessons + pre-rendered audio) as one zip"""
+    try:
+        path, version = lesson_bundles.get_bundle(track_id)
+    except UpstreamOverloaded:
+        raise
+    except Exception as e:
+        logger.error("Error building bundle for %s: %s", track_id, e)
+        return jsonify({"error": "Failed to build bundle"}), 500
+    
+    if version is None:
+        return jsonify({"error": "Track not found"}), 404
+    
+    # ETag is the content version, so If-None-Match gets a 304 until lessons change
+    response = send_file(path, mimetype='application/zip', as_attachment=True,
+                         download_name=f"{track_id}-{version}.zip", etag=version, conditional=True)
+    response.headers['X-Bundle-Version'] = version
+    return response
+
 @api_bp.route('/lesson/<string:track_id>/<string:lesson_id>', methods=['GET'])
 def get_lesson(track_id, lesson_id):
     """Get a specific lesson with generated audio if needed"""
@@ -46,20 +89,52 @@ def get_lesson(track_id, lesson_id):
     if not lesson:
         return jsonify({"error": "Lesson not found"}), 404
     
-    # Generate audio for certain lesson types
-    if lesson['type'] in ['repeat_after_me', 'listening_comprehension']:
-        if lesson['type'] == 'repeat_after_me':
-            text = lesson['content']['kannada_phrase']
-        else:
-            text = lesson['content'].get('audio_text', '')
-        
-        if text and not lesson['content'].get('audio_url'):
-            # Generate audio using OpenAI TTS
-            audio_url = OpenAIService.text_to_speech(text)
-            lesson['content']['audio_url'] = audio_url
+    # Audio normally comes pre-rendered (core.tts_prerender); render and store it once otherwise
+    text = lesson_manager.get_audio_text(lesson)
+    audio_url = lesson['content'].get('audio_url')
+    if text and not audio_url:
+        try:
+            audio_store.get_or_render(text, LESSON_TTS_VOICE)
+            audio_url = audio_store.url_path(audio_store.key_for(text, LESSON_TTS_VOICE))
+        except UpstreamOverloaded as e:
+            # Back-pressure costs this lesson its audio, not the lesson itself
+            logger.warning("TTS shed for lesson %s/%s: %s", track_id, lesson_id, e)
+        except Exception as e:
+            logger.error("TTS failed for lesson %s/%s: %s", track_id, lesson_id, e)
+    
+    if audio_url:
+        # On a copy: the catalog is shared and its version is the /api/tracks ETag.
+        # It holds server paths; clients need an absolute URL
+        lesson = {**lesson, 'content': {**lesson['content'], 'audio_url': audio_store.public_url(audio_url)}}
     
     return jsonify(lesson), 200
 
+def _is_answer(value) -> bool:
+    """Answers are text, a list of words (sentence building) or missing"""
+    if value is None or isinstance(value, str):
+        return True
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+@api_bp.route('/lesson/<string:track_id>/<string:lesson_id>/validate', methods=['POST'])
+def validate_lesson(track_id, lesson_id):
+    """Grade all answers for a lesson against the server-side answer key"""
+    data = request.get_json() or {}
+    answers = data.get('answers')
+    
+    if not isinstance(answers, dict):
+        return jsonify({"error": "answers must be an object of item_id -> answer"}), 400
+    if not all(_is_answer(answer) for answer in answers.values()):
+        return jsonify({"error": "each answer must be a string or a list of strings"}), 400
+    
+    try:
+        result = lesson_manager.validate_lesson(track_id, lesson_id, answers)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if result is None:
+        return jsonify({"error": "Lesson not found"}), 404
+    
+    return jsonify(result), 200
+
 @api_bp.route('/speech/synthesize', methods=['POST'])
 def synthesize_speech():
     """Synthesize speech from text"""
@@ -71,12 +146,26 @@ def synthesize_speech():
         return jsonify({"error": "No text provided"}), 400
     
     try:
-        audio_url = OpenAIService.text_to_speech(text, voice)
+        # Lesson phrases are usually pre-rendered; only synthesize what isn't
+        audio_url = audio_store.stored_url(text, voice) or OpenAIService.text_to_speech(text, voice)
         return jsonify({"audio_url": audio_url}), 200
+    except UpstreamOverloaded:
+        raise
     except Exception as e:
-        print(f"Error in TTS: {e}")
+        logger.error("Error in TTS: %s", e)
         return jsonify({"error": "Failed to synthesize speech"}), 500
 
+@api_bp.route('/audio/<string:key>.mp3', methods=['GET'])
+def get_audio(key):
+    """Serve a pre-rendered clip; keys are content hashes, so they never change"""
+    try:
+        path = audio_store.path_for(key)
+    except ValueError:
+        return jsonify({"error": "Audio not found"}), 404
+    if not os.path.exists(path):
+        return jsonify({"error": "Audio not found"}), 404
+    return send_file(path, mimetype='audio/mpeg', max_age=31536000)
+
 @api_bp.route('/speech/transcribe', methods=['POST'])
 def transcribe_speech():
     """Transcribe audio to text"""
@@ -94,8 +183,10 @@ def transcribe_speech():
             "transcription": transcription,
             "language": language
         }), 200
+    except UpstreamOverloaded:
+        raise
     except Exception as e:
-        print(f"Error in transcription: {e}")
+        logger.error("Error in transcription: %s", e)
         return jsonify({"error": "Failed to transcribe audio"}), 500
 
 @api_bp.route('/speech/evaluate', methods=['POST'])
@@ -106,17 +197,20 @@ def evaluate_pronunciation():
     
     audio_file = request.files['audio']
     original_text = request.form.get('original_text')
+    detailed_feedback = request.form.get('detailed_feedback', 'false').lower() == 'true'
     
     if not original_text:
         return jsonify({"error": "No original text provided"}), 400
     
     try:
         audio_bytes = audio_file.read()
-        evaluation = OpenAIService.evaluate_pronunciation(original_text, audio_bytes)
+        evaluation = OpenAIService.evaluate_pronunciation(original_text, audio_bytes, detailed_feedback)
         
         return jsonify(evaluation), 200
+    except UpstreamOverloaded:
+        raise
     except Exception as e:
-        print(f"Error in pronunciation evaluation: {e}")
+        logger.error("Error in pronunciation evaluation: %s", e)
         return jsonify({"error": "Failed to evaluate pronunciation"}), 500
 
 @api_bp.route('/simulation/start', methods=['POST'])
@@ -187,33 +281,10 @@ def validate_answer():
     
     if not all([lesson_type, user_answer, correct_answer]):
         return jsonify({"error": "Missing required fields"}), 400
+    if not (lesson_manager.is_answer(lesson_type, user_answer) and lesson_manager.is_answer(lesson_type, correct_answer, key=True)):
+        return jsonify({"error": "answers must be strings; sentence building takes a list of words"}), 400
     
-    is_correct = False
-    feedback = ""
-    
-    if lesson_type == 'translation':
-        # For translation, we might accept multiple correct answers
-        if isinstance(correct_answer, list):
-            is_correct = any(ans.lower().strip() == user_answer.lower().strip() 
-                           for ans in correct_answer)
-        else:
-            is_correct = correct_answer.lower().strip() == user_answer.lower().strip()
-        
-        if not is_correct:
-            feedback = f"Close! The correct answer is: {correct_answer[0] if isinstance(correct_answer, list) else correct_answer}"
-    
-    elif lesson_type == 'fill_in_blank':
-        is_correct = correct_answer.lower().strip() == user_answer.lower().strip()
-        if not is_correct:
-            feedback = f"The correct answer is: {correct_answer}"
-    
-    elif lesson_type == 'sentence_building':
-        # For sentence building, order matters
-        user_order = user_answer if isinstance(user_answer, list) else user_answer.split()
-        correct_order = correct_answer if isinstance(correct_answer, list) else correct_answer.split()
-        is_correct = user_order == correct_order
-        if not is_correct:
-            feedback = "The word order isn't quite right. Try again!"
+    is_correct, feedback = lesson_manager.check_answer(lesson_type, user_answer, correct_answer)
     
     return jsonify({
         "is_correct": is_correct,
@@ -1,11 +1,15 @@
 # backend/api/user_routes.py
+import logging
 from flask import Blueprint, jsonify, request, session
 from core.database import mongo, USERS_COLLECTION
 from models.user import User
+from services.gamification import valid_timezone
 from datetime import datetime
 from bson import ObjectId
 import hashlib
 
+logger = logging.getLogger(__name__)
+
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/create-guest', methods=['POST'])
@@ -16,8 +20,9 @@ def create_guest_user():
         timestamp = datetime.utcnow().timestamp()
         guest_username = f"Guest_{int(timestamp)}"
         
-        # Create user
-        user = User(username=guest_username)
+        # Create user; the client may send its IANA time zone for streaks
+        timezone = (request.get_json(silent=True) or {}).get('timezone')
+        user = User(username=guest_username, timezone=timezone if valid_timezone(timezone) else None)
         user_dict = user.to_dict()
         
         # Insert into database
@@ -37,7 +42,7 @@ def create_guest_user():
         }), 201
         
     except Exception as e:
-        print(f"Error creating guest user: {e}")
+        logger.error("Error creating guest user: %s", e)
         return jsonify({"error": "Failed to create guest user"}), 500
 
 @user_bp.route('/profile/<user_id>', methods=['GET'])
@@ -52,13 +57,10 @@ def get_user_profile(user_id):
         if not user:
             return jsonify({"error": "User not found"}), 404
         
-        # Convert ObjectId to string
-        user['_id'] = str(user['_id'])
-        
         return jsonify(user), 200
         
     except Exception as e:
-        print(f"Error getting user profile: {e}")
+        logger.error("Error getting user profile: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 @user_bp.route('/update-username', methods=['PUT'])
@@ -93,7 +95,36 @@ def update_username():
         return jsonify({"success": True, "username": new_username}), 200
         
     except Exception as e:
-        print(f"Error updating username: {e}")
+        logger.error("Error updating username: %s", e)
+        return jsonify({"error": "Internal server error"}), 500
+
+@user_bp.route('/update-timezone', methods=['PUT'])
+def update_timezone():
+    """Set the time zone streak days are counted in"""
+    data = request.get_json()
+    user_id = data.get('user_id')
+    timezone = data.get('timezone')
+    
+    if not all([user_id, timezone]):
+        return jsonify({"error": "Missing required fields"}), 400
+    
+    if not valid_timezone(timezone):
+        return jsonify({"error": "Unknown time zone"}), 400
+    
+    try:
+        # Takes effect from the next lesson, which recomputes the streak expiry
+        result = mongo.db[USERS_COLLECTION].update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"timezone": timezone}}
+        )
+        
+        if result.matched_count == 0:
+            return jsonify({"error": "User not found"}), 404
+        
+        return jsonify({"success": True, "timezone": timezone}), 200
+        
+    except Exception as e:
+        logger.error("Error updating timezone: %s", e)
         return jsonify({"error": "Internal server error"}), 500
 
 @user_bp.route('/session', methods=['GET'])
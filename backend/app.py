@@ -1,4 +1,6 @@
 # backend/app.py
+import os
+
 from flask import Flask, jsonify
 from flask_cors import CORS
 
@@ -6,6 +8,17 @@ def create_app():
     """Creates and configures the Flask application."""
     app = Flask(__name__)
     
+    from config import SECRET_KEY
+    # Generated before gunicorn forks (preload_app), so all workers share it
+    app.secret_key = SECRET_KEY or os.urandom(32)
+    
+    # Queue-backed logging with request ids; first, so everything below uses it
+    try:
+        from services import structured_logging
+        structured_logging.init_app(app)
+    except Exception as e:
+        print(f"❌ Failed to initialize logging: {e}")
+    
     # Configure CORS properly for development
     CORS(app)
     
@@ -22,10 +35,39 @@ def create_app():
                 "/api/speech/transcribe",
                 "/api/speech/evaluate",
                 "/api/livekit/create-session",
-                "/api/livekit/end-session"
+                "/api/livekit/end-session",
+                "/metrics"
             ]
         })
     
+    # Deadline propagation and load-shedding for upstream AI calls
+    try:
+        from services import ai_gateway
+        ai_gateway.init_app(app)
+    except Exception as e:
+        print(f"❌ Failed to initialize AI gateway: {e}")
+    
+    # Request latency/status metrics, served at /metrics
+    try:
+        from services import metrics
+        metrics.init_app(app)
+    except Exception as e:
+        print(f"❌ Failed to initialize metrics: {e}")
+    
+    # Per-request traces with spans around upstream AI and Mongo calls
+    try:
+        from services import tracing
+        tracing.init_app(app)
+    except Exception as e:
+        print(f"❌ Failed to initialize tracing: {e}")
+    
+    # Opt-in capture of sanitized request metadata for loadtest.replay
+    try:
+        from services import traffic_capture
+        traffic_capture.init_app(app)
+    except Exception as e:
+        print(f"❌ Failed to initialize traffic capture: {e}")
+    
     # Import and register blueprints with error handling
     try:
         from api.routes import api_bp
@@ -56,6 +98,15 @@ def create_app():
         print(f"⚠️  LiveKit routes not available: {e}")
         print("Voice simulations will use fallback mode")
     
+    # Optionally fill the audio store for lessons/openers in the background
+    try:
+        from config import PRERENDER_ON_STARTUP
+        if PRERENDER_ON_STARTUP:
+            from core import tts_prerender
+            tts_prerender.start_background()
+    except Exception as e:
+        print(f"❌ Failed to start TTS pre-render: {e}")
+    
     # Initialize MongoDB with error handling
     try:
         from core.database import init_db
@@ -64,6 +115,14 @@ def create_app():
     except Exception as e:
         print(f"❌ Failed to initialize database: {e}")
     
+    # Fast JSON serialization with native ObjectId/datetime support.
+    # After init_db: flask-pymongo installs its own BSON provider there.
+    try:
+        from services import json_provider
+        json_provider.init_app(app)
+    except Exception as e:
+        print(f"❌ Failed to initialize JSON provider: {e}")
+    
     return app
 
 if __name__ == '__main__':
@@ -85,4 +144,12 @@ if __name__ == '__main__':
         methods = ','.join(rule.methods - {'HEAD', 'OPTIONS'})
         print(f"  {rule.rule} [{methods}]")
     
+    # Warm the LiveKit room pool; with the reloader only in the serving child
+    if FLASK_ENV != 'development' or os.environ.get('WERKZEUG_RUN_MAIN'):
+        try:
+            from services.livekit_client import room_pool
+            room_pool.start()
+        except Exception as e:
+            print(f"❌ Failed to warm LiveKit room pool: {e}")
+    
     app.run(debug=(FLASK_ENV == 'development'), port=PORT, host='0.0.0.0')
\ No newline at end of file
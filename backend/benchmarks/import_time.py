@@ -0,0 +1,82 @@
+# backend/benchmarks/import_time.py
+"""
+Startup cost report: runs `create_app()` in a fresh interpreter under
+`python -X importtime` and prints the slowest imports (cumulative, as in
+the raw importtime output) plus the total time to a ready app.
+
+    python -m benchmarks.import_time [--top 20] [--budget-ms 1500]
+
+Exits non-zero when startup exceeds the budget (STARTUP_BUDGET_MS by
+default), so it can be run in CI to keep heavy SDKs out of the import path.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from config import STARTUP_BUDGET_MS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints wall time for create_app() on the last stdout line
+PROBE = (
+    "import time; start = time.perf_counter()\n"
+    "from app import create_app; create_app()\n"
+    "print(f'startup_ms={(time.perf_counter() - start) * 1000:.1f}')\n"
+)
+
+
+def parse_importtime(stderr: str) -> list:
+    """importtime lines -> [(module, self_us, cumulative_us, depth)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip())) // 2
+            rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return rows
+
+
+def measure() -> tuple:
+    """Returns (startup_ms, importtime rows) for a cold create_app()"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"create_app() failed:\n{result.stderr[-2000:]}")
+    startup_ms = None
+    for line in result.stdout.splitlines():
+        if line.startswith("startup_ms="):
+            startup_ms = float(line.split("=", 1)[1])
+    return startup_ms, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of create_app()")
+    parser.add_argument("--top", type=int, default=20, help="Modules to list")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="Fail above this")
+    parser.add_argument("--runs", type=int, default=3, help="Take the fastest of N cold starts")
+    args = parser.parse_args()
+
+    samples = [measure() for _ in range(max(1, args.runs))]
+    startup_ms, rows = min(samples, key=lambda s: s[0])
+
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    for name, self_us, cumulative_us, depth in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>13.1f} {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
+
+    # Top-level imports only, so nested modules aren't double counted
+    top_level = sum(r[2] for r in rows if r[3] == 0) / 1000
+    print(f"\nimports: {top_level:.1f} ms, create_app(): {startup_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if startup_ms > args.budget_ms:
+        print("Startup is over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
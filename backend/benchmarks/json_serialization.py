@@ -0,0 +1,96 @@
+# backend/benchmarks/json_serialization.py
+"""
+Per-response JSON serialization cost: the provider flask-pymongo installs
+(BSONProvider, what the app used before) vs the providers in
+services.json_provider, on payloads shaped like real responses.
+
+    python -m benchmarks.json_serialization [--iterations 2000]
+
+No database or network is needed; documents are built from the models.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import Flask
+from flask_pymongo import BSONProvider
+
+from core import lesson_manager
+from models.user import User, LessonProgress
+from services.json_provider import StdJSONProvider, OrjsonProvider, orjson
+
+
+def _legacy_progress_payload(user: dict, progress: list) -> dict:
+    """What get_user_progress did before: convert ObjectIds by walking each document"""
+    progress = [dict(p) for p in progress]
+    for p in progress:
+        p["_id"] = str(p["_id"])
+        p["user_id"] = str(p["user_id"])
+    return {"user": {**user, "_id": str(user["_id"])}, "lesson_progress": progress}
+
+
+def build_payloads():
+    user = User(username="Guest_1700000000", xp=1234, level=4, streak=6,
+                completed_lessons=[f"s{i}" for i in range(20)], id=ObjectId()).to_dict()
+    progress = []
+    for i in range(30):
+        doc = LessonProgress(user["_id"], "survival", f"s{i}", attempts=2, best_score=90,
+                             completed=True, completed_at=datetime.utcnow(), id=ObjectId()).to_dict()
+        progress.append(doc)
+    leaderboard = [
+        {"username": f"user{i}", "xp": 10000 - i * 37, "level": 10 - i // 20,
+         "updated_at": datetime.utcnow() - timedelta(minutes=i)}
+        for i in range(100)
+    ]
+    return {
+        "tracks": (lesson_manager.get_all_tracks(), None),
+        "leaderboard": ({"leaderboard": leaderboard, "total_players": 5321}, None),
+        "user_progress": ({"user": user, "lesson_progress": progress}, _legacy_progress_payload(user, progress)),
+    }
+
+
+def bench(provider, payload, iterations: int) -> float:
+    """Mean microseconds to build a JSON response for `payload`"""
+    app = Flask(__name__)
+    app.json = provider(app)
+    with app.app_context():
+        app.json.response(payload)  # warm up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            app.json.response(payload).get_data()
+        return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    providers = [("bson (before)", BSONProvider), ("std", StdJSONProvider)]
+    if orjson is not None:
+        providers.append(("orjson", OrjsonProvider))
+
+    print(f"{'payload':<14} {'provider':<14} {'us/response':>12}")
+    for name, (payload, legacy) in build_payloads().items():
+        baseline = None
+        for label, provider in providers:
+            if provider is BSONProvider:
+                if legacy is not None:
+                    # Routes also converted ObjectIds by hand before serializing; count that too
+                    start = time.perf_counter()
+                    for _ in range(args.iterations):
+                        converted = _legacy_progress_payload(payload["user"], payload["lesson_progress"])
+                    convert_cost = (time.perf_counter() - start) / args.iterations * 1e6
+                    cost = bench(provider, converted, args.iterations) + convert_cost
+                else:
+                    cost = bench(provider, payload, args.iterations)
+                baseline = cost
+                print(f"{name:<14} {label:<14} {cost:>12.1f}")
+            else:
+                cost = bench(provider, payload, args.iterations)
+                print(f"{name:<14} {label:<14} {cost:>12.1f}  ({baseline / cost:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+# backend/benchmarks/micro.py
+"""
+Micro-benchmarks for code that runs on every request: level/XP math,
+achievement checks, answer validation, lesson lookups, the content filter
+and duel round construction.
+
+    python -m benchmarks.micro                        # run all, print a table
+    python -m benchmarks.micro -k level -k xp         # only matching names
+    python -m benchmarks.micro --output build/bench/$(git rev-parse --short HEAD).json
+    python -m benchmarks.micro --compare build/bench/main.json --threshold 0.15
+
+Inputs are generated with a fixed seed at realistic sizes (the whole
+lesson catalog, users with up to a few hundred completed lessons, answers
+with typos in both scripts). Each benchmark cycles through its inputs, so
+one warm path doesn't flatter the result. Timing is timeit-style: the loop
+count is auto-ranged to about --min-time, repeated --repeat times, and the
+median is reported per operation. --compare exits non-zero when a
+benchmark is slower than the baseline by more than --threshold.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from core import lesson_manager
+from services.gamification import GamificationService, streak_zone
+from services.content_filter import ContentFilter
+from config import LEVELS, INAPPROPRIATE_WORDS
+
+SEED = 1234
+BENCHMARKS = []
+
+
+def benchmark(name: str):
+    """Register `setup(rng) -> callable`; the callable runs one operation per call"""
+
+    def decorator(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+
+    return decorator
+
+
+def _cycle(items):
+    return itertools.cycle(items).__next__
+
+
+def _typo(rng, text: str) -> str:
+    """One random edit (drop, swap or double a character), as learners type"""
+    if len(text) < 3:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    edit = rng.choice(("drop", "swap", "double"))
+    if edit == "drop":
+        return text[:i] + text[i + 1:]
+    if edit == "swap":
+        return text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]
+    return text[:i] + text[i] + text[i:]
+
+
+def _users(rng, count: int = 500) -> list:
+    """User documents across the whole level range"""
+    max_xp = max(LEVELS.values()) * 2
+    users = []
+    for _ in range(count):
+        completed = rng.randrange(0, 300)
+        users.append({
+            "xp": rng.randrange(0, max_xp),
+            "level": rng.randrange(1, max(LEVELS) + 1),
+            "streak": rng.choice((0, 1, 2, 3, 5, 7, 12, 30)),
+            "completed_lessons": [f"l{i}" for i in range(completed)],
+            "achievements": rng.sample(list(GamificationService.ACHIEVEMENTS), rng.randrange(0, 6)),
+            "last_active": datetime.utcnow() - timedelta(hours=rng.randrange(0, 72)),
+        })
+    return users
+
+
+# --- Gamification ---
+
+@benchmark("gamification.calculate_level")
+def bench_calculate_level(rng):
+    xps = [rng.randrange(0, max(LEVELS.values()) * 2) for _ in range(1000)]
+    next_xp = _cycle(xps)
+    return lambda: GamificationService.calculate_level(next_xp())
+
+
+@benchmark("gamification.xp_for_next_level")
+def bench_xp_for_next_level(rng):
+    xps = [rng.randrange(0, max(LEVELS.values()) * 2) for _ in range(1000)]
+    next_xp = _cycle(xps)
+    return lambda: GamificationService.xp_for_next_level(next_xp())
+
+
+@benchmark("gamification.level_info")
+def bench_level_info(rng):
+    # Includes XP past the LEVELS table, where the formula curve applies
+    xps = [rng.randrange(0, max(LEVELS.values()) * 20) for _ in range(1000)]
+    next_xp = _cycle(xps)
+    return lambda: GamificationService.level_info(next_xp())
+
+
+@benchmark("gamification.check_achievements")
+def bench_check_achievements(rng):
+    cases = [(user, rng.choice(("lesson_completed", "simulation_completed"))) for user in _users(rng)]
+    next_case = _cycle(cases)
+
+    def run():
+        user, action = next_case()
+        return GamificationService.check_achievements(user, action)
+
+    return run
+
+
+@benchmark("gamification.calculate_lesson_xp")
+def bench_calculate_lesson_xp(rng):
+    cases = [(rng.choice((40, 60, 80, 90, 100)), rng.randrange(20, 600), rng.random() < 0.6) for _ in range(1000)]
+    next_case = _cycle(cases)
+    return lambda: GamificationService.calculate_lesson_xp(*next_case())
+
+
+@benchmark("gamification.update_streak")
+def bench_update_streak(rng):
+    next_user = _cycle(_users(rng))
+    zones = [streak_zone(name) for name in ("Asia/Kolkata", "America/Los_Angeles", "Europe/Berlin", None)]
+    next_zone = _cycle(zones)
+
+    def run():
+        user = next_user()
+        return GamificationService.update_streak(user["streak"], user["last_active"], next_zone())
+    return run
+
+
+# --- Answer validation ---
+
+def _answer_variants(rng, lesson_type: str, correct):
+    """Correct, typo'd and wrong answers for one gradable item"""
+    if lesson_type == "sentence_building":
+        words = list(correct)
+        shuffled = words[:]
+        rng.shuffle(shuffled)
+        return [words, shuffled]
+    if isinstance(correct, list):
+        correct = correct[0]
+    if lesson_type == "repeat_after_me":
+        # What STT heard: exact, one syllable off, or something else
+        return [correct, _typo(rng, correct), "ನಮಸ್ಕಾರ"]
+    return [correct, _typo(rng, correct), correct.upper(), "something else"]
+
+
+def _validation_cases(rng) -> list:
+    cases = []
+    for track in lesson_manager.get_all_tracks():
+        for lesson in track.get("lessons", []):
+            key = lesson_manager.get_answer_key(lesson)
+            for _ in range(20):
+                answers = {}
+                for item_id, lesson_type, correct in key:
+                    if correct is not None:
+                        answers[item_id] = rng.choice(_answer_variants(rng, lesson_type, correct))
+                cases.append((track["id"], lesson["id"], key, answers))
+    rng.shuffle(cases)
+    return cases
+
+
+@benchmark("lesson.check_answer")
+def bench_check_answer(rng):
+    items = []
+    for _, _, key, answers in _validation_cases(rng):
+        for item_id, lesson_type, correct in key:
+            if item_id in answers:
+                items.append((lesson_type, answers[item_id], correct))
+    next_item = _cycle(items)
+    return lambda: lesson_manager.check_answer(*next_item())
+
+
+@benchmark("lesson.validate_lesson")
+def bench_validate_lesson(rng):
+    next_case = _cycle(_validation_cases(rng))
+
+    def run():
+        track_id, lesson_id, _, answers = next_case()
+        return lesson_manager.validate_lesson(track_id, lesson_id, answers)
+
+    return run
+
+
+# --- Catalog lookups ---
+
+def _lesson_ids(rng) -> list:
+    ids = [(t["id"], l["id"]) for t in lesson_manager.get_all_tracks() for l in t.get("lessons", [])]
+    # Include misses: clients ask for lessons that were renamed or removed
+    ids += [(track_id, lesson_id + "_old") for track_id, lesson_id in rng.sample(ids, max(1, len(ids) // 10))]
+    rng.shuffle(ids)
+    return ids
+
+
+@benchmark("catalog.get_lesson_by_id")
+def bench_get_lesson_by_id(rng):
+    next_id = _cycle(_lesson_ids(rng))
+    return lambda: lesson_manager.get_lesson_by_id(*next_id())
+
+
+@benchmark("catalog.get_track_by_id")
+def bench_get_track_by_id(rng):
+    track_ids = [t["id"] for t in lesson_manager.get_all_tracks()] + ["missing"]
+    next_id = _cycle(track_ids)
+    return lambda: lesson_manager.get_track_by_id(next_id())
+
+
+@benchmark("catalog.get_all_tracks")
+def bench_get_all_tracks(rng):
+    return lesson_manager.get_all_tracks
+
+
+# --- Content filter ---
+
+@benchmark("content_filter.check_text_content")
+def bench_content_filter(rng):
+    replies = [
+        "Sari sir, Majestic ge nooru aivattu rupayi aagutte. Traffic jaasti ide, meter haakalla.",
+        "Namaskara! Nimma experience bagge swalpa heli. Ee role ge yaake interest ide?",
+        "Hey, neenu Indiranagar alli irodu gottiralilla! Weekend plans enu?",
+        "Yen guru, signal nodkondu odisbeku gottilva? Nanna car ge scratch aaytu!",
+        "ನಮಸ್ಕಾರ, ಹೇಗಿದ್ದೀರಾ? ಇವತ್ತು ಟ್ರಾಫಿಕ್ ತುಂಬಾ ಜಾಸ್ತಿ ಇದೆ.",
+    ]
+    texts = []
+    for _ in range(500):
+        text = " ".join(rng.choice(replies) for _ in range(rng.randrange(1, 4)))
+        if INAPPROPRIATE_WORDS and rng.random() < 0.05:
+            text += " " + rng.choice(INAPPROPRIATE_WORDS)
+        texts.append(text)
+    next_text = _cycle(texts)
+    return lambda: ContentFilter.check_text_content(next_text())
+
+
+# --- Duel rounds ---
+
+def _synthetic_drawing(rng, label: str):
+    """A QuickDraw-sized doodle: a handful of strokes of 20-60 points on a 255x255 canvas"""
+    from quickdraw.data import QuickDrawing
+
+    strokes = []
+    for _ in range(rng.randrange(3, 10)):
+        x, y = rng.randrange(0, 255), rng.randrange(0, 255)
+        xs, ys = [], []
+        for _ in range(rng.randrange(20, 60)):
+            x = min(254, max(0, x + rng.randrange(-12, 13)))
+            y = min(254, max(0, y + rng.randrange(-12, 13)))
+            xs.append(x)
+            ys.append(y)
+        strokes.append([xs, ys])
+    return QuickDrawing(label, {"image": strokes, "key_id": 0, "countrycode": "IN", "recognized": True})
+
+
+@benchmark("duel.encode_drawing")
+def bench_duel_encode(rng):
+    from core import duel_manager
+
+    labels = [w["label"] for w in duel_manager.get_words()]
+    drawings = [_synthetic_drawing(rng, rng.choice(labels)) for _ in range(50)]
+    next_drawing = _cycle(drawings)
+
+    def run():
+        drawing = next_drawing()
+        drawing._image = None  # QuickDrawing caches the rendered image
+        return duel_manager.encode_drawing(drawing)
+
+    return run
+
+
+@benchmark("duel.get_round")
+def bench_duel_get_round(rng):
+    from core import duel_manager
+
+    # Needs the QuickDraw data (downloaded to .quickdrawcache on first use)
+    if duel_manager.get_base64_image(duel_manager.get_words()[0]["label"]) is None:
+        return None
+    rounds = list(range(len(duel_manager.get_words())))
+    next_round = _cycle(rounds)
+    return lambda: duel_manager.get_round(next_round())
+
+
+# --- Runner ---
+
+def measure(func, min_time: float, repeat: int) -> dict:
+    func()  # warm up caches and lazy loading
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed < min_time / 10 else max(2, int(min_time / max(elapsed, 1e-9)))
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "median_ns": statistics.median(samples) * 1e9,
+        "min_ns": min(samples) * 1e9,
+        "stdev_ns": statistics.stdev(samples) * 1e9 if len(samples) > 1 else 0.0,
+        "loops": number,
+        "repeat": len(samples),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Names of benchmarks slower than the baseline by more than `threshold` (a fraction)"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        ratio = result["median_ns"] / before["median_ns"]
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            marker = "  faster"
+        print(f"  {name:<36} {_format_ns(before['median_ns']):>10} -> {_format_ns(result['median_ns']):>10}"
+              f"  ({ratio:.2f}x){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for per-request code paths")
+    parser.add_argument("-k", "--filter", action="append", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing sample")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing samples per benchmark")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier --output")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown vs the baseline")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    args = parser.parse_args()
+
+    selected = [(name, setup) for name, setup in BENCHMARKS
+                if not args.filter or any(f in name for f in args.filter)]
+    if args.list:
+        print("\n".join(name for name, _ in selected))
+        return
+
+    results, skipped = {}, []
+    print(f"{'benchmark':<38} {'median':>10} {'min':>10} {'stdev':>10}")
+    for name, setup in selected:
+        func = setup(random.Random(SEED))
+        if func is None:
+            skipped.append(name)
+            print(f"{name:<38} {'skipped':>10}")
+            continue
+        result = results[name] = measure(func, args.min_time, args.repeat)
+        print(f"{name:<38} {_format_ns(result['median_ns']):>10} {_format_ns(result['min_ns']):>10} "
+              f"{_format_ns(result['stdev_ns']):>10}")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "min_time": args.min_time,
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst {args.compare} ({baseline.get('meta', {}).get('commit')}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
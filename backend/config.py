@@ -6,16 +6,152 @@ load_dotenv()
 
 # API Keys
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 LIVEKIT_URL = os.getenv("LIVEKIT_URL")
 
+# LiveKit Settings
+# Rooms kept pre-created per simulation type (0 disables the warm pool)
+LIVEKIT_ROOM_POOL_SIZE = int(os.getenv("LIVEKIT_ROOM_POOL_SIZE", 0))
+# Pooled rooms older than this are deleted and replaced (their agent is already running)
+LIVEKIT_ROOM_POOL_MAX_AGE = int(os.getenv("LIVEKIT_ROOM_POOL_MAX_AGE", 240))
+
 # Database
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/kannada-learning")
 
 # Application Settings
 PORT = int(os.getenv("PORT", 5001))
 FLASK_ENV = os.getenv("FLASK_ENV", "development")
+# Signs the session cookie (guest user id); set it in production so sessions survive restarts
+SECRET_KEY = os.getenv("SECRET_KEY")
+
+# Upstream AI Gateway
+# Total seconds an HTTP request may spend on upstream AI calls
+AI_REQUEST_BUDGET = float(os.getenv("AI_REQUEST_BUDGET", 20))
+# Max seconds a call may wait for a free slot before it is shed
+AI_QUEUE_WAIT_BUDGET = float(os.getenv("AI_QUEUE_WAIT_BUDGET", 2))
+# Limits per provider and per model: concurrent calls, requests/second, burst
+AI_PROVIDER_LIMITS = {
+    "openai": {"concurrency": 32, "rate": 40, "burst": 60},
+    "gemini": {"concurrency": 16, "rate": 15, "burst": 20},
+}
+AI_MODEL_LIMITS = {
+    "gpt-4o-mini-transcribe": {"concurrency": 16, "rate": 15, "burst": 20},
+    "whisper-1": {"concurrency": 8, "rate": 10, "burst": 10},
+    "gpt-4o-mini-tts": {"concurrency": 16, "rate": 15, "burst": 20},
+    "tts-1": {"concurrency": 8, "rate": 10, "burst": 10},
+    "gpt-4o": {"concurrency": 8, "rate": 8, "burst": 10},
+    "gpt-4-turbo-preview": {"concurrency": 8, "rate": 8, "burst": 10},
+    "gemini-2.5-flash": {"concurrency": 16, "rate": 15, "burst": 20},
+}
+
+# Hedged requests: the fallback model is started once the primary has run
+# longer than `percentile` of its recent latencies (clamped to min/max delay)
+HEDGE_MAX_WORKERS = int(os.getenv("HEDGE_MAX_WORKERS", 32))
+HEDGE_POLICIES = {
+    "transcription": {"percentile": 90, "default_delay": 2.0, "min_delay": 0.3, "max_delay": 5.0},
+    "tts": {"percentile": 90, "default_delay": 1.5, "min_delay": 0.3, "max_delay": 4.0},
+}
+
+# LLM Router (simulation turns)
+# Backends in preference order when there is no latency data yet
+LLM_ROUTER_BACKENDS = ["openai", "gemini"]
+LLM_ROUTER_WINDOW = 100  # calls kept per backend for p50/p95 and error rate
+LLM_ROUTER_EXPLORE_RATE = 0.05  # share of turns sent to a slower backend to keep its stats fresh
+LLM_CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures that open the circuit
+LLM_CIRCUIT_ERROR_RATE = 0.5  # or error rate over the last 20 calls
+LLM_CIRCUIT_COOLDOWN = 30  # seconds before a half-open probe is allowed
+
+# Simulation Response Cache
+# Replies are reused across users when the last K turns match; their audio goes to
+# the audio store, so entries hold only the text and the clip path
+SIM_RESPONSE_CACHE_ENABLED = {
+    "auto_driver_sim": True,
+    "salary_negotiation_sim": True,
+    "crush_conversation_sim": False,
+    "road_rage_sim": False,
+}
+SIM_RESPONSE_CACHE_TURNS = int(os.getenv("SIM_RESPONSE_CACHE_TURNS", 2))
+SIM_RESPONSE_CACHE_TTL = int(os.getenv("SIM_RESPONSE_CACHE_TTL", 6 * 3600))
+SIM_RESPONSE_CACHE_SIZE = int(os.getenv("SIM_RESPONSE_CACHE_SIZE", 5000))
+
+# Pronunciation scoring
+PRONUNCIATION_PASS_SCORE = int(os.getenv("PRONUNCIATION_PASS_SCORE", 70))
+
+# Answer validation: typos tolerated per character of the expected answer, and the cap
+ANSWER_TYPO_RATIO = float(os.getenv("ANSWER_TYPO_RATIO", 0.2))
+ANSWER_MAX_TYPOS = int(os.getenv("ANSWER_MAX_TYPOS", 2))
+
+# Offline lesson bundles
+BUNDLE_DIR = os.getenv("BUNDLE_DIR", os.path.join(os.path.dirname(__file__), "build", "bundles"))
+
+# Pre-rendered TTS for fixed content (lessons, simulation openers)
+LESSON_TTS_VOICE = os.getenv("LESSON_TTS_VOICE", "alloy")
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", os.path.join(os.path.dirname(__file__), "build", "audio"))
+AUDIO_PUBLIC_BASE_URL = os.getenv("AUDIO_PUBLIC_BASE_URL", "")
+GENERATED_CATALOG_PATH = os.getenv("GENERATED_CATALOG_PATH", os.path.join(os.path.dirname(__file__), "build", "lessons.generated.json"))
+TTS_PRERENDER_CONCURRENCY = int(os.getenv("TTS_PRERENDER_CONCURRENCY", 4))
+PRERENDER_ON_STARTUP = os.getenv("PRERENDER_ON_STARTUP", "false").lower() == "true"
+
+# HTTP caching for responses that are the same for every client (keyed by endpoint)
+HTTP_CACHE_DEFAULT_POLICY = "no-cache"
+HTTP_CACHE_POLICIES = {
+    "api.get_tracks": "public, max-age=300, stale-while-revalidate=86400",
+    "api.get_track": "public, max-age=300, stale-while-revalidate=86400",
+    "api.get_duel_round": "public, max-age=3600",
+    "game.get_all_achievements": "public, max-age=86400",
+}
+
+# Response JSON serializer: "orjson" (falls back to the stdlib when not installed) or "std"
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+
+# Production web server (gunicorn.conf.py)
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", min(2 * (os.cpu_count() or 1) + 1, 8)))
+WEB_THREADS = int(os.getenv("WEB_THREADS", 8))
+# Speech routes can take most of AI_REQUEST_BUDGET; leave headroom before killing a worker
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", AI_REQUEST_BUDGET * 3))
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", AI_REQUEST_BUDGET + 10))
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", 5000))
+
+# Prometheus-style metrics at /metrics. METRICS_DIR (e.g. on tmpfs) lets any
+# gunicorn worker report totals for all workers; gunicorn.conf.py sets one.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 10))
+
+# Logging (services.structured_logging): JSON lines unless LOG_FORMAT=text (local development).
+# Repeats of one warning/error are capped at LOG_RATE_LIMIT_BURST per window (seconds)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_RATE_LIMIT_WINDOW = float(os.getenv("LOG_RATE_LIMIT_WINDOW", 60))
+LOG_RATE_LIMIT_BURST = int(os.getenv("LOG_RATE_LIMIT_BURST", 5))
+
+# Request tracing (services.tracing). Traces are exported when sampled or slower
+# than TRACE_SLOW_THRESHOLD seconds; TRACE_OTLP_ENDPOINT is an OTLP/HTTP collector.
+# /debug/traces is unauthenticated, so it is only served with TRACE_DEBUG_ENDPOINT=true
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+TRACE_SLOW_THRESHOLD = float(os.getenv("TRACE_SLOW_THRESHOLD", 2.0))
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(os.path.dirname(__file__), "build", "traces.jsonl"))
+TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_BYTES", 50 * 1024 * 1024))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+TRACE_RECENT = int(os.getenv("TRACE_RECENT", 200))
+TRACE_DEBUG_ENDPOINT = os.getenv("TRACE_DEBUG_ENDPOINT", "false").lower() == "true"
+
+# Traffic capture (services.traffic_capture) for `python -m loadtest.replay`: sanitized
+# request metadata in gzip segments. Set TRAFFIC_CAPTURE_SALT to keep user pseudonyms
+# stable across workers without preload and across restarts
+TRAFFIC_CAPTURE_ENABLED = os.getenv("TRAFFIC_CAPTURE_ENABLED", "false").lower() == "true"
+TRAFFIC_CAPTURE_DIR = os.getenv("TRAFFIC_CAPTURE_DIR", os.path.join(os.path.dirname(__file__), "build", "traffic"))
+TRAFFIC_CAPTURE_MAX_BYTES = int(os.getenv("TRAFFIC_CAPTURE_MAX_BYTES", 20 * 1024 * 1024))
+TRAFFIC_CAPTURE_MAX_FILES = int(os.getenv("TRAFFIC_CAPTURE_MAX_FILES", 50))
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", 1.0))
+TRAFFIC_CAPTURE_SALT = os.getenv("TRAFFIC_CAPTURE_SALT", "")
+
+# Cold-start budget for create_app(), checked by `python -m benchmarks.import_time`
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", 1500))
 
 # Game Settings
 XP_PER_CORRECT_ANSWER = 10
@@ -33,6 +169,20 @@ LEVELS = {
     9: 7500,
     10: 10000
 }
+# Past the last LEVELS entry each level needs LEVEL_CURVE_GROWTH times the XP of the
+# previous step; LEVEL_CAP limits the number of levels (0 = no cap)
+LEVEL_CURVE_GROWTH = float(os.getenv("LEVEL_CURVE_GROWTH", 1.25))
+LEVEL_CAP = int(os.getenv("LEVEL_CAP", 0))
+# Simulation score that counts towards the "Conversation Pro" achievement
+SIMULATION_HIGH_SCORE = int(os.getenv("SIMULATION_HIGH_SCORE", 80))
+# XP ledger (core.xp_ledger): events per user between snapshots, and rebuild job sizing
+XP_SNAPSHOT_EVERY = int(os.getenv("XP_SNAPSHOT_EVERY", 50))
+XP_REBUILD_WORKERS = int(os.getenv("XP_REBUILD_WORKERS", 4))
+XP_REBUILD_CHUNK = int(os.getenv("XP_REBUILD_CHUNK", 500))
+# Streaks count calendar days in the user's time zone (users.timezone, an IANA name),
+# else this one; core.streak_maintenance resets expired streaks in chunks of STREAK_JOB_CHUNK
+STREAK_DEFAULT_TIMEZONE = os.getenv("STREAK_DEFAULT_TIMEZONE", "Asia/Kolkata")
+STREAK_JOB_CHUNK = int(os.getenv("STREAK_JOB_CHUNK", 1000))
 
 # Content Filtering
 INAPPROPRIATE_WORDS = [
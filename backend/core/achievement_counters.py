@@ -0,0 +1,79 @@
+# backend/core/achievement_counters.py
+"""
+One-off backfill of the per-user achievement counters (users.counters)
+from lesson_progress and simulation_history, for accounts created before
+the counters were maintained on each submission.
+
+It runs two aggregations, one per history collection, and writes the
+results in bulk. Request paths never do this: they only $inc the counters.
+Achievements the backfilled counters qualify for are awarded on the user's
+next matching event.
+
+    python -m core.achievement_counters [--dry-run]
+"""
+import argparse
+
+from pymongo import UpdateOne
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from core.database import get_db, USERS_COLLECTION, LESSON_PROGRESS_COLLECTION, SIMULATION_HISTORY_COLLECTION
+from services.gamification import LESSONS_COMPLETED, PERFECT_LESSONS, HIGH_SCORE_SIMULATIONS
+from config import SIMULATION_HIGH_SCORE
+
+BATCH_SIZE = 1000
+
+
+def lesson_counters(db) -> dict:
+    pipeline = [
+        {"$group": {
+            "_id": "$user_id",
+            LESSONS_COMPLETED: {"$sum": {"$cond": ["$completed", 1, 0]}},
+            PERFECT_LESSONS: {"$sum": {"$cond": [{"$gte": ["$best_score", 100]}, 1, 0]}},
+        }},
+    ]
+    return {row.pop("_id"): row for row in db[LESSON_PROGRESS_COLLECTION].aggregate(pipeline, allowDiskUse=True)}
+
+
+def simulation_counters(db) -> dict:
+    pipeline = [
+        {"$match": {"score": {"$gte": SIMULATION_HIGH_SCORE}}},
+        {"$group": {"_id": "$user_id", HIGH_SCORE_SIMULATIONS: {"$sum": 1}}},
+    ]
+    counters = {}
+    for row in db[SIMULATION_HISTORY_COLLECTION].aggregate(pipeline, allowDiskUse=True):
+        # simulation_history stores the user id as a string
+        try:
+            counters[ObjectId(row["_id"])] = {HIGH_SCORE_SIMULATIONS: row[HIGH_SCORE_SIMULATIONS]}
+        except (InvalidId, TypeError):
+            continue
+    return counters
+
+
+def backfill(db, dry_run: bool = False) -> int:
+    per_user = lesson_counters(db)
+    for user_id, counters in simulation_counters(db).items():
+        per_user.setdefault(user_id, {}).update(counters)
+
+    updates = [
+        UpdateOne({"_id": user_id}, {"$max": {f"counters.{name}": value for name, value in counters.items()}})
+        for user_id, counters in per_user.items()
+    ]
+    if not dry_run:
+        # $max: never lower a counter that submissions have moved past the history
+        for i in range(0, len(updates), BATCH_SIZE):
+            db[USERS_COLLECTION].bulk_write(updates[i:i + BATCH_SIZE], ordered=False)
+    return len(updates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill achievement counters from history")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the users that would be updated")
+    args = parser.parse_args()
+
+    count = backfill(get_db(), args.dry_run)
+    print(f"{'Would update' if args.dry_run else 'Updated'} counters for {count} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,24 @@
 from flask_pymongo import PyMongo
 from pymongo import MongoClient
 from config import MONGODB_URI
+from services.metrics import MongoCommandListener
+from services.tracing import MongoSpanListener
 
-mongo = None
+# Bound to the app in init_db; created here so modules that import it before
+# then (every blueprint) share the same, later-initialized instance
+mongo = PyMongo()
 
 def init_db(app):
     """Initialize MongoDB connection with Flask app"""
-    global mongo
     app.config["MONGO_URI"] = MONGODB_URI
-    mongo = PyMongo(app)
+    # connect=False: no monitor threads until first use, so a client created
+    # before gunicorn forks (preload_app) is safe to use in each worker
+    mongo.init_app(app, connect=False, event_listeners=[MongoCommandListener(), MongoSpanListener()])
     return mongo
 
 def get_db():
     """Get database instance for non-Flask contexts"""
-    client = MongoClient(MONGODB_URI)
+    client = MongoClient(MONGODB_URI, event_listeners=[MongoCommandListener(), MongoSpanListener()])
     return client.get_database()
 
 # Collection names
@@ -22,4 +27,6 @@ USERS_COLLECTION = "users"
 LESSON_PROGRESS_COLLECTION = "lesson_progress"
 SIMULATION_HISTORY_COLLECTION = "simulation_history"
 ACHIEVEMENTS_COLLECTION = "achievements"
-LEADERBOARD_COLLECTION = "leaderboard"
\ No newline at end of file
+LEADERBOARD_COLLECTION = "leaderboard"
+XP_EVENTS_COLLECTION = "xp_events"
+XP_SNAPSHOTS_COLLECTION = "xp_snapshots"
\ No newline at end of file
@@ -1,8 +1,13 @@
+import logging
 import os
 import json
 import base64
+import zlib
 from io import BytesIO
-from quickdraw import QuickDrawData
+
+from services.lazy import Lazy
+
+logger = logging.getLogger(__name__)
 
 # Load duel words from content JSON
 json_path = os.path.join(os.path.dirname(__file__), "..", "content", "duel_words.json")
@@ -13,28 +18,43 @@ def load_words():
             data = json.load(f)
             return data.get("words", [])
     except Exception as e:
-        print(f"[duel_manager] Error loading JSON: {e}")
+        logger.error("Error loading JSON: %s", e)
         return []
 
-WORDS = load_words()
-qd = QuickDrawData()  # Uses .quickdrawcache/ by default
+def _create_quickdraw():
+    # quickdraw pulls in PIL and requests; only import it when a round is served
+    from quickdraw import QuickDrawData
+    return QuickDrawData()  # Uses .quickdrawcache/ by default
+
+_words = Lazy(load_words, name="duel_words")
+_quickdraw = Lazy(_create_quickdraw, name="quickdraw")
+
+def get_words() -> list:
+    return _words.get()
+
+def encode_drawing(drawing) -> str:
+    """Render a QuickDraw drawing to a PNG data URL"""
+    buffer = BytesIO()
+    drawing.image.save(buffer, format="PNG")
+    encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    return f"data:image/png;base64,{encoded}"
+
+def drawing_index(label: str, count: int) -> int:
+    """The same drawing for a word in every process, so cached rounds (and ETags) agree across workers"""
+    return zlib.crc32(label.encode("utf-8")) % count
 
 def get_base64_image(label: str) -> str:
     try:
-        drawing = qd.get_drawing(label)
-        img = drawing.image
-
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        return f"data:image/png;base64,{encoded}"
+        group = _quickdraw.get().get_drawing_group(label)
+        return encode_drawing(group.get_drawing(drawing_index(label, group.drawing_count)))
     except Exception as e:
-        print(f"[duel_manager] Failed to fetch drawing for '{label}': {e}")
+        logger.warning("Failed to fetch drawing for %r: %s", label, e)
         return None
 
 def get_round(round_id: int):
-    if 0 <= round_id < len(WORDS):
-        entry = WORDS[round_id]
+    words = get_words()
+    if 0 <= round_id < len(words):
+        entry = words[round_id]
         image_data = get_base64_image(entry["label"])
         if not image_data:
             return None
@@ -0,0 +1,160 @@
+# backend/core/lesson_bundles.py
+"""
+Offline lesson bundles: one zip per track with every lesson and its TTS audio.
+
+Bundle layout:
+    manifest.json      track metadata, version, and sha256 of every file
+    lessons.json       the track's lessons; audio_url points into the bundle
+    audio/<hash>.mp3   one clip per distinct phrase
+
+The version is a hash of the track content plus the TTS voice. It can be
+computed without rendering any audio, so clients can check it cheaply and
+only download the bundle again when it changes.
+
+Build ahead of time with:
+    python -m core.lesson_bundles [--track survival] [--out build/bundles]
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
+
+from core import lesson_manager
+from services import audio_store
+from config import BUNDLE_DIR, LESSON_TTS_VOICE
+
+BUNDLE_FORMAT = 1
+
+_build_locks = {}
+_build_locks_lock = threading.Lock()
+
+
+def _canonical_json(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _bundle_lessons(track: dict) -> list:
+    """Copies of the track's lessons without any runtime-generated audio"""
+    lessons = copy.deepcopy(track.get("lessons", []))
+    for lesson in lessons:
+        if "audio_url" in lesson.get("content", {}):
+            lesson["content"]["audio_url"] = None
+    return lessons
+
+
+def clip_name(text: str, voice: str = LESSON_TTS_VOICE) -> str:
+    return f"audio/{audio_store.key_for(text, voice)}.mp3"
+
+
+def track_version(track: dict, voice: str = LESSON_TTS_VOICE) -> str:
+    """Content hash identifying a bundle; changes when lessons or the voice change"""
+    digest = hashlib.sha256()
+    digest.update(f"{BUNDLE_FORMAT}:{voice}:".encode("utf-8"))
+    digest.update(_canonical_json({k: v for k, v in track.items() if k not in ("lessons", "lesson_count", "has_simulation")}))
+    digest.update(_canonical_json(_bundle_lessons(track)))
+    return digest.hexdigest()[:16]
+
+
+def bundle_path(track_id: str, version: str, out_dir: str = BUNDLE_DIR) -> str:
+    return os.path.join(out_dir, f"{track_id}-{version}.zip")
+
+
+def _render(text: str, voice: str) -> bytes:
+    # Reuses clips from the pre-render job; anything new is stored for next time
+    return audio_store.get_or_render(text, voice)
+
+
+def build_bundle(track: dict, out_dir: str = BUNDLE_DIR, voice: str = LESSON_TTS_VOICE, render=_render) -> str:
+    """Render every clip for `track` and write its bundle; returns the bundle path"""
+    version = track_version(track, voice)
+    lessons = _bundle_lessons(track)
+
+    clips = {}
+    for lesson in lessons:
+        text = lesson_manager.get_audio_text(lesson)
+        if not text:
+            continue
+        name = clip_name(text, voice)
+        if name not in clips:
+            clips[name] = render(text, voice)
+        lesson["content"]["audio_url"] = name
+
+    files = {"lessons.json": _canonical_json(lessons), **clips}
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "track_id": track["id"],
+        "name": track.get("name"),
+        "description": track.get("description"),
+        "difficulty": track.get("difficulty"),
+        "version": version,
+        "voice": voice,
+        "built_at": datetime.utcnow().isoformat(),
+        "files": {name: hashlib.sha256(data).hexdigest() for name, data in files.items()},
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = bundle_path(track["id"], version, out_dir)
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    os.fchmod(fd, 0o644)
+    with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w") as bundle:
+        bundle.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2), zipfile.ZIP_DEFLATED)
+        for name, data in files.items():
+            # MP3 is already compressed; only deflate the JSON
+            compression = zipfile.ZIP_DEFLATED if name.endswith(".json") else zipfile.ZIP_STORED
+            bundle.writestr(name, data, compression)
+    os.replace(tmp_path, path)
+    return path
+
+
+def get_bundle(track_id: str, build: bool = True):
+    """
+    Returns (path, version) for the track's current bundle, building it if it
+    isn't on disk yet and `build` is set. Returns (None, version) if it isn't
+    available, and (None, None) if the track doesn't exist.
+    """
+    track = lesson_manager.get_track_by_id(track_id)
+    if not track:
+        return None, None
+
+    version = track_version(track)
+    path = bundle_path(track_id, version)
+    if os.path.exists(path) or not build:
+        return (path if os.path.exists(path) else None), version
+
+    # One build per track at a time; others wait and reuse its result
+    with _build_locks_lock:
+        lock = _build_locks.setdefault(track_id, threading.Lock())
+    with lock:
+        if not os.path.exists(path):
+            build_bundle(track)
+    return path, version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build offline lesson bundles")
+    parser.add_argument("--track", action="append", help="Track id to build (repeatable; default: all)")
+    parser.add_argument("--out", default=BUNDLE_DIR, help="Output directory")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the current version exists")
+    args = parser.parse_args()
+
+    tracks = lesson_manager.get_all_tracks()
+    if args.track:
+        tracks = [t for t in tracks if t["id"] in args.track]
+
+    for track in tracks:
+        version = track_version(track)
+        path = bundle_path(track["id"], version, args.out)
+        if os.path.exists(path) and not args.force:
+            print(f"{track['id']}: {version} already built")
+            continue
+        path = build_bundle(track, args.out)
+        print(f"{track['id']}: {version} -> {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
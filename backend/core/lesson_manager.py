@@ -1,34 +1,84 @@
 # backend/core/lesson_manager.py
+import logging
+import hashlib
 import json
 import os
+import threading
+
+from services import transliteration, pronunciation
+from config import GENERATED_CATALOG_PATH
+
+logger = logging.getLogger(__name__)
 
 # Construct the path to the lessons.json file
 current_dir = os.path.dirname(__file__)
 json_file_path = os.path.join(current_dir, '..', 'content', 'lessons.json')
 
+# Parsed catalog, kept in memory and reloaded only when lessons.json changes
+_catalog = {"mtime": None, "data": {"tracks": []}, "lessons": {}}
+_catalog_lock = threading.Lock()
+
 def load_lesson_data():
     """Loads the lesson data from the JSON file."""
     try:
         with open(json_file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Error: {json_file_path} not found.")
+        logger.error("%s not found", json_file_path)
         return {"tracks": []}
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {json_file_path}.")
+        logger.error("Could not decode JSON from %s", json_file_path)
         return {"tracks": []}
 
+def lesson_data_sha256():
+    """Hash of lessons.json, used to tell whether the generated catalog is current."""
+    try:
+        with open(json_file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def _load_generated_catalog():
+    """lessons.json with pre-rendered audio_urls (see core.tts_prerender), if it is up to date."""
+    try:
+        with open(GENERATED_CATALOG_PATH, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if data.get("source_sha256") != lesson_data_sha256():
+        return None
+    return data
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def get_catalog():
+    """Returns the in-memory catalog: {"data": lessons.json, "lessons": {(track_id, lesson_id): (track, lesson)}}"""
+    mtime = (_mtime(json_file_path), _mtime(GENERATED_CATALOG_PATH))
+    
+    if _catalog["mtime"] != mtime or mtime[0] is None:
+        with _catalog_lock:
+            if _catalog["mtime"] != mtime or mtime[0] is None:
+                data = _load_generated_catalog() or load_lesson_data()
+                lessons = {}
+                for track in data.get("tracks", []):
+                    track['lesson_count'] = len(track.get('lessons', []))
+                    track['has_simulation'] = 'simulation' in track
+                    for lesson in track.get('lessons', []):
+                        lessons[(track['id'], lesson['id'])] = (track, lesson)
+                _catalog.update(mtime=mtime, data=data, lessons=lessons)
+    return _catalog
+
+def catalog_version():
+    """Changes whenever the served catalog is reloaded (used for HTTP caching)."""
+    return get_catalog()["mtime"]
+
 def get_all_tracks():
     """Returns a list of all available learning tracks."""
-    data = load_lesson_data()
-    tracks = data.get("tracks", [])
-    
-    # Add lesson count and completion info
-    for track in tracks:
-        track['lesson_count'] = len(track.get('lessons', []))
-        track['has_simulation'] = 'simulation' in track
-    
-    return tracks
+    return get_catalog()["data"].get("tracks", [])
 
 def get_track_by_id(track_id: str):
     """Returns a single track by its ID."""
@@ -40,19 +90,127 @@ def get_track_by_id(track_id: str):
 
 def get_lesson_by_id(track_id: str, lesson_id: str):
     """Returns a specific lesson."""
-    track = get_track_by_id(track_id)
-    if not track:
+    entry = get_catalog()["lessons"].get((track_id, lesson_id))
+    if not entry:
         return None
     
-    for lesson in track.get('lessons', []):
-        if lesson['id'] == lesson_id:
-            return {
-                'track_id': track_id,
-                'track_name': track['name'],
-                'lesson': lesson
-            }
+    track, lesson = entry
+    return {
+        'track_id': track_id,
+        'track_name': track['name'],
+        'lesson': lesson
+    }
+
+def get_audio_text(lesson: dict):
+    """Returns the text a lesson needs spoken, or None for lessons without audio."""
+    content = lesson.get('content', {})
+    if lesson['type'] == 'repeat_after_me':
+        return content.get('kannada_phrase') or None
+    if lesson['type'] == 'listening_comprehension':
+        return content.get('audio_text') or None
     return None
 
+# Item types answered with a list of words
+LIST_ANSWER_TYPES = {'sentence_building'}
+# Item types whose answer key may be a list (word order, or several accepted answers)
+LIST_KEY_TYPES = {'sentence_building', 'translation', 'fill_in_blank'}
+
+def is_answer(lesson_type: str, value, key: bool = False) -> bool:
+    """Whether check_answer can grade `value` as an answer (or, with key, an answer key) for lesson_type"""
+    if value is None or isinstance(value, str):
+        return True
+    lists = LIST_KEY_TYPES if key else LIST_ANSWER_TYPES
+    return lesson_type in lists and isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+def check_answer(lesson_type: str, user_answer, correct_answer):
+    """Checks a single answer; returns (is_correct, feedback)"""
+    is_correct = False
+    feedback = ""
+    
+    if lesson_type in ('translation', 'fill_in_blank'):
+        # Accepted answers may be given in either script; small typos are tolerated
+        result = transliteration.match_answer(user_answer, correct_answer)
+        is_correct = result["is_correct"]
+        
+        if not is_correct:
+            expected = correct_answer[0] if isinstance(correct_answer, list) else correct_answer
+            prefix = "Close! " if lesson_type == 'translation' else ""
+            feedback = f"{prefix}The correct answer is: {expected}"
+        elif not result["exact"] and result["distance"]:
+            feedback = f"Correct! Watch the spelling: {result['matched']}"
+    
+    elif lesson_type == 'sentence_building':
+        # For sentence building, order matters
+        user_order = user_answer if isinstance(user_answer, list) else user_answer.split()
+        correct_order = correct_answer if isinstance(correct_answer, list) else correct_answer.split()
+        is_correct = [transliteration.match_key(w) for w in user_order] == [transliteration.match_key(w) for w in correct_order]
+        if not is_correct:
+            feedback = "The word order isn't quite right. Try again!"
+    
+    elif lesson_type in ('mcq', 'listening_comprehension', 'word_matching'):
+        # Picked from a fixed set of options, so no typo tolerance
+        is_correct = transliteration.match_key(user_answer) == transliteration.match_key(correct_answer)
+        if not is_correct:
+            feedback = f"The correct answer is: {correct_answer}"
+    
+    elif lesson_type == 'repeat_after_me':
+        # The answer is the transcription of what the learner said
+        result = pronunciation.score_pronunciation(correct_answer, user_answer)
+        is_correct = result["correct"]
+        feedback = result["feedback"]
+    
+    return is_correct, feedback
+
+def get_answer_key(lesson: dict) -> list:
+    """Gradable items of a lesson as (item_id, lesson_type, correct_answer); word_matching has one per pair"""
+    content = lesson.get('content', {})
+    lesson_type = lesson['type']
+    
+    if lesson_type == 'word_matching':
+        return [(pair['kannada'], lesson_type, pair['english']) for pair in content.get('pairs', [])]
+    if lesson_type == 'repeat_after_me':
+        return [(lesson['id'], lesson_type, content.get('kannada_phrase'))]
+    if lesson_type == 'translation':
+        return [(lesson['id'], lesson_type, content.get('correct_answers') or content.get('correct_answer'))]
+    if lesson_type == 'sentence_building':
+        return [(lesson['id'], lesson_type, content.get('correct_order'))]
+    return [(lesson['id'], lesson_type, content.get('correct_answer'))]
+
+def validate_lesson(track_id: str, lesson_id: str, answers: dict):
+    """
+    Grades every item of a lesson against the server-side answer key.
+    `answers` maps item_id -> answer (item_id is the lesson id for single-question
+    lessons, the Kannada word for word_matching). Returns None if the lesson doesn't exist;
+    raises ValueError for an answer of the wrong shape for its item.
+    """
+    entry = get_catalog()["lessons"].get((track_id, lesson_id))
+    if not entry:
+        return None
+    
+    _, lesson = entry
+    results = []
+    for item_id, lesson_type, correct_answer in get_answer_key(lesson):
+        user_answer = answers.get(item_id)
+        if not is_answer(lesson_type, user_answer):
+            raise ValueError(f"answer to {item_id} must be a string")
+        if user_answer in (None, "", []) or correct_answer is None:
+            is_correct, feedback = False, "No answer given"
+        else:
+            is_correct, feedback = check_answer(lesson_type, user_answer, correct_answer)
+        results.append({"item_id": item_id, "is_correct": is_correct, "feedback": feedback})
+    
+    correct = sum(1 for r in results if r["is_correct"])
+    total = len(results)
+    return {
+        "track_id": track_id,
+        "lesson_id": lesson_id,
+        "results": results,
+        "correct": correct,
+        "total": total,
+        "score": round(100 * correct / total) if total else 0,
+        "answers": answers
+    }
+
 def get_lesson_types():
     """Returns all available lesson types."""
     return [
@@ -1,13 +1,53 @@
 # backend/core/simulation_manager.py
+import logging
 from services.openai_client import OpenAIService
 from services.content_filter import ContentFilter
-from core.database import mongo, SIMULATION_HISTORY_COLLECTION
+from services.ai_gateway import UpstreamOverloaded
+from services.llm_router import router as llm_router
+from core.database import mongo, SIMULATION_HISTORY_COLLECTION, LEADERBOARD_COLLECTION
+from core import xp_ledger
 from models.user import SimulationHistory
+from services.cache import TTLCache
+from services import audio_store
+from services.gamification import GamificationService, SIMULATION_COMPLETED, HIGH_SCORE_SIMULATIONS
+from config import SIMULATION_HIGH_SCORE, SIM_RESPONSE_CACHE_ENABLED, SIM_RESPONSE_CACHE_TURNS, SIM_RESPONSE_CACHE_TTL, SIM_RESPONSE_CACHE_SIZE, LESSON_TTS_VOICE
 from datetime import datetime
-from openai import OpenAI
-from config import OPENAI_API_KEY
+from bson import ObjectId
+from bson.errors import InvalidId
+import hashlib
+import re
+import unicodedata
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
+
+# Opening line the bot speaks for each simulation type
+INITIAL_MESSAGES = {
+    "auto_driver_sim": "ನಮಸ್ಕಾರ ಸಾರ್/ಮೇಡಮ್, ಎಲ್ಲಿಗೆ ಹೋಗಬೇಕು? [Namaskara sir/madam, ellige hogabeku?]",
+    "salary_negotiation_sim": "Hi, ನೀವು salary discussion ಗೆ ಬಂದಿದ್ದೀರಾ? Please, ಕೂತುಕೊಳ್ಳಿ. [Neevu salary discussion ge bandiddira? Please, kuthukolli.]",
+    "crush_conversation_sim": "ಹಾಯ್! ನೀವು ಬಂದಿದ್ದೀರಾ? ತುಂಬಾ ಚೆನ್ನಾಗಿ ಕಾಣುತ್ತಿದ್ದೀರಿ! [Hi! Neevu bandiddira? Thumba chennagi kaanuttiddiri!]",
+    "road_rage_sim": "ಏಯ್! ಏನು ಮಾಡ್ತಿದ್ದೀಯಾ? ನೋಡಿ ಗಾಡಿ ಓಡಿಸಬೇಕು! [Ey! Enu madtiddiya? Nodi gaadi odisabeku!]"
+}
+DEFAULT_INITIAL_MESSAGE = "ನಮಸ್ಕಾರ! [Namaskara!]"
+
+FALLBACK_REPLY = "ಕ್ಷಮಿಸಿ, ಸ್ವಲ್ಪ ಸಮಸ್ಯೆ ಆಗಿದೆ. [Kshamisi, swalpa samasye agide.]"
+
+opener_audio_cache = TTLCache(max_size=len(INITIAL_MESSAGES) + 1, ttl=24 * 3600, name="simulation_opener_audio")
+response_cache = TTLCache(max_size=SIM_RESPONSE_CACHE_SIZE, ttl=SIM_RESPONSE_CACHE_TTL, name="simulation_response")
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+
+def _normalize_turn(text: str) -> str:
+    """Fold case, punctuation and spacing so near-identical turns share a key"""
+    text = unicodedata.normalize("NFC", text or "").replace("\u200c", "").replace("\u200d", "")
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+def response_cache_key(simulation_type: str, history: list):
+    """Cache key for the next bot reply: simulation type plus the last K turns"""
+    if not SIM_RESPONSE_CACHE_ENABLED.get(simulation_type):
+        return None
+    turns = [m for m in history if m.get("role") != "system"][-SIM_RESPONSE_CACHE_TURNS:]
+    raw = "\x1e".join(f"{m.get('role')}:{_normalize_turn(m.get('content'))}" for m in turns)
+    return f"{simulation_type}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
 
 def get_simulation_prompt(simulation_type):
     """Get the system prompt for different simulation types"""
@@ -57,18 +97,14 @@ def start_simulation(simulation_type: str, user_id: str = None):
     """
     system_prompt = get_simulation_prompt(simulation_type)
     
-    # Create initial message based on simulation type
-    initial_messages = {
-        "auto_driver_sim": "ನಮಸ್ಕಾರ ಸಾರ್/ಮೇಡಮ್, ಎಲ್ಲಿಗೆ ಹೋಗಬೇಕು? [Namaskara sir/madam, ellige hogabeku?]",
-        "salary_negotiation_sim": "Hi, ನೀವು salary discussion ಗೆ ಬಂದಿದ್ದೀರಾ? Please, ಕೂತುಕೊಳ್ಳಿ. [Neevu salary discussion ge bandiddira? Please, kuthukolli.]",
-        "crush_conversation_sim": "ಹಾಯ್! ನೀವು ಬಂದಿದ್ದೀರಾ? ತುಂಬಾ ಚೆನ್ನಾಗಿ ಕಾಣುತ್ತಿದ್ದೀರಿ! [Hi! Neevu bandiddira? Thumba chennagi kaanuttiddiri!]",
-        "road_rage_sim": "ಏಯ್! ಏನು ಮಾಡ್ತಿದ್ದೀಯಾ? ನೋಡಿ ಗಾಡಿ ಓಡಿಸಬೇಕು! [Ey! Enu madtiddiya? Nodi gaadi odisabeku!]"
-    }
-    
-    initial_bot_message = initial_messages.get(simulation_type, "ನಮಸ್ಕಾರ! [Namaskara!]")
+    initial_bot_message = INITIAL_MESSAGES.get(simulation_type, DEFAULT_INITIAL_MESSAGE)
     
-    # Generate audio for the initial message
-    audio_url = OpenAIService.text_to_speech(initial_bot_message)
+    # Openers never change: use the pre-rendered clip, else synthesize once per process
+    audio_url = audio_store.stored_url(initial_bot_message, LESSON_TTS_VOICE) or opener_audio_cache.get(initial_bot_message)
+    if audio_url is None:
+        audio_url = OpenAIService.text_to_speech(initial_bot_message)
+        if audio_url:
+            opener_audio_cache.set(initial_bot_message, audio_url)
     
     # Create simulation history entry if user_id provided
     if user_id:
@@ -99,35 +135,52 @@ def process_user_turn(simulation_type: str, history: list, user_audio: bytes, us
     # 2. Add user's message to history
     history.append({"role": "user", "content": user_text})
 
-    # 3. Get AI response using GPT-4
-    try:
-        # Ensure system prompt is at the beginning
-        if not history or history[0].get("role") != "system":
-            system_prompt = get_simulation_prompt(simulation_type)
-            history.insert(0, {"role": "system", "content": system_prompt})
-        
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=history,
-            temperature=0.7,
-            max_tokens=150
-        )
-        
-        bot_text = response.choices[0].message.content
-        
-        # Apply content filtering for certain simulations
-        if simulation_type == "road_rage_sim":
-            bot_text = ContentFilter.filter_simulation_response(bot_text, simulation_type)
-        
-    except Exception as e:
-        print(f"Error calling OpenAI API: {e}")
-        bot_text = "ಕ್ಷಮಿಸಿ, ಸ್ವಲ್ಪ ಸಮಸ್ಯೆ ಆಗಿದೆ. [Kshamisi, swalpa samasye agide.]"
+    # Ensure system prompt is at the beginning
+    if not history or history[0].get("role") != "system":
+        system_prompt = get_simulation_prompt(simulation_type)
+        history.insert(0, {"role": "system", "content": system_prompt})
+
+    # 3. Serve a cached reply (with its audio) if this exchange was seen before
+    cache_key = response_cache_key(simulation_type, history)
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached:
+        bot_text, audio_path = cached
+        audio_url = audio_store.public_url(audio_path)
+        history.append({"role": "assistant", "content": bot_text})
+    else:
+        # 4. Get AI response from the LLM router
+        llm_ok = True
+        try:
+            # Routed to the fastest healthy backend (OpenAI or Gemini)
+            bot_text = llm_router.complete(history, temperature=0.7, max_tokens=150)
+            
+            # Apply content filtering for certain simulations
+            if simulation_type == "road_rage_sim":
+                bot_text = ContentFilter.filter_simulation_response(bot_text, simulation_type)
+            
+        except UpstreamOverloaded:
+            raise
+        except Exception as e:
+            logger.error("Error calling OpenAI API: %s", e)
+            bot_text = FALLBACK_REPLY
+            llm_ok = False
 
-    # 4. Add AI's response to history
-    history.append({"role": "assistant", "content": bot_text})
+        # Add AI's response to history
+        history.append({"role": "assistant", "content": bot_text})
 
-    # 5. Synthesize AI response to audio
-    audio_url = OpenAIService.text_to_speech(bot_text)
+        # 5. Synthesize AI response to audio. Replies that may repeat are kept in the
+        # audio store so the cache holds a short path, not the clip itself
+        audio_url = None
+        if cache_key and llm_ok:
+            try:
+                audio_store.get_or_render(bot_text, LESSON_TTS_VOICE)
+                audio_url = audio_store.url_path(audio_store.key_for(bot_text, LESSON_TTS_VOICE))
+                response_cache.set(cache_key, (bot_text, audio_url))
+            except UpstreamOverloaded:
+                raise
+            except Exception as e:
+                logger.error("TTS failed for cached simulation reply: %s", e)
+        audio_url = audio_store.public_url(audio_url) if audio_url else OpenAIService.text_to_speech(bot_text)
     
     # 6. Update simulation history if user_id provided
     if user_id:
@@ -165,13 +218,56 @@ def process_user_turn(simulation_type: str, history: list, user_audio: bytes, us
         
         # Update simulation history with final score
         if user_id:
-            mongo.db[SIMULATION_HISTORY_COLLECTION].update_one(
+            session = mongo.db[SIMULATION_HISTORY_COLLECTION].find_one_and_update(
                 {"user_id": user_id, "simulation_type": simulation_type},
-                {"$set": {"score": score, "feedback": feedback}}
+                {"$set": {"score": score, "feedback": feedback}},
+                projection={"_id": 1},
+                sort=[("_id", -1)]  # the session being played is the newest
             )
+            # A session that keeps ending (client retries, extra turns) counts once
+            if score >= SIMULATION_HIGH_SCORE and session and mongo.db[SIMULATION_HISTORY_COLLECTION].update_one(
+                {"_id": session["_id"], "counted": {"$ne": True}}, {"$set": {"counted": True}}
+            ).modified_count:
+                response_data["new_achievements"] = record_high_score(user_id)
     
     return response_data
 
+def record_high_score(user_id: str) -> list:
+    """Count a high-scoring simulation for the user and award what that unlocks"""
+    try:
+        oid = ObjectId(user_id)
+    except (InvalidId, TypeError):
+        return []
+    
+    counted = [xp_ledger.counter_event(HIGH_SCORE_SIMULATIONS)]
+    before = xp_ledger.record(oid, {"$inc": {f"counters.{HIGH_SCORE_SIMULATIONS}": 1}}, counted)
+    if not before:
+        return []
+    
+    user = {**before, **xp_ledger.apply(xp_ledger.state_of(before), counted)}
+    new_achievements, xp = GamificationService.award_achievements(user, SIMULATION_COMPLETED)
+    if new_achievements:
+        # $inc/$max rather than $set: a lesson submission may be updating the same user
+        xp_ledger.record(
+            oid,
+            {
+                "$addToSet": {"achievements": {"$each": [ach['id'] for ach in new_achievements]}},
+                "$inc": {"xp": xp},
+                "$max": {"level": user['level']}
+            },
+            [xp_ledger.achievement_event(ach) for ach in new_achievements]
+        )
+        mongo.db[LEADERBOARD_COLLECTION].update_one(
+            {"user_id": oid},
+            {
+                "$inc": {"xp": xp},
+                "$max": {"level": user['level']},
+                "$set": {"username": user.get('username'), "updated_at": datetime.utcnow()}
+            },
+            upsert=True
+        )
+    return new_achievements
+
 def check_conversation_end(simulation_type: str, history: list) -> bool:
     """Check if the conversation should end based on simulation goals"""
     if len(history) > 20:  # Max 10 exchanges
@@ -0,0 +1,111 @@
+# backend/core/streak_maintenance.py
+"""
+Scheduled reset of expired streaks on users and leaderboard, so request
+paths never check for them.
+
+Each lesson submission stores streak_expires_at on the user and on the
+leaderboard row. It is the UTC instant at which the local day after that
+activity ends, in the user's time zone (users.timezone, else
+STREAK_DEFAULT_TIMEZONE). Whatever the zone, a streak has expired when
+streak_expires_at <= now. The job walks a partial index on that field,
+which holds only users with a live streak, and resets each chunk with one
+update_many on users and one on leaderboard. Both repeat the expiry
+condition, so a user who submitted a lesson after the chunk was read keeps
+their streak. The ledger needs no events for this: streak events carry
+the same expiry, and xp_ledger.apply folds expired streaks to 0.
+
+Streaks set before streak_expires_at existed have no expiry yet. Seed
+them once from last_active with --backfill. Run the reset every few minutes from
+cron or a scheduler; a late run only delays resets by that long.
+
+    python -m core.streak_maintenance [--chunk 1000] [--dry-run]
+    python -m core.streak_maintenance --backfill
+"""
+import argparse
+import time
+from datetime import datetime
+
+from pymongo import ASCENDING
+
+from core import xp_ledger
+from core.database import get_db, USERS_COLLECTION, LEADERBOARD_COLLECTION
+from services.gamification import streak_zone, local_time, streak_expiry
+from config import STREAK_JOB_CHUNK
+
+
+def ensure_indexes(db):
+    db[USERS_COLLECTION].create_index(
+        [("streak_expires_at", ASCENDING)], name="live_streak_expiry", partialFilterExpression={"streak": {"$gt": 0}}
+    )
+    db[LEADERBOARD_COLLECTION].create_index([("user_id", ASCENDING)])
+
+
+def expired_query(now: datetime) -> dict:
+    # streak > 0 lets the planner use the partial index
+    return {"streak": {"$gt": 0}, "streak_expires_at": {"$lte": now}}
+
+
+def reset_expired(db, chunk: int = STREAK_JOB_CHUNK, now: datetime = None, dry_run: bool = False) -> dict:
+    """Set streak to 0 wherever it expired before `now`, `chunk` users at a time"""
+    now = now or datetime.utcnow()
+    query = expired_query(now)
+    if dry_run:
+        return {"users": db[USERS_COLLECTION].count_documents(query), "leaderboard": 0, "chunks": 0}
+
+    totals = {"users": 0, "leaderboard": 0, "chunks": 0}
+    while True:
+        # Reset users drop out of the index, so each read starts at the front again
+        ids = [doc['_id'] for doc in db[USERS_COLLECTION].find(query, {"_id": 1}).sort("streak_expires_at", ASCENDING).limit(chunk)]
+        if not ids:
+            return totals
+        users = db[USERS_COLLECTION].update_many({"_id": {"$in": ids}, **query}, {"$set": {"streak": 0}})
+        board = db[LEADERBOARD_COLLECTION].update_many({"user_id": {"$in": ids}, **query}, {"$set": {"streak": 0}})
+        totals['chunks'] += 1
+        totals['users'] += users.modified_count
+        totals['leaderboard'] += board.modified_count
+
+
+def backfill(db, dry_run: bool = False) -> int:
+    """Give streaks that predate streak_expires_at an expiry derived from last_active"""
+    missing = {"streak": {"$gt": 0}, "streak_expires_at": None}
+    count = 0
+    for user in db[USERS_COLLECTION].find(missing, {"streak": 1, "last_active": 1, "timezone": 1}):
+        count += 1
+        if dry_run or not user.get('last_active'):
+            continue
+        zone = streak_zone(user.get('timezone'))
+        expires_at = streak_expiry(local_time(user['last_active'], zone).date(), zone)
+        # Through the ledger so a rebuild knows the expiry; skipped if a lesson set one meanwhile
+        before = xp_ledger.record(
+            user['_id'], {"$set": {"streak_expires_at": expires_at}},
+            [xp_ledger.streak_event(user['streak'], expires_at)], db=db, match=missing,
+        )
+        if before is not None:
+            db[LEADERBOARD_COLLECTION].update_one({"user_id": user['_id']}, {"$set": {"streak_expires_at": expires_at}})
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reset expired streaks")
+    parser.add_argument("--chunk", type=int, default=STREAK_JOB_CHUNK, help="Users per batch")
+    parser.add_argument("--backfill", action="store_true", help="First give legacy streaks an expiry from last_active")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the streaks that would change")
+    args = parser.parse_args()
+
+    db = get_db()
+    ensure_indexes(db)
+    if args.backfill:
+        count = backfill(db, args.dry_run)
+        print(f"{'Would seed' if args.dry_run else 'Seeded'} streak expiry for {count} users")
+
+    start = time.monotonic()
+    totals = reset_expired(db, args.chunk, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"Would reset {totals['users']} expired streaks")
+    else:
+        print(f"Reset {totals['users']} expired streaks ({totals['leaderboard']} leaderboard rows) "
+              f"in {totals['chunks']} chunks ({time.monotonic() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# backend/core/tts_prerender.py
+"""
+Pre-render every clip the app speaks from fixed content, so lesson and
+simulation-start requests never wait on TTS.
+
+Walks lessons.json (kannada_phrase / audio_text) and the simulation
+openers, synthesizes whatever is missing from the audio store with
+bounded parallelism, and then writes a generated catalog. That catalog is
+lessons.json with each audio_url filled in, and lesson_manager serves it
+in preference to lessons.json while it is up to date.
+
+    python -m core.tts_prerender [--concurrency 4] [--force] [--dry-run]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core import lesson_manager
+from services import audio_store
+from config import GENERATED_CATALOG_PATH, TTS_PRERENDER_CONCURRENCY, LESSON_TTS_VOICE
+
+
+def collect_texts() -> list:
+    """Distinct texts spoken from fixed content: lesson audio plus simulation openers"""
+    from core.simulation_manager import INITIAL_MESSAGES, DEFAULT_INITIAL_MESSAGE
+
+    texts = []
+    for track in lesson_manager.load_lesson_data().get("tracks", []):
+        for lesson in track.get("lessons", []):
+            text = lesson_manager.get_audio_text(lesson)
+            if text:
+                texts.append(text)
+    texts.extend(INITIAL_MESSAGES.values())
+    texts.append(DEFAULT_INITIAL_MESSAGE)
+    return list(dict.fromkeys(texts))
+
+
+def prerender(concurrency: int = TTS_PRERENDER_CONCURRENCY, voice: str = LESSON_TTS_VOICE,
+              force: bool = False, dry_run: bool = False) -> dict:
+    """Synthesize missing clips; returns counts of rendered/existing/failed"""
+    from services.openai_client import OpenAIService
+
+    texts = collect_texts()
+    missing = texts if force else [t for t in texts if not audio_store.exists(t, voice)]
+    stats = {"total": len(texts), "existing": len(texts) - len(missing), "rendered": 0, "failed": 0}
+    if dry_run:
+        stats["missing"] = missing
+        return stats
+
+    def render(text):
+        audio_store.save(text, voice, OpenAIService.synthesize_speech(text, voice))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="prerender") as pool:
+        futures = {pool.submit(render, text): text for text in missing}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                stats["rendered"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"Failed to render {futures[future]!r}: {e}")
+    stats["seconds"] = round(time.monotonic() - start, 2)
+    return stats
+
+
+def write_generated_catalog(voice: str = LESSON_TTS_VOICE, path: str = GENERATED_CATALOG_PATH) -> int:
+    """Write lessons.json with audio_url set for every rendered clip; returns how many were set"""
+    data = lesson_manager.load_lesson_data()
+    filled = 0
+    for track in data.get("tracks", []):
+        for lesson in track.get("lessons", []):
+            text = lesson_manager.get_audio_text(lesson)
+            if text and audio_store.exists(text, voice):
+                lesson["content"]["audio_url"] = audio_store.url_path(audio_store.key_for(text, voice))
+                filled += 1
+
+    data["source_sha256"] = lesson_manager.lesson_data_sha256()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.fchmod(fd, 0o644)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return filled
+
+
+def run(concurrency: int = TTS_PRERENDER_CONCURRENCY, force: bool = False) -> dict:
+    stats = prerender(concurrency, force=force)
+    stats["catalog_entries"] = write_generated_catalog()
+    return stats
+
+
+def start_background(concurrency: int = TTS_PRERENDER_CONCURRENCY) -> threading.Thread:
+    """Run the job in a daemon thread (used at startup when PRERENDER_ON_STARTUP is set)"""
+
+    def target():
+        try:
+            print(f"TTS pre-render finished: {run(concurrency)}")
+        except Exception as e:
+            print(f"TTS pre-render failed: {e}")
+
+    thread = threading.Thread(target=target, name="tts-prerender", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render lesson and simulation audio")
+    parser.add_argument("--concurrency", type=int, default=TTS_PRERENDER_CONCURRENCY, help="Parallel TTS calls")
+    parser.add_argument("--force", action="store_true", help="Re-render clips that already exist")
+    parser.add_argument("--dry-run", action="store_true", help="Only list what is missing")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        stats = prerender(dry_run=True)
+        for text in stats.pop("missing"):
+            print(f"missing: {text}")
+        print(stats)
+        return
+
+    print(run(args.concurrency, force=args.force))
+
+
+if __name__ == "__main__":
+    main()
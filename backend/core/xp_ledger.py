@@ -0,0 +1,389 @@
+# backend/core/xp_ledger.py
+"""
+Append-only ledger of everything that changes a user's XP, streak,
+achievements or achievement counters, with periodic per-user snapshots.
+
+The user document keeps the current totals as materialized state, so hot
+reads are unchanged. Every write to those totals goes through record(),
+which applies the update and bumps users.ledger_seq in one atomic
+find_one_and_update. The events describing the change are then appended
+to xp_events under the sequence numbers that bump reserved.
+A user's first event also stores a seq-0 snapshot of the totals they had
+before the ledger existed. Every XP_SNAPSHOT_EVERY events the state is
+compacted into a new xp_snapshots entry. state() therefore reads one
+snapshot plus a short tail of events, never the whole history.
+Concurrent requests may land their events out of order, so a tail only
+counts as complete when it holds every seq up to users.ledger_seq;
+snapshots and rebuild writes wait until it does. If a process dies
+between the user update and the insert, the gap is permanent: rebuilds
+log and count it, and `repair` closes it with a snapshot of the user
+document at ledger_seq. That document already includes every event up to
+ledger_seq, so repairing is safe while the app is running. Streaks
+past their expiry fold to 0, which is what core.streak_maintenance writes
+to the user, so resets need no events of their own.
+
+Events (the `type` field):
+    xp           amount, reason, ref      XP from a lesson
+    achievement  achievement, amount      achievement and its XP reward
+    streak       value, expires_at        streak set to value, lost at expires_at
+    counter      counter, amount          achievement counter bumped
+
+Rebuilds recompute every user's totals from the ledger after rule
+changes, for example a new level curve or, with --reprice, new achievement
+rewards. They run as a batch job over chunks of users in parallel:
+    python -m core.xp_ledger rebuild [--workers 4] [--chunk 500] [--from-scratch] [--reprice] [--dry-run]
+    python -m core.xp_ledger repair [--workers 4] [--chunk 500] [--dry-run]
+    python -m core.xp_ledger indexes
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from core.database import mongo, get_db, USERS_COLLECTION, LEADERBOARD_COLLECTION, XP_EVENTS_COLLECTION, XP_SNAPSHOTS_COLLECTION
+from services.gamification import GamificationService, LEVEL_TABLE
+from config import XP_SNAPSHOT_EVERY, XP_REBUILD_WORKERS, XP_REBUILD_CHUNK
+
+logger = logging.getLogger(__name__)
+
+# Fields of the user document the ledger owns
+STATE_FIELDS = ("xp", "level", "streak", "streak_expires_at", "achievements", "counters")
+# ...and the copies of them on the leaderboard
+BOARD_FIELDS = ("xp", "level", "streak", "streak_expires_at")
+
+
+def xp_event(amount: int, reason: str, ref: str = None) -> dict:
+    return {"type": "xp", "amount": amount, "reason": reason, "ref": ref}
+
+
+def achievement_event(achievement: dict) -> dict:
+    return {"type": "achievement", "achievement": achievement['id'], "amount": achievement['xp_reward']}
+
+
+def streak_event(value: int, expires_at: datetime = None) -> dict:
+    return {"type": "streak", "value": value, "expires_at": expires_at}
+
+
+def counter_event(counter: str, amount: int = 1) -> dict:
+    return {"type": "counter", "counter": counter, "amount": amount}
+
+
+def state_of(user: dict) -> dict:
+    """The ledger-owned part of a user document"""
+    return {
+        "xp": user.get('xp', 0),
+        "level": user.get('level', 1),
+        "streak": user.get('streak', 0),
+        "streak_expires_at": user.get('streak_expires_at'),
+        "achievements": list(user.get('achievements') or []),
+        "counters": dict(user.get('counters') or {}),
+    }
+
+
+def apply(state: dict, events, reprice: bool = False, now: datetime = None) -> dict:
+    """Fold events into a copy of `state` as of `now`; the level always follows the current level curve"""
+    state = {"streak_expires_at": None, **state, "achievements": list(state['achievements']), "counters": dict(state['counters'])}
+    for event in events:
+        kind = event['type']
+        if kind == "xp":
+            state['xp'] += event['amount']
+        elif kind == "achievement":
+            if event['achievement'] not in state['achievements']:
+                state['achievements'].append(event['achievement'])
+                catalog = GamificationService.ACHIEVEMENTS.get(event['achievement'])
+                state['xp'] += catalog['xp_reward'] if reprice and catalog else event['amount']
+        elif kind == "streak":
+            state['streak'] = event['value']
+            state['streak_expires_at'] = event.get('expires_at')
+        elif kind == "counter":
+            state['counters'][event['counter']] = state['counters'].get(event['counter'], 0) + event['amount']
+    state['level'] = LEVEL_TABLE.level_for(state['xp'])
+    if state['streak'] and state['streak_expires_at'] and state['streak_expires_at'] <= (now or datetime.utcnow()):
+        state['streak'] = 0
+    return state
+
+
+def _append(db, user_id, before: dict, events: list):
+    first_seq = before.get('ledger_seq', 0)
+    if first_seq == 0:
+        _write_snapshot(db, user_id, 0, state_of(before))
+    now = datetime.utcnow()
+    db[XP_EVENTS_COLLECTION].insert_many(
+        [{"user_id": user_id, "seq": first_seq + i, "at": now, **event} for i, event in enumerate(events, 1)],
+        ordered=False
+    )
+    last_seq = first_seq + len(events)
+    if last_seq - before.get('ledger_snapshot_seq', 0) >= XP_SNAPSHOT_EVERY:
+        compact(db, user_id)
+
+
+def record(user_id, update: dict, events: list, db=None, match: dict = None):
+    """
+    Apply `update` to the user document and append `events`, which must
+    describe it. Returns the user as it was before, or None if there is no
+    such user or it doesn't satisfy `match`.
+    """
+    db = mongo.db if db is None else db
+    update = {**update, "$inc": {**update.get("$inc", {}), "ledger_seq": len(events)}}
+    before = db[USERS_COLLECTION].find_one_and_update(
+        {**(match or {}), "_id": user_id}, update, return_document=ReturnDocument.BEFORE
+    )
+    if before is not None and events:
+        _append(db, user_id, before, events)
+    return before
+
+
+def _write_snapshot(db, user_id, seq: int, state: dict):
+    try:
+        db[XP_SNAPSHOTS_COLLECTION].insert_one({"user_id": user_id, "seq": seq, "at": datetime.utcnow(), "state": state})
+    except DuplicateKeyError:
+        return  # another request or a rebuild got there first
+    if seq:
+        db[USERS_COLLECTION].update_one({"_id": user_id}, {"$max": {"ledger_snapshot_seq": seq}})
+        # The previous snapshot is kept as a fallback; older ones are redundant
+        previous = db[XP_SNAPSHOTS_COLLECTION].find(
+            {"user_id": user_id, "seq": {"$gt": 0, "$lt": seq}}, {"seq": 1}
+        ).sort("seq", DESCENDING).skip(1)
+        stale = [doc['seq'] for doc in previous]
+        if stale:
+            db[XP_SNAPSHOTS_COLLECTION].delete_many({"user_id": user_id, "seq": {"$in": stale}})
+
+
+def _complete(tail: list, snapshot_seq: int, ledger_seq: int) -> bool:
+    """Whether `tail` holds every event after the snapshot up to ledger_seq, none still in flight"""
+    return len(tail) == ledger_seq - snapshot_seq and (tail[-1]['seq'] if tail else snapshot_seq) == ledger_seq
+
+
+def _state(db, user_id) -> tuple:
+    """(state, seq, ledger_seq); state covers the events up to the first gap, i.e. up to seq"""
+    user = db[USERS_COLLECTION].find_one({"_id": user_id}, {"ledger_seq": 1})
+    snapshot = db[XP_SNAPSHOTS_COLLECTION].find_one({"user_id": user_id}, sort=[("seq", DESCENDING)])
+    if user is None or snapshot is None:
+        return None, 0, 0
+    ledger_seq = user.get('ledger_seq', 0)
+    tail = list(db[XP_EVENTS_COLLECTION].find(
+        {"user_id": user_id, "seq": {"$gt": snapshot['seq'], "$lte": ledger_seq}}
+    ).sort("seq", ASCENDING))
+    seq = snapshot['seq']
+    for i, event in enumerate(tail):
+        if event['seq'] != seq + 1:
+            # A concurrent record() hasn't appended this seq yet
+            tail = tail[:i]
+            break
+        seq += 1
+    return apply(snapshot['state'], tail), seq, ledger_seq
+
+
+def state(user_id, db=None) -> tuple:
+    """(state, seq) from the latest snapshot and the events after it; (None, 0) if the user has no ledger"""
+    current, seq, _ = _state(mongo.db if db is None else db, user_id)
+    return current, seq
+
+
+def compact(db, user_id):
+    current, seq, ledger_seq = _state(db, user_id)
+    # With events still in flight the snapshot would skip them; their own record() compacts later
+    if current is not None and seq and seq == ledger_seq:
+        _write_snapshot(db, user_id, seq, current)
+
+
+def recent_events(user_id, limit: int = 20, db=None) -> list:
+    db = mongo.db if db is None else db
+    return list(db[XP_EVENTS_COLLECTION].find({"user_id": user_id}, {"_id": 0, "user_id": 0}).sort("seq", DESCENDING).limit(limit))
+
+
+def ensure_indexes(db):
+    db[XP_EVENTS_COLLECTION].create_index([("user_id", ASCENDING), ("seq", ASCENDING)], unique=True)
+    db[XP_SNAPSHOTS_COLLECTION].create_index([("user_id", ASCENDING), ("seq", DESCENDING)], unique=True)
+
+
+# --- Rebuild job ---
+
+def _user_chunks(db, size: int):
+    """_id ranges of `size` users, walked along the _id index"""
+    last = None
+    while True:
+        query = {"_id": {"$gt": last}} if last is not None else {}
+        ids = [doc['_id'] for doc in db[USERS_COLLECTION].find(query, {"_id": 1}).sort("_id", ASCENDING).limit(size)]
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def _load_chunk(db, user_ids: list, from_scratch: bool = False) -> tuple:
+    """(users, latest or seq-0 snapshot per user, events after it per user)"""
+    users = {doc['_id']: doc for doc in db[USERS_COLLECTION].find(
+        {"_id": {"$in": user_ids}}, {field: 1 for field in STATE_FIELDS + ("ledger_seq",)}
+    )}
+    match = {"user_id": {"$in": user_ids}}
+    if from_scratch:
+        match["seq"] = 0
+    snapshots = {row['_id']: row['snapshot'] for row in db[XP_SNAPSHOTS_COLLECTION].aggregate([
+        {"$match": match},
+        {"$sort": {"user_id": 1, "seq": -1}},
+        {"$group": {"_id": "$user_id", "snapshot": {"$first": "$$ROOT"}}},
+    ])}
+
+    tails = {}
+    clauses = [{"user_id": uid, "seq": {"$gt": snapshot['seq']}} for uid, snapshot in snapshots.items()]
+    if clauses:
+        for event in db[XP_EVENTS_COLLECTION].find({"$or": clauses}).sort([("user_id", ASCENDING), ("seq", ASCENDING)]):
+            tails.setdefault(event['user_id'], []).append(event)
+    return users, snapshots, tails
+
+
+def rebuild_chunk(db, user_ids: list, from_scratch: bool = False, reprice: bool = False, dry_run: bool = False) -> dict:
+    """Recompute the totals of `user_ids` from snapshot + events and write back the ones that changed"""
+    users, snapshots, tails = _load_chunk(db, user_ids, from_scratch)
+    user_writes, rebuilt_users = [], {}
+    stats = {"users": len(users), "changed": 0, "genesis": 0, "skipped": 0, "gaps": 0,
+             "events": sum(len(t) for t in tails.values())}
+    for uid, user in users.items():
+        snapshot = snapshots.get(uid)
+        ledger_seq = user.get('ledger_seq', 0)
+        if snapshot is None:
+            if ledger_seq:
+                stats['skipped'] += 1  # its first record() is still writing the seq-0 snapshot
+                continue
+            # Never written through the ledger: its current totals are its history
+            if not dry_run:
+                _write_snapshot(db, uid, 0, state_of(user))
+            stats['genesis'] += 1
+            continue
+        tail = tails.get(uid, [])
+        if not _complete(tail, snapshot['seq'], ledger_seq):
+            # Events in flight, appended since we read the user, or lost with a crashed request
+            logger.warning("XP ledger of user %s has %d of %d events after snapshot %d; skipped (see `repair`)",
+                           uid, len(tail), ledger_seq - snapshot['seq'], snapshot['seq'])
+            stats['gaps'] += 1
+            continue
+        rebuilt = apply(snapshot['state'], tail, reprice=reprice)
+        if rebuilt == state_of(user):
+            continue
+        stats['changed'] += 1
+        # Only if no event was appended since we read the user; otherwise the next run picks it up
+        user_writes.append(UpdateOne({"_id": uid, "ledger_seq": ledger_seq}, {"$set": rebuilt}))
+        rebuilt_users[uid] = (ledger_seq, rebuilt)
+
+    if user_writes and not dry_run:
+        _write_rebuilt(db, user_writes, rebuilt_users)
+    return stats
+
+
+def _write_rebuilt(db, user_writes: list, rebuilt_users: dict):
+    """Write rebuilt users, then the leaderboard rows of those whose write went through"""
+    ids = list(rebuilt_users)
+    boards = {row['user_id']: row for row in db[LEADERBOARD_COLLECTION].find(
+        {"user_id": {"$in": ids}}, {field: 1 for field in BOARD_FIELDS + ("user_id",)}
+    )}
+    db[USERS_COLLECTION].bulk_write(user_writes, ordered=False)
+    written = {doc['_id'] for doc in db[USERS_COLLECTION].find({"_id": {"$in": ids}}, {"ledger_seq": 1})
+               if doc.get('ledger_seq', 0) == rebuilt_users[doc['_id']][0]}
+    # A lesson submitted meanwhile writes its own leaderboard row: leave the row alone
+    # if the user write was skipped, or if the row changed since it was read
+    board_writes = [
+        UpdateOne(
+            {"user_id": uid, **{field: row.get(field) for field in BOARD_FIELDS}},
+            {"$set": {field: rebuilt_users[uid][1][field] for field in BOARD_FIELDS}}
+        )
+        for uid, row in boards.items() if uid in written
+    ]
+    if board_writes:
+        db[LEADERBOARD_COLLECTION].bulk_write(board_writes, ordered=False)
+
+
+def repair_chunk(db, user_ids: list, dry_run: bool = False) -> dict:
+    """Close ledger gaps of `user_ids` with a snapshot of the user document at ledger_seq"""
+    users, snapshots, tails = _load_chunk(db, user_ids)
+    stats = {"users": len(users), "gaps": 0}
+    for uid, user in users.items():
+        snapshot = snapshots.get(uid)
+        ledger_seq = user.get('ledger_seq', 0)
+        if snapshot is None and not ledger_seq:
+            continue  # never written through the ledger; rebuild seeds it
+        if snapshot is not None and _complete(tails.get(uid, []), snapshot['seq'], ledger_seq):
+            continue
+        stats['gaps'] += 1
+        logger.warning("Repairing XP ledger of user %s at seq %d", uid, ledger_seq)
+        if not dry_run:
+            _write_snapshot(db, uid, ledger_seq, state_of(user))
+    return stats
+
+
+def rebuild(db, workers: int = XP_REBUILD_WORKERS, chunk: int = XP_REBUILD_CHUNK, **options) -> dict:
+    return _run_chunks(db, rebuild_chunk, workers, chunk, **options)
+
+
+def repair(db, workers: int = XP_REBUILD_WORKERS, chunk: int = XP_REBUILD_CHUNK, **options) -> dict:
+    return _run_chunks(db, repair_chunk, workers, chunk, **options)
+
+
+def _run_chunks(db, run_chunk, workers: int, chunk: int, **options) -> dict:
+    totals = {"chunks": 0}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="xp-rebuild") as pool:
+        # Chunks are read ahead only as far as the workers need them
+        pending = set()
+        for ids in _user_chunks(db, chunk):
+            if len(pending) >= workers * 2:
+                done = next(iter(pending))
+                pending.remove(done)
+                _add(totals, done.result())
+            pending.add(pool.submit(run_chunk, db, ids, **options))
+        for future in pending:
+            _add(totals, future.result())
+    return totals
+
+
+def _add(totals: dict, stats: dict):
+    totals['chunks'] += 1
+    for key, value in stats.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XP ledger maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("indexes", help="Create the ledger indexes")
+    rebuild_parser = sub.add_parser("rebuild", help="Recompute every user's totals from the ledger")
+    rebuild_parser.add_argument("--workers", type=int, default=XP_REBUILD_WORKERS)
+    rebuild_parser.add_argument("--chunk", type=int, default=XP_REBUILD_CHUNK, help="Users per batch")
+    rebuild_parser.add_argument("--from-scratch", action="store_true", help="Replay from each user's first snapshot")
+    rebuild_parser.add_argument("--reprice", action="store_true", help="Use current achievement rewards")
+    rebuild_parser.add_argument("--dry-run", action="store_true", help="Count changes without writing")
+    repair_parser = sub.add_parser("repair", help="Close gaps left by requests that died before appending their events")
+    repair_parser.add_argument("--workers", type=int, default=XP_REBUILD_WORKERS)
+    repair_parser.add_argument("--chunk", type=int, default=XP_REBUILD_CHUNK, help="Users per batch")
+    repair_parser.add_argument("--dry-run", action="store_true", help="Count gaps without writing")
+    args = parser.parse_args()
+
+    db = get_db()
+    ensure_indexes(db)
+    if args.command == "indexes":
+        print("Ledger indexes in place")
+        return
+
+    start = time.monotonic()
+    if args.command == "repair":
+        totals = repair(db, args.workers, args.chunk, dry_run=args.dry_run)
+        print(f"{'Found' if args.dry_run else 'Repaired'} {totals.get('gaps', 0)} ledger gaps in {totals.get('users', 0)} users "
+              f"({time.monotonic() - start:.1f}s)")
+        return
+
+    totals = rebuild(db, args.workers, args.chunk,
+                     from_scratch=args.from_scratch, reprice=args.reprice, dry_run=args.dry_run)
+    totals = {"users": 0, "changed": 0, "genesis": 0, "skipped": 0, "gaps": 0, "events": 0, **totals}
+    print(f"{'Would rebuild' if args.dry_run else 'Rebuilt'} {totals['users']} users in {totals['chunks']} chunks "
+          f"({time.monotonic() - start:.1f}s): {totals['changed']} changed, {totals['genesis']} seeded, "
+          f"{totals['skipped']} skipped (writes in flight), {totals['gaps']} with ledger gaps, "
+          f"{totals['events']} events replayed")
+    if totals['gaps']:
+        print("Users with ledger gaps are logged above; if the gaps persist, run `python -m core.xp_ledger repair`")
+
+
+if __name__ == "__main__":
+    main()
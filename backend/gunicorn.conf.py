@@ -0,0 +1,77 @@
+# backend/gunicorn.conf.py
+"""
+gunicorn settings for production; sizing comes from config.py (WEB_* env vars).
+
+gthread workers: each request gets a thread, and Flask runs the async
+LiveKit views on an event loop in that thread. The LiveKit API client
+already keeps its own loop (services.livekit_client), so blocking speech
+calls and async views can share a worker. On SIGTERM a worker stops
+accepting new connections and gets WEB_GRACEFUL_TIMEOUT seconds to finish
+in-flight requests (speech requests take up to AI_REQUEST_BUDGET).
+"""
+import os
+import shutil
+import threading
+
+# Workers share metrics through snapshots on tmpfs (services.metrics); set
+# before config is imported so the app sees it too
+os.environ.setdefault("METRICS_DIR", f"/dev/shm/ctrl-vibe-metrics-{os.getpid()}")
+
+from config import (
+    PORT, WEB_WORKERS, WEB_THREADS, WEB_TIMEOUT, WEB_GRACEFUL_TIMEOUT, WEB_MAX_REQUESTS,
+)
+
+bind = f"0.0.0.0:{PORT}"
+workers = WEB_WORKERS
+worker_class = "gthread"
+threads = WEB_THREADS
+preload_app = True
+
+timeout = WEB_TIMEOUT
+graceful_timeout = WEB_GRACEFUL_TIMEOUT
+keepalive = 5
+
+# Recycle workers now and then; jitter keeps them from restarting together
+max_requests = WEB_MAX_REQUESTS
+max_requests_jitter = WEB_MAX_REQUESTS // 10
+
+# Heartbeat files on tmpfs; a disk-backed /tmp in containers can stall workers
+worker_tmp_dir = "/dev/shm"
+
+accesslog = "-"
+errorlog = "-"
+
+def on_exit(server):
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
+
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def post_worker_init(worker):
+    # Room pools are per process, so each worker warms its own after the fork
+    from services.livekit_client import room_pool
+    room_pool.start()
+
+
+def pre_request(worker, req):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+
+
+def post_request(worker, req, environ, resp):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+def worker_exit(server, worker):
+    # Final snapshot, so the next scrape folds this worker's counts into the archive
+    from services import metrics
+    metrics.flush()
+
+    # Anything still in flight here was cut off by graceful_timeout
+    if _in_flight:
+        worker.log.warning("Worker %s exiting with %d request(s) in flight", worker.pid, _in_flight)
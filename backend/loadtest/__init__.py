@@ -0,0 +1 @@
+# backend/loadtest/__init__.py
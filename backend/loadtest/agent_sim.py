@@ -0,0 +1,669 @@
+#!/usr/bin/env python
+# backend/loadtest/agent_sim.py
+"""
+Local LiveKit room simulator for load testing the voice agent.
+
+Runs `agents.voice_agent.entrypoint` against fake rooms, with audio frames
+injected straight into the AgentSession and stand-in STT/LLM/TTS plugins
+that only sleep for a configurable latency. No LiveKit Cloud project or
+OpenAI key is needed, so hundreds of sessions can share one process.
+
+Usage (from backend/):
+    python -m loadtest.agent_sim --sessions 200 --turns 3
+    python -m loadtest.agent_sim --sessions 50 --audio sample.wav --llm-latency 0.8
+"""
+
+import argparse
+import array
+import asyncio
+import json
+import math
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+import wave
+
+from livekit import rtc
+from livekit.agents import AgentSession, APIConnectOptions, llm, stt, tts
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN
+from livekit.agents.voice import io
+
+from agents import voice_agent
+
+SAMPLE_RATE = 24000
+FRAME_MS = 20
+SAMPLES_PER_FRAME = SAMPLE_RATE * FRAME_MS // 1000
+
+# Scripted user turns, keyed by simulation type
+USER_SCRIPTS = {
+    "auto_driver_sim": [
+        "Majestic ge hogabeku",
+        "Tumba jaasti, nooru rupayi kodtini",
+        "Sari, hogona",
+    ],
+    "salary_negotiation_sim": [
+        "Ee varsha naanu eradu project lead maadidde",
+        "Hadinaidu percent hike bekagittu",
+        "Thank you, will consider",
+    ],
+    "crush_conversation_sim": [
+        "Hi, naanu Indiranagar alli irodu",
+        "Nanage filter coffee tumba ishta",
+        "Mathe sigona",
+    ],
+    "road_rage_sim": [
+        "Kshamisi, nanna tappu",
+        "Signal nodlilla, sorry",
+        "Sari, careful aagi drive maadtini",
+    ],
+}
+
+BOT_REPLIES = [
+    "ಸರಿ sir, ಇನ್ನೂರು ರೂಪಾಯಿ ಆಗುತ್ತೆ.",
+    "ಅಷ್ಟು ದೂರ sir, traffic ತುಂಬಾ ಇದೆ.",
+    "ಒಳ್ಳೆಯದು, ಇನ್ನೂ ಹೇಳಿ.",
+]
+
+
+class Latency:
+    """A base latency with uniform jitter, in seconds"""
+
+    def __init__(self, base: float, jitter: float = 0.0):
+        self.base = base
+        self.jitter = jitter
+
+    def sample(self) -> float:
+        if not self.jitter:
+            return self.base
+        return max(0.0, self.base + random.uniform(-self.jitter, self.jitter))
+
+    async def wait(self):
+        await asyncio.sleep(self.sample())
+
+
+# ---------------------------------------------------------------------------
+# Stand-in plugins
+# ---------------------------------------------------------------------------
+
+def _frame_energy(frame: rtc.AudioFrame) -> float:
+    samples = frame.data
+    if not len(samples):
+        return 0.0
+    # Sparse sampling is enough to tell speech from silence
+    step = max(1, len(samples) // 32)
+    return max(abs(samples[i]) for i in range(0, len(samples), step))
+
+
+class FakeSTT(stt.STT):
+    """Streaming STT that detects speech by frame energy and replays a script"""
+
+    def __init__(self, script: list, latency: Latency, silence_ms: int = 400):
+        super().__init__(capabilities=stt.STTCapabilities(streaming=True, interim_results=False))
+        self._script = script
+        self._turn = 0
+        self._latency = latency
+        self._silence_frames = silence_ms // FRAME_MS
+
+    def next_transcript(self) -> str:
+        text = self._script[self._turn % len(self._script)]
+        self._turn += 1
+        return text
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options: APIConnectOptions):
+        await self._latency.wait()
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language="kn", text=self.next_transcript())],
+        )
+
+    def stream(self, *, language=NOT_GIVEN, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return FakeRecognizeStream(stt=self, conn_options=conn_options)
+
+
+class FakeRecognizeStream(stt.RecognizeStream):
+    async def _run(self):
+        speaking = False
+        silent = 0
+        async for frame in self._input_ch:
+            if isinstance(frame, self._FlushSentinel):
+                continue
+
+            if _frame_energy(frame) > 500:
+                silent = 0
+                if not speaking:
+                    speaking = True
+                    self._event_ch.send_nowait(stt.SpeechEvent(type=stt.SpeechEventType.START_OF_SPEECH))
+                continue
+
+            if not speaking:
+                continue
+            silent += 1
+            if silent < self._stt._silence_frames:
+                continue
+
+            speaking = False
+            await self._stt._latency.wait()
+            text = self._stt.next_transcript()
+            self._event_ch.send_nowait(stt.SpeechEvent(
+                type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                alternatives=[stt.SpeechData(language="kn", text=text)],
+            ))
+            self._event_ch.send_nowait(stt.SpeechEvent(type=stt.SpeechEventType.END_OF_SPEECH))
+
+
+class FakeLLM(llm.LLM):
+    """LLM that waits for a time-to-first-token, then streams a canned reply"""
+
+    def __init__(self, latency: Latency, token_interval: float = 0.02):
+        super().__init__()
+        self._latency = latency
+        self._token_interval = token_interval
+
+    @property
+    def model(self) -> str:
+        return "fake-llm"
+
+    def chat(self, *, chat_ctx, tools=None, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+             parallel_tool_calls=NOT_GIVEN, tool_choice=NOT_GIVEN, extra_kwargs=NOT_GIVEN):
+        return FakeLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class FakeLLMStream(llm.LLMStream):
+    async def _run(self):
+        await self._llm._latency.wait()
+        request_id = uuid.uuid4().hex[:12]
+        for word in random.choice(BOT_REPLIES).split(" "):
+            self._event_ch.send_nowait(llm.ChatChunk(
+                id=request_id,
+                delta=llm.ChoiceDelta(role="assistant", content=word + " "),
+            ))
+            await asyncio.sleep(self._llm._token_interval)
+
+
+class FakeTTS(tts.TTS):
+    """Non-streaming TTS that returns silence sized to the input text"""
+
+    def __init__(self, latency: Latency, seconds_per_char: float = 0.05):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+        )
+        self._latency = latency
+        self._seconds_per_char = seconds_per_char
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter):
+        await self._tts._latency.wait()
+        output_emitter.initialize(
+            request_id=uuid.uuid4().hex[:12],
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        duration = max(0.2, len(self.input_text) * self._tts._seconds_per_char)
+        output_emitter.push(bytes(int(SAMPLE_RATE * duration) * 2))
+        output_emitter.flush()
+
+
+# ---------------------------------------------------------------------------
+# Fake room I/O
+# ---------------------------------------------------------------------------
+
+def synthetic_utterance(seconds: float) -> list:
+    """A speech-like tone (amplitude modulated 220 Hz) cut into frames"""
+    frames = []
+    total = int(seconds * 1000 / FRAME_MS)
+    for n in range(total):
+        samples = array.array("h", (
+            int(8000 * (0.6 + 0.4 * math.sin(2 * math.pi * 3 * (n * SAMPLES_PER_FRAME + i) / SAMPLE_RATE))
+                * math.sin(2 * math.pi * 220 * (n * SAMPLES_PER_FRAME + i) / SAMPLE_RATE))
+            for i in range(SAMPLES_PER_FRAME)
+        ))
+        frames.append(rtc.AudioFrame(samples.tobytes(), SAMPLE_RATE, 1, SAMPLES_PER_FRAME))
+    return frames
+
+
+def recorded_utterance(path: str) -> list:
+    """Load a 16-bit mono WAV recording and cut it into frames"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono PCM")
+        rate = wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+
+    samples_per_frame = rate * FRAME_MS // 1000
+    step = samples_per_frame * 2
+    return [
+        rtc.AudioFrame(pcm[i:i + step], rate, 1, samples_per_frame)
+        for i in range(0, len(pcm) - step + 1, step)
+    ]
+
+
+class SessionStats:
+    def __init__(self, session_id: str, simulation_type: str):
+        self.session_id = session_id
+        self.simulation_type = simulation_type
+        self.turn_latencies = []
+        self.greeting_latency = None
+        self.errors = []
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            "session_id": self.session_id,
+            "simulation_type": self.simulation_type,
+            "turns": len(self.turn_latencies),
+            "greeting_latency_ms": _ms(self.greeting_latency),
+            "turn_latency_ms": [_ms(v) for v in self.turn_latencies],
+            "duration_s": round((self.finished_at or time.perf_counter()) - self.started_at, 3),
+            "errors": self.errors,
+        }
+
+
+class FrameInjector(io.AudioInput):
+    """Microphone stand-in: real-time paced silence with scripted utterances"""
+
+    def __init__(self, utterance: list, sink: "CaptureSink", stats: SessionStats,
+                 turns: int, think_time: float, reply_timeout: float):
+        super().__init__(label="FrameInjector")
+        self._utterance = utterance
+        self._sink = sink
+        self._stats = stats
+        self._turns = turns
+        self._think_time = think_time
+        self._reply_timeout = reply_timeout
+        self._silence = rtc.AudioFrame(bytes(SAMPLES_PER_FRAME * 2), SAMPLE_RATE, 1, SAMPLES_PER_FRAME)
+        self._queue = asyncio.Queue(maxsize=4)
+        self._next_deadline = None
+        self.done = asyncio.Event()
+        self._driver = asyncio.create_task(self._drive())
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        # Pace frames in real time, like a microphone would
+        now = time.perf_counter()
+        if self._next_deadline is None:
+            self._next_deadline = now
+        self._next_deadline += FRAME_MS / 1000
+        delay = self._next_deadline - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return self._silence
+
+    async def _drive(self):
+        try:
+            start = time.perf_counter()
+            if await self._sink.wait_for_reply(self._reply_timeout):
+                self._stats.greeting_latency = self._sink.last_reply_at - start
+            else:
+                self._stats.errors.append("greeting timed out")
+
+            for _ in range(self._turns):
+                await asyncio.sleep(self._think_time)
+                self._sink.expect_reply()
+                for frame in self._utterance:
+                    await self._queue.put(frame)
+                # The queue drains one frame per tick, so wait for the last one
+                while not self._queue.empty():
+                    await asyncio.sleep(FRAME_MS / 1000)
+                spoken_at = time.perf_counter()
+
+                if not await self._sink.wait_for_reply(self._reply_timeout):
+                    self._stats.errors.append("reply timed out")
+                    continue
+                self._stats.turn_latencies.append(self._sink.last_reply_at - spoken_at)
+                await self._sink.wait_for_playout_done(self._reply_timeout)
+        except Exception as e:
+            self._stats.errors.append(repr(e))
+        finally:
+            self._stats.finished_at = time.perf_counter()
+            self.done.set()
+
+    async def aclose(self):
+        self._driver.cancel()
+
+
+class CaptureSink(io.AudioOutput):
+    """Speaker stand-in: timestamps the first frame of each reply and fakes playout"""
+
+    def __init__(self, playout_speed: float):
+        super().__init__(label="CaptureSink", sample_rate=SAMPLE_RATE)
+        self._playout_speed = playout_speed
+        self._reply = asyncio.Event()
+        self._played = asyncio.Event()
+        self._segment_duration = 0.0
+        self._capturing = False
+        self._playout_task = None
+        self.last_reply_at = None
+
+    def expect_reply(self):
+        self._reply.clear()
+        self._played.clear()
+
+    async def wait_for_reply(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._reply.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_for_playout_done(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._played.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if not self._reply.is_set():
+            self.last_reply_at = time.perf_counter()
+            self._reply.set()
+        self._capturing = True
+        self._segment_duration += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if not self._capturing:
+            return
+        self._capturing = False
+        duration, self._segment_duration = self._segment_duration, 0.0
+        self._playout_task = asyncio.create_task(self._play(duration))
+
+    def clear_buffer(self) -> None:
+        interrupted = self._capturing
+        if self._playout_task and not self._playout_task.done():
+            self._playout_task.cancel()
+            interrupted = True
+        self._capturing = False
+        duration, self._segment_duration = self._segment_duration, 0.0
+        if interrupted:
+            self.on_playback_finished(playback_position=duration, interrupted=True)
+        self._played.set()
+
+    async def _play(self, duration: float):
+        await asyncio.sleep(duration / self._playout_speed if self._playout_speed else 0)
+        self.on_playback_finished(playback_position=duration, interrupted=False)
+        self._played.set()
+
+
+class SimulatedAgentSession(AgentSession):
+    """AgentSession wired to a FrameInjector/CaptureSink instead of RoomIO"""
+
+    def __init__(self, *, injector_factory, sink: CaptureSink, **kwargs):
+        super().__init__(**kwargs)
+        self._injector_factory = injector_factory
+        self._sink = sink
+        self.injector = None
+
+    async def start(self, agent, *, room=NOT_GIVEN, room_input_options=NOT_GIVEN,
+                    room_output_options=NOT_GIVEN):
+        self.injector = self._injector_factory()
+        self.input.audio = self.injector
+        self.output.audio = self._sink
+        # The fake room is deliberately not passed on, so no RoomIO is created
+        await super().start(agent)
+
+
+class FakeRoom:
+    def __init__(self, name: str, metadata: str):
+        self.name = name
+        self.metadata = metadata
+
+
+class FakeJobContext:
+    def __init__(self, room: FakeRoom, connect_latency: Latency):
+        self.room = room
+        self._connect_latency = connect_latency
+
+    async def connect(self):
+        await self._connect_latency.wait()
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up: a proxy for event-loop lag"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - before - self.interval))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+
+class MemoryProbe:
+    """Tracks memory growth against the number of live sessions"""
+
+    def __init__(self, use_tracemalloc: bool):
+        self.use_tracemalloc = use_tracemalloc
+        if use_tracemalloc:
+            tracemalloc.start()
+        self.baseline = self.current()
+        self.live = 0
+        self.peak_live = 0
+        self.per_session_samples = []
+
+    def current(self) -> int:
+        if self.use_tracemalloc:
+            return tracemalloc.get_traced_memory()[0]
+        # ru_maxrss is in KiB on Linux; it only ever grows, which is fine for a peak
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def session_started(self):
+        self.live += 1
+        self.peak_live = max(self.peak_live, self.live)
+
+    def session_finished(self):
+        self.sample()
+        self.live -= 1
+
+    def sample(self):
+        if self.live:
+            self.per_session_samples.append((self.live, (self.current() - self.baseline) / self.live))
+
+
+async def run_session(index: int, args, utterance: list, probe: MemoryProbe) -> SessionStats:
+    simulation_type = args.simulation or random.choice(list(USER_SCRIPTS))
+    stats = SessionStats(f"sim_{index:04d}", simulation_type)
+    sink = CaptureSink(playout_speed=args.playout_speed)
+
+    def session_factory(config):
+        return SimulatedAgentSession(
+            injector_factory=lambda: FrameInjector(
+                utterance, sink, stats, args.turns, args.think_time, args.reply_timeout
+            ),
+            sink=sink,
+            stt=FakeSTT(USER_SCRIPTS[simulation_type], Latency(args.stt_latency, args.jitter)),
+            llm=FakeLLM(Latency(args.llm_latency, args.jitter)),
+            tts=FakeTTS(Latency(args.tts_latency, args.jitter)),
+            turn_detection="stt",
+        )
+
+    room = FakeRoom(
+        name=f"sim_{simulation_type}_{uuid.uuid4().hex[:8]}",
+        metadata=json.dumps({"simulation_type": simulation_type, "user_id": stats.session_id}),
+    )
+    ctx = FakeJobContext(room, Latency(0.05, 0.02))
+
+    probe.session_started()
+    captured = {}
+
+    def capturing_factory(config):
+        captured["session"] = session_factory(config)
+        return captured["session"]
+
+    agent_task = asyncio.create_task(voice_agent.entrypoint(ctx, session_factory=capturing_factory))
+    try:
+        # Wait until the session has been started and its injector exists
+        while "session" not in captured or captured["session"].injector is None:
+            if agent_task.done():
+                raise RuntimeError("entrypoint exited before the session started")
+            await asyncio.sleep(0.05)
+        await captured["session"].injector.done.wait()
+    except Exception as e:
+        stats.errors.append(repr(e))
+    finally:
+        probe.session_finished()
+        agent_task.cancel()
+        session = captured.get("session")
+        if session is not None:
+            await session.injector.aclose() if session.injector else None
+            try:
+                await session.aclose()
+            except Exception as e:
+                stats.errors.append(f"aclose: {e!r}")
+    return stats
+
+
+async def run(args) -> dict:
+    utterance = recorded_utterance(args.audio) if args.audio else synthetic_utterance(args.utterance_seconds)
+    probe = MemoryProbe(args.trace_memory)
+    monitor = LoopLagMonitor()
+    monitor.start()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    stagger = args.ramp / args.sessions if args.sessions else 0
+
+    async def guarded(i):
+        await asyncio.sleep(i * stagger)
+        async with semaphore:
+            return await run_session(i, args, utterance, probe)
+
+    async def sample_memory():
+        while True:
+            await asyncio.sleep(1.0)
+            probe.sample()
+
+    sampler = asyncio.create_task(sample_memory())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(guarded(i) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    monitor.stop()
+
+    return build_report(results, probe, monitor, elapsed)
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": _ms(statistics.fmean(ordered)),
+        "p50_ms": _ms(pct(50)),
+        "p95_ms": _ms(pct(95)),
+        "p99_ms": _ms(pct(99)),
+        "max_ms": _ms(ordered[-1]),
+    }
+
+
+def build_report(results: list, probe: MemoryProbe, monitor: LoopLagMonitor, elapsed: float) -> dict:
+    turn_latencies = [lat for s in results for lat in s.turn_latencies]
+    per_session = [value for _, value in probe.per_session_samples]
+    at_peak = [value for live, value in probe.per_session_samples if live == probe.peak_live]
+    return {
+        "sessions": len(results),
+        "failed_sessions": sum(1 for s in results if s.errors),
+        "peak_concurrent_sessions": probe.peak_live,
+        "elapsed_s": round(elapsed, 2),
+        "turn_latency": _percentiles(turn_latencies),
+        "greeting_latency": _percentiles([s.greeting_latency for s in results if s.greeting_latency is not None]),
+        "event_loop_lag": _percentiles(monitor.samples),
+        "memory": {
+            "source": "tracemalloc" if probe.use_tracemalloc else "max_rss",
+            "per_session_kb_mean": round(statistics.fmean(per_session) / 1024, 1) if per_session else None,
+            "per_session_kb_at_peak": round(max(at_peak) / 1024, 1) if at_peak else None,
+            "process_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        "per_session": [s.to_dict() for s in results],
+    }
+
+
+def print_summary(report: dict):
+    print(f"\n📊 {report['sessions']} sessions ({report['failed_sessions']} failed), "
+          f"peak {report['peak_concurrent_sessions']} concurrent, {report['elapsed_s']}s")
+    for key in ("turn_latency", "greeting_latency", "event_loop_lag"):
+        stats = report[key]
+        if stats["count"]:
+            print(f"  {key:17} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms "
+                  f"p99={stats['p99_ms']}ms max={stats['max_ms']}ms (n={stats['count']})")
+    mem = report["memory"]
+    print(f"  memory/session    mean={mem['per_session_kb_mean']}KiB at-peak={mem['per_session_kb_at_peak']}KiB "
+          f"({mem['source']}), peak RSS {mem['process_peak_rss_mb']}MiB")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the voice agent against fake LiveKit rooms")
+    parser.add_argument("--sessions", type=int, default=100, help="total simulated sessions")
+    parser.add_argument("--concurrency", type=int, default=None, help="max live sessions (default: all)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which sessions are started")
+    parser.add_argument("--turns", type=int, default=3, help="user turns per session")
+    parser.add_argument("--simulation", choices=sorted(USER_SCRIPTS), help="fix the simulation type")
+    parser.add_argument("--audio", help="16-bit mono WAV to use as the user's utterance")
+    parser.add_argument("--utterance-seconds", type=float, default=1.5)
+    parser.add_argument("--think-time", type=float, default=0.5, help="pause before each user turn")
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.6)
+    parser.add_argument("--tts-latency", type=float, default=0.25)
+    parser.add_argument("--jitter", type=float, default=0.1, help="uniform +/- jitter on every latency")
+    parser.add_argument("--playout-speed", type=float, default=4.0,
+                        help="how much faster than real time agent audio is 'played' (0 = instant)")
+    parser.add_argument("--reply-timeout", type=float, default=30.0)
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="use tracemalloc for per-session memory (slower, more precise)")
+    parser.add_argument("--output", help="write the full JSON report here")
+    args = parser.parse_args(argv)
+    args.concurrency = args.concurrency or args.sessions
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"🎙️  Simulating {args.sessions} agent sessions "
+          f"(stt={args.stt_latency}s llm={args.llm_latency}s tts={args.tts_latency}s ±{args.jitter}s)")
+    report = asyncio.run(run(args))
+    print_summary(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📝 Report written to {args.output}")
+    return 1 if report["failed_sessions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# backend/loadtest/fake_openai.py
+"""
+Stand-in for the OpenAI API with configurable latency, jitter and errors.
+
+Serves the three endpoints the backend calls:
+    POST /v1/audio/transcriptions   plain-text transcript
+    POST /v1/chat/completions       a canned Kannada-English reply
+    POST /v1/audio/speech           MP3-sized bytes, streamed in chunks
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+(the OpenAI SDK reads it). Used by loadtest.http_load, or standalone:
+    python -m loadtest.fake_openai --port 8765 --chat-latency 0.8 --error-rate 0.02
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRANSCRIPTS = [
+    "Majestic ge hogabeku",
+    "Tumba jaasti, nooru rupayi kodtini",
+    "ನಮಸ್ಕಾರ, ಹೇಗಿದ್ದೀರಾ",
+    "Ee varsha naanu eradu project lead maadidde",
+    "Kshamisi, nanna tappu",
+]
+REPLIES = [
+    "Sari sir, nooru aivattu aagutte. Traffic tumba ide.",
+    "Hmm, adu swalpa jaasti aaytu. Nooru ippattu kodi.",
+    "Olle prashne! Nimma experience bagge innu swalpa heli.",
+    "Paravagilla, next time signal nodi odisi.",
+]
+# ~48 kbps MP3 at ~15 characters of speech per second
+MP3_BYTES_PER_CHAR = 400
+
+
+@dataclass
+class Profile:
+    """Latency (seconds) is the median; jitter is the spread of a lognormal around it"""
+    latency: float
+    jitter: float = 0.3
+    error_rate: float = 0.0
+
+    def delay(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        return random.lognormvariate(0, self.jitter) * self.latency if self.jitter else self.latency
+
+
+@dataclass
+class FakeOpenAIConfig:
+    transcription: Profile = field(default_factory=lambda: Profile(0.6))
+    chat: Profile = field(default_factory=lambda: Profile(0.8))
+    speech: Profile = field(default_factory=lambda: Profile(0.5))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "fake-openai"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fail(self):
+        """An injected failure, as the real API returns them under load"""
+        status = random.choice((429, 500, 503))
+        body = json.dumps({"error": {"message": "injected failure", "type": "server_error"}}).encode()
+        self._send(status, body, "application/json")
+
+    def do_POST(self):
+        body = self._read_body()
+        config = self.server.config
+        routes = {
+            "/v1/audio/transcriptions": (config.transcription, self._transcription),
+            "/v1/chat/completions": (config.chat, self._chat),
+            "/v1/audio/speech": (config.speech, self._speech),
+        }
+        route = routes.get(self.path.split("?")[0])
+        if route is None:
+            self._send(404, b'{"error": {"message": "not found"}}', "application/json")
+            return
+
+        profile, handler = route
+        self.server.count(self.path)
+        time.sleep(profile.delay())
+        if random.random() < profile.error_rate:
+            self._fail()
+            return
+        handler(body)
+
+    def _transcription(self, body: bytes):
+        self._send(200, random.choice(TRANSCRIPTS).encode("utf-8"), "text/plain; charset=utf-8")
+
+    def _chat(self, body: bytes):
+        request = json.loads(body or b"{}")
+        reply = random.choice(REPLIES)
+        payload = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": reply}}],
+            "usage": {"prompt_tokens": 200, "completion_tokens": 30, "total_tokens": 230},
+        }
+        self._send(200, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def _speech(self, body: bytes):
+        text = json.loads(body or b"{}").get("input", "")
+        audio = os.urandom(max(1024, len(text) * MP3_BYTES_PER_CHAR))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(0, len(audio), 4096):
+            chunk = audio[i:i + 4096]
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, config: FakeOpenAIConfig = None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.config = config or FakeOpenAIConfig()
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def count(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True).start()
+        return self
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--stt-latency", type=float, default=0.6, help="Median transcription latency (s)")
+    parser.add_argument("--chat-latency", type=float, default=0.8, help="Median chat completion latency (s)")
+    parser.add_argument("--tts-latency", type=float, default=0.5, help="Median speech latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Lognormal sigma around each median")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls that fail")
+
+
+def config_from_args(args) -> FakeOpenAIConfig:
+    return FakeOpenAIConfig(
+        transcription=Profile(args.stt_latency, args.jitter, args.error_rate),
+        chat=Profile(args.chat_latency, args.jitter, args.error_rate),
+        speech=Profile(args.tts_latency, args.jitter, args.error_rate),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI API for load tests")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.port, config_from_args(args))
+    print(f"Fake OpenAI listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
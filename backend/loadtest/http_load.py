@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# backend/loadtest/http_load.py
+"""
+End-to-end HTTP load test for the Flask API, without OpenAI, LiveKit or a
+real database.
+
+Starts loadtest.fake_openai (configurable latency/jitter/errors) and, unless
+--target is given, the app itself in-process on a threaded WSGI server with
+MongoDB replaced by mongomock (--mongo mock, the default) or pointed at a
+local mongod (--mongo mongodb://localhost:27017/loadtest). Virtual users
+then run realistic journeys:
+
+    create guest -> tracks -> track -> (lesson -> validate -> submit) x N
+        -> leaderboard -> progress -> simulation start -> converse x M
+
+Requests are paced to --rps across all users. The report gives latency
+percentiles, status codes and error rates per route, plus what the fake
+upstream served. LiveKit voice sessions are load-tested separately with
+loadtest.agent_sim.
+
+Usage (from backend/):
+    python -m loadtest.http_load --rps 20 --duration 60 --users 40
+    python -m loadtest.http_load --rps 50 --chat-latency 1.2 --error-rate 0.02 --json build/load.json
+    # Against a running server (e.g. gunicorn started with OPENAI_BASE_URL
+    # pointing at `python -m loadtest.fake_openai`):
+    python -m loadtest.http_load --target http://127.0.0.1:5001 --rps 100
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+
+from loadtest import fake_openai
+
+SIMULATIONS = ["auto_driver_sim", "salary_negotiation_sim", "crush_conversation_sim"]
+# A few seconds of Opus-in-WebM as the browser records it
+AUDIO_BYTES = (16_000, 48_000)
+
+
+class Pacer:
+    """Global rate limit: hands out request start times at `rps` across all threads"""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # Don't bank unused capacity: a stalled system shouldn't get a burst afterwards
+            start = max(self._next, now)
+            self._next = start + self.interval
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, route: str, latency: float, status):
+        with self._lock:
+            self.latencies[route].append(latency)
+            self.statuses[route][status] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[route] += 1
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+
+            def pct(p):
+                return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+            routes[route] = {
+                "count": len(samples),
+                "rps": len(samples) / elapsed,
+                "error_rate": self.errors[route] / len(samples),
+                "p50_ms": pct(50), "p90_ms": pct(90), "p99_ms": pct(99),
+                "max_ms": ordered[-1] * 1000,
+                "mean_ms": statistics.fmean(samples) * 1000,
+                "statuses": {str(k): v for k, v in sorted(self.statuses[route].items(), key=str)},
+            }
+        total = sum(r["count"] for r in routes.values())
+        errors = sum(self.errors.values())
+        return {
+            "elapsed_s": elapsed,
+            "requests": total,
+            "rps": total / elapsed if elapsed else 0.0,
+            "error_rate": errors / total if total else 0.0,
+            "routes": routes,
+        }
+
+
+class VirtualUser:
+    def __init__(self, base_url: str, pacer: Pacer, stats: Stats, args, rng: random.Random, lessons: list):
+        self.client = httpx.Client(base_url=base_url, timeout=args.timeout)
+        self.pacer = pacer
+        self.stats = stats
+        self.args = args
+        self.rng = rng
+        self.lessons = lessons
+
+    def call(self, route: str, method: str, path: str, **kwargs):
+        """One request; `route` is the template it is reported under"""
+        self.pacer.wait()
+        start = time.perf_counter()
+        try:
+            response = self.client.request(method, path, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        self.stats.record(route, time.perf_counter() - start, status)
+        if response is not None and response.status_code < 400 and response.content:
+            try:
+                return response.json()
+            except ValueError:
+                return None
+        return None
+
+    def _answers(self, lesson: dict) -> dict:
+        """Mostly right, sometimes a typo or a wrong answer, as learners answer"""
+        from core import lesson_manager
+
+        answers = {}
+        for item_id, lesson_type, correct in lesson_manager.get_answer_key(lesson):
+            if correct is None:
+                continue
+            answer = correct[0] if isinstance(correct, list) and lesson_type != "sentence_building" else correct
+            roll = self.rng.random()
+            if roll < 0.15 and isinstance(answer, str) and len(answer) > 3:
+                i = self.rng.randrange(1, len(answer) - 1)
+                answer = answer[:i] + answer[i + 1:]
+            elif roll < 0.25:
+                answer = "wrong" if isinstance(answer, str) else list(reversed(answer))
+            answers[item_id] = answer
+        return answers
+
+    def journey(self):
+        user = self.call("POST /api/user/create-guest", "POST", "/api/user/create-guest")
+        user_id = user and user.get("user_id")
+
+        self.call("GET /api/tracks", "GET", "/api/tracks")
+        track_id, track_lessons = self.rng.choice(self.lessons)
+        self.call("GET /api/tracks/<track_id>", "GET", f"/api/tracks/{track_id}")
+
+        for lesson in self.rng.sample(track_lessons, min(self.args.lessons, len(track_lessons))):
+            self.call("GET /api/lesson/<track_id>/<lesson_id>", "GET", f"/api/lesson/{track_id}/{lesson['id']}")
+            result = self.call(
+                "POST /api/lesson/<track_id>/<lesson_id>/validate", "POST",
+                f"/api/lesson/{track_id}/{lesson['id']}/validate", json={"answers": self._answers(lesson)},
+            )
+            if user_id:
+                self.call("POST /api/game/submit-lesson", "POST", "/api/game/submit-lesson", json={
+                    "user_id": user_id, "track_id": track_id, "lesson_id": lesson["id"],
+                    "score": result["score"] if result else 0,
+                    "time_spent": self.rng.randrange(30, 300),
+                })
+
+        self.call("GET /api/game/leaderboard", "GET", "/api/game/leaderboard")
+        if user_id:
+            self.call("GET /api/game/user/<user_id>/progress", "GET", f"/api/game/user/{user_id}/progress")
+
+        simulation = self.rng.choice(SIMULATIONS)
+        state = self.call("POST /api/simulation/start", "POST", "/api/simulation/start",
+                          json={"simulation_type": simulation, "user_id": user_id})
+        history = (state or {}).get("history", [])
+        for _ in range(self.args.turns):
+            audio = os.urandom(self.rng.randrange(*AUDIO_BYTES))
+            data = json.dumps({"simulation_type": simulation, "history": history, "user_id": user_id})
+            state = self.call("POST /api/simulation/converse", "POST", "/api/simulation/converse",
+                              files={"audio": ("turn.webm", audio, "audio/webm")}, data={"data": data})
+            if state and "history" in state:
+                history = state["history"]
+
+    def run(self, deadline: float):
+        while time.monotonic() < deadline:
+            self.journey()
+        self.client.close()
+
+
+def _catalog() -> list:
+    from core import lesson_manager
+
+    return [(t["id"], t["lessons"]) for t in lesson_manager.load_lesson_data()["tracks"] if t.get("lessons")]
+
+
+def start_app(mongo: str) -> str:
+    """Run the app on a threaded WSGI server in this process; returns its base URL"""
+    from werkzeug.serving import make_server
+
+    if mongo != "mock":
+        os.environ["MONGODB_URI"] = mongo
+    from app import create_app
+    app = create_app()
+
+    if mongo == "mock":
+        import mongomock
+        from core import database
+        database.mongo.cx = mongomock.MongoClient()
+        database.mongo.db = database.mongo.cx["loadtest"]
+
+    # Per-request access logs from both sides would drown the report
+    for name in ("werkzeug", "httpx", "httpx2"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="app-server", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def print_report(report: dict, upstream: dict):
+    print(f"\n{'route':<64} {'count':>6} {'rps':>6} {'err%':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for route, r in report["routes"].items():
+        print(f"{route:<64} {r['count']:>6} {r['rps']:>6.1f} {r['error_rate'] * 100:>5.1f}% "
+              f"{r['p50_ms']:>6.0f}ms {r['p90_ms']:>6.0f}ms {r['p99_ms']:>6.0f}ms {r['max_ms']:>6.0f}ms")
+        failures = {k: v for k, v in r["statuses"].items() if not k.startswith(("2", "3"))}
+        if failures:
+            print(f"{'':<64} statuses: {failures}")
+    print(f"\n{report['requests']} requests in {report['elapsed_s']:.1f}s = {report['rps']:.1f} rps, "
+          f"{report['error_rate'] * 100:.2f}% errors")
+    if upstream:
+        print(f"Fake OpenAI served: {upstream}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HTTP load test")
+    parser.add_argument("--target", help="Base URL of a running server (default: start the app in-process)")
+    parser.add_argument("--mongo", default="mock", help="'mock' (mongomock) or a MongoDB URI for the in-process app")
+    parser.add_argument("--rps", type=float, default=20, help="Target requests per second across all users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--lessons", type=int, default=3, help="Lessons per journey")
+    parser.add_argument("--turns", type=int, default=2, help="Simulation turns per journey")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout (s)")
+    parser.add_argument("--fake-openai-port", type=int, default=0, help="Port for the fake OpenAI server")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="Write the report as JSON")
+    fake_openai.add_arguments(parser)
+    args = parser.parse_args()
+
+    upstream = fake_openai.FakeOpenAIServer(args.fake_openai_port, fake_openai.config_from_args(args)).start()
+    # Read when the app first builds its OpenAI client
+    os.environ["OPENAI_BASE_URL"] = upstream.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "loadtest")
+    os.environ.setdefault("PRERENDER_ON_STARTUP", "false")
+
+    base_url = args.target or start_app(args.mongo)
+    print(f"Target {base_url}, fake OpenAI at {upstream.base_url}")
+    if args.target:
+        print("  (the target must be started with OPENAI_BASE_URL pointing at the fake to use it)")
+
+    lessons = _catalog()
+    pacer, stats = Pacer(args.rps), Stats()
+    rng = random.Random(args.seed)
+    deadline = time.monotonic() + args.duration
+    users = [VirtualUser(base_url, pacer, stats, args, random.Random(rng.random()), lessons)
+             for _ in range(args.users)]
+    threads = [threading.Thread(target=u.run, args=(deadline,), daemon=True) for u in users]
+
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # Journeys in flight at the deadline are allowed to finish
+        thread.join()
+    report = stats.report(time.monotonic() - start)
+    report["config"] = {k: v for k, v in vars(args).items() if k != "json"}
+    report["upstream_requests"] = dict(upstream.requests)
+
+    print_report(report, upstream.requests)
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+    upstream.shutdown()
+    sys.exit(1 if report["error_rate"] > 0.5 else 0)
+
+
+if __name__ == "__main__":
+    main()
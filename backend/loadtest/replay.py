@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# backend/loadtest/replay.py
+"""
+Replay captured production traffic (services.traffic_capture) against a
+test instance.
+
+Records from all segments are merged by timestamp and re-issued with their
+original spacing divided by --speed. --speed 0 sends them as fast as
+--concurrency allows. Each capture pseudonym is mapped to a real user on
+the target:
+    - records whose response issued a user (guest signup) resolve it, and
+      later requests from that user wait for it
+    - pseudonyms first seen mid-session get a fresh guest
+Placeholder strings are sent as captured. Uploads are random bytes of the
+captured size, so payload sizes and upstream work match production while
+content doesn't.
+
+The report shows replayed latency per route next to what was captured,
+and how far behind schedule dispatch fell. A large lag means this client,
+not the target, was the bottleneck.
+
+Usage (from backend/; point the target at loadtest.fake_openai or a
+staging key):
+    python -m loadtest.replay build/traffic --target http://127.0.0.1:5001
+    python -m loadtest.replay capture/*.jsonl.gz --target http://staging:5001 --speed 4 --json build/replay.json
+"""
+import argparse
+import gzip
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+
+import httpx
+
+from loadtest.http_load import Stats, print_report
+
+_PARAM = re.compile(r"<(?:[^:<>]+:)?([^<>]+)>")
+
+
+def read_segment(path: str):
+    """Records of one gzip segment; a segment still being written ends early instead of failing"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        return  # partial last line of an open segment
+        except EOFError:
+            return
+
+
+def load(paths: list, limit: int = None, route: str = None) -> list:
+    files = []
+    for path in paths:
+        files += sorted(glob(os.path.join(path, "*.jsonl.gz"))) if os.path.isdir(path) else [path]
+    # Records are written as requests finish but stamped when they started, so sort
+    records = sorted(itertools.chain.from_iterable(read_segment(f) for f in files), key=lambda r: r["ts"])
+    selected = []
+    for record in records:
+        if route and route not in record["route"]:
+            continue
+        selected.append(record)
+        if limit and len(selected) >= limit:
+            break
+    return selected
+
+
+class UserMap:
+    """Capture pseudonym -> user id on the target"""
+
+    def __init__(self, client: httpx.Client):
+        self.client = client
+        self._ids = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def expect(self, pseudo: str):
+        """A request about to be sent will issue this user"""
+        with self._lock:
+            if pseudo not in self._ids:
+                self._pending.setdefault(pseudo, threading.Event())
+
+    def resolve(self, pseudo: str, user_id: str):
+        with self._lock:
+            self._ids.setdefault(pseudo, user_id)
+            event = self._pending.pop(pseudo, None)
+        if event:
+            event.set()
+
+    def get(self, pseudo: str, timeout: float = 30.0) -> str:
+        with self._lock:
+            user_id = self._ids.get(pseudo)
+            event = self._pending.get(pseudo)
+        if user_id:
+            return user_id
+        if event and event.wait(timeout) and pseudo in self._ids:
+            return self._ids[pseudo]
+        return self._create(pseudo)
+
+    def _create(self, pseudo: str) -> str:
+        with self._lock:
+            if pseudo in self._ids:
+                return self._ids[pseudo]
+            try:
+                response = self.client.post("/api/user/create-guest")
+                user_id = response.json()["user_id"]
+            except (httpx.HTTPError, ValueError, KeyError):
+                # The target will answer 4xx for this user, as it would for a stale id
+                user_id = "0" * 24
+            self._ids[pseudo] = user_id
+            self.created += 1
+            event = self._pending.pop(pseudo, None)
+        if event:
+            event.set()
+        return user_id
+
+    def substitute(self, value):
+        """Swap every pseudonym inside a sanitized value for its target user id"""
+        if isinstance(value, dict):
+            return {k: self.substitute(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.substitute(v) for v in value]
+        if isinstance(value, str) and value.startswith("anon-"):
+            return self.get(value)
+        return value
+
+
+def build_request(record: dict, users: UserMap) -> dict:
+    view_args = users.substitute(record.get("view_args") or {})
+    path = _PARAM.sub(lambda m: str(view_args.get(m.group(1), m.group(0))), record["route"])
+    kwargs = {"params": users.substitute(record.get("query") or {})}
+    if "json" in record:
+        kwargs["json"] = users.substitute(record["json"])
+    elif "form" in record:
+        form = users.substitute(record["form"])
+        for name in record.get("form_json", []):
+            form[name] = json.dumps(form[name])
+        kwargs["data"] = {k: v if isinstance(v, str) else json.dumps(v) for k, v in form.items()}
+        kwargs["files"] = [
+            (f["field"], (f"{f['field']}.bin", os.urandom(f["bytes"]), f["content_type"]))
+            for f in record.get("files", [])
+        ]
+    return {"method": record["method"], "url": path, **kwargs}
+
+
+def replay(records: list, target: str, speed: float, concurrency: int, timeout: float):
+    client = httpx.Client(
+        base_url=target, timeout=timeout,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    )
+    users = UserMap(client)
+    replayed, lag = Stats(), []
+
+    def send(record):
+        route = f"{record['method']} {record['route']}"
+        start = time.perf_counter()
+        try:
+            response = client.request(**build_request(record, users))
+            status = response.status_code
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        replayed.record(route, time.perf_counter() - start, status)
+        issued = record.get("issued_user")
+        if issued:
+            try:
+                users.resolve(issued, response.json()["user_id"])
+            except (AttributeError, ValueError, KeyError, TypeError):
+                users.resolve(issued, users.get(issued, timeout=0))
+
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay")
+    t0, start = records[0]["ts"], time.monotonic()
+    for record in records:
+        if speed > 0:
+            due = start + (record["ts"] - t0) / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            lag.append(max(0.0, -delay))
+        if record.get("issued_user"):
+            users.expect(record["issued_user"])
+        pool.submit(send, record)
+    pool.shutdown(wait=True)
+    elapsed = time.monotonic() - start
+    client.close()
+    return replayed.report(elapsed), lag, users.created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured traffic against a test instance")
+    parser.add_argument("paths", nargs="+", help="Capture segments or directories of them")
+    parser.add_argument("--target", required=True, help="Base URL of the instance to replay against")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression (2 = twice as fast; 0 = no pacing)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout (s)")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N records")
+    parser.add_argument("-k", dest="route", help="Only routes containing this substring")
+    parser.add_argument("--json", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    records = load(args.paths, args.limit, args.route)
+    if not records:
+        sys.exit("No records found")
+    span = records[-1]["ts"] - records[0]["ts"]
+    print(f"Replaying {len(records)} records spanning {span:.0f}s at {args.speed or 'max'}x against {args.target}")
+
+    captured = Stats()
+    for record in records:
+        captured.record(f"{record['method']} {record['route']}", record["duration_ms"] / 1000, record["status"])
+
+    report, lag, created = replay(records, args.target, args.speed, args.concurrency, args.timeout)
+    report["captured"] = captured.report(span or 1.0)
+    if lag:
+        ordered = sorted(lag)
+        report["dispatch_lag_ms"] = {
+            "p50": ordered[len(ordered) // 2] * 1000,
+            "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+            "max": ordered[-1] * 1000,
+        }
+    report["guests_created"] = created
+
+    print("\nAs captured:")
+    print_report(report["captured"], None)
+    print("\nReplayed:")
+    print_report(report, None)
+    if lag:
+        print(f"Dispatch lag p50 {report['dispatch_lag_ms']['p50']:.0f}ms, "
+              f"p99 {report['dispatch_lag_ms']['p99']:.0f}ms, max {report['dispatch_lag_ms']['max']:.0f}ms")
+    print(f"Guests created for users seen mid-session: {created}")
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,96 @@
 # backend/models/user.py
+"""
+Document models. Fields keep their BSON types (ObjectId, datetime), so the
+same dict goes to Mongo unchanged and to jsonify unchanged: the JSON
+provider (services.json_provider) renders those types natively.
+"""
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from bson import ObjectId
 
-class User:
-    def __init__(self, username, email=None):
-        self.username = username
-        self.email = email
-        self.xp = 0
-        self.level = 1
-        self.streak = 0
-        self.last_active = datetime.utcnow()
-        self.completed_lessons = []
-        self.achievements = []
-        self.created_at = datetime.utcnow()
-        
-    def to_dict(self):
-        return {
-            "username": self.username,
-            "email": self.email,
-            "xp": self.xp,
-            "level": self.level,
-            "streak": self.streak,
-            "last_active": self.last_active,
-            "completed_lessons": self.completed_lessons,
-            "achievements": self.achievements,
-            "created_at": self.created_at
-        }
-
-class LessonProgress:
-    def __init__(self, user_id, track_id, lesson_id):
-        self.user_id = ObjectId(user_id)
-        self.track_id = track_id
-        self.lesson_id = lesson_id
-        self.attempts = 0
-        self.best_score = 0
-        self.completed = False
-        self.completed_at = None
-        self.time_spent = 0  # in seconds
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
-        
+_field_names = {}
+
+
+class Document:
+    """to_dict/from_dict for slotted dataclasses; `_id` is only included once set"""
+
+    __slots__ = ()
+
+    @classmethod
+    def _names(cls):
+        names = _field_names.get(cls)
+        if names is None:
+            names = _field_names[cls] = tuple(f.name for f in fields(cls))
+        return names
+
     def to_dict(self):
-        return {
-            "user_id": str(self.user_id),
-            "track_id": self.track_id,
-            "lesson_id": self.lesson_id,
-            "attempts": self.attempts,
-            "best_score": self.best_score,
-            "completed": self.completed,
-            "completed_at": self.completed_at,
-            "time_spent": self.time_spent,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at
-        }
-
-class SimulationHistory:
-    def __init__(self, user_id, simulation_type):
-        self.user_id = ObjectId(user_id)
-        self.simulation_type = simulation_type
-        self.conversation = []
-        self.score = 0
-        self.feedback = {}
-        self.duration = 0  # in seconds
-        self.created_at = datetime.utcnow()
-        
+        doc = {name: getattr(self, name) for name in self._names()}
+        _id = doc.pop("id")
+        if _id is not None:
+            doc["_id"] = _id
+        return doc
+
+    @classmethod
+    def from_dict(cls, doc: dict):
+        values = {name: doc[name] for name in cls._names() if name in doc}
+        if "_id" in doc:
+            values["id"] = doc["_id"]
+        return cls(**values)
+
+
+def _object_id(value):
+    return value if isinstance(value, ObjectId) else ObjectId(value)
+
+
+@dataclass(slots=True)
+class User(Document):
+    username: str
+    email: str = None
+    xp: int = 0
+    level: int = 1
+    streak: int = 0
+    timezone: str = None  # IANA name; streaks use STREAK_DEFAULT_TIMEZONE without one
+    last_active: datetime = field(default_factory=datetime.utcnow)
+    completed_lessons: list = field(default_factory=list)
+    achievements: list = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    id: ObjectId = None
+
+
+@dataclass(slots=True)
+class LessonProgress(Document):
+    user_id: ObjectId
+    track_id: str
+    lesson_id: str
+    attempts: int = 0
+    best_score: int = 0
+    completed: bool = False
+    completed_at: datetime = None
+    time_spent: int = 0  # in seconds
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+    id: ObjectId = None
+
+    def __post_init__(self):
+        self.user_id = _object_id(self.user_id)
+
+
+@dataclass(slots=True)
+class SimulationHistory(Document):
+    user_id: ObjectId
+    simulation_type: str
+    conversation: list = field(default_factory=list)
+    score: int = 0
+    feedback: dict = field(default_factory=dict)
+    duration: int = 0  # in seconds
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    id: ObjectId = None
+
+    def __post_init__(self):
+        self.user_id = _object_id(self.user_id)
+
     def to_dict(self):
-        return {
-            "user_id": str(self.user_id),
-            "simulation_type": self.simulation_type,
-            "conversation": self.conversation,
-            "score": self.score,
-            "feedback": self.feedback,
-            "duration": self.duration,
-            "created_at": self.created_at
-        }
\ No newline at end of file
+        doc = Document.to_dict(self)
+        # Existing simulation_history documents store the user id as a string
+        doc["user_id"] = str(self.user_id)
+        return doc
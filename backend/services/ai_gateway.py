@@ -0,0 +1,222 @@
+# backend/services/ai_gateway.py
+"""
+Single choke point for upstream AI calls (STT, LLM, TTS).
+
+Every call takes a slot for its provider and for its model. A slot is a
+concurrency semaphore plus a token-bucket rate limit. Waiting for a slot
+is bounded by the queue-wait budget and by whatever is left of the HTTP
+request's deadline. When either runs out, the call is shed with
+UpstreamOverloaded instead of piling more load on the provider.
+
+Each call is traced as a span, and its queue wait and upstream latency are
+recorded in services.metrics.
+
+Usage:
+    with ai_gateway.slot("openai", "gpt-4o", "chat") as timeout:
+        client.chat.completions.create(..., timeout=timeout)
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import request, jsonify
+from services import metrics, tracing
+from config import AI_REQUEST_BUDGET, AI_QUEUE_WAIT_BUDGET, AI_PROVIDER_LIMITS, AI_MODEL_LIMITS
+
+# Absolute time.monotonic() deadline for the current request, if any
+_deadline = contextvars.ContextVar("ai_deadline", default=None)
+
+
+class UpstreamOverloaded(Exception):
+    """Raised when an upstream call is shed instead of queued"""
+
+    def __init__(self, provider: str, model: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{provider}/{model}: {reason}")
+        self.provider = provider
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def to_dict(self):
+        return {
+            "error": "Service is busy, please try again shortly",
+            "provider": self.provider,
+            "model": self.model,
+            "reason": self.reason,
+        }
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `rate` tokens per second, up to `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float):
+        """
+        Reserve one token. Returns how long the caller must sleep before
+        using it, or None if that would exceed `max_wait`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return None
+            # Tokens may go negative; that queues later callers behind this one
+            self._tokens -= 1
+            return wait
+
+
+class Limiter:
+    """Concurrency semaphore plus optional rate limit for one provider or model"""
+
+    def __init__(self, concurrency: int = None, rate: float = None, burst: float = None):
+        self.semaphore = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self.bucket = TokenBucket(rate, burst or rate) if rate else None
+
+    def acquire(self, deadline: float) -> str:
+        """Wait until `deadline` for capacity; returns a shed reason or None"""
+        if self.bucket:
+            wait = self.bucket.reserve(max(0.0, deadline - time.monotonic()))
+            if wait is None:
+                return "rate limit"
+            if wait:
+                time.sleep(wait)
+
+        if self.semaphore and not self.semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            return "concurrency limit"
+        return None
+
+    def release(self):
+        if self.semaphore:
+            self.semaphore.release()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter(kind: str, name: str) -> Limiter:
+    key = (kind, name)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limits = (AI_PROVIDER_LIMITS if kind == "provider" else AI_MODEL_LIMITS).get(name, {})
+                limiter = _limiters[key] = Limiter(**limits)
+    return limiter
+
+
+def remaining_budget() -> float:
+    """Seconds left before the current request's deadline (the default budget outside requests)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return AI_REQUEST_BUDGET
+    return deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Bound every upstream call made inside the block to `seconds` in total"""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _shed(provider: str, model: str, reason: str, label: str) -> UpstreamOverloaded:
+    metrics.UPSTREAM_SHED.inc(provider, label)
+    return UpstreamOverloaded(provider, model, reason)
+
+
+@contextmanager
+def slot(provider: str, model: str, operation: str = "call"):
+    """
+    Hold a provider+model slot for one upstream call.
+    Yields the timeout (seconds) the call itself should use.
+    """
+    with tracing.span(f"{provider} {operation}", provider=provider, model=model) as span:
+        with _slot(provider, model, operation, span) as timeout:
+            yield timeout
+
+
+@contextmanager
+def _slot(provider: str, model: str, operation: str, span):
+    budget = remaining_budget()
+    if budget <= 0:
+        raise _shed(provider, model, "request deadline exceeded", "deadline")
+
+    queued_at = time.monotonic()
+    queue_deadline = queued_at + min(AI_QUEUE_WAIT_BUDGET, budget)
+    provider_limiter = _limiter("provider", provider)
+    model_limiter = _limiter("model", model)
+
+    reason = provider_limiter.acquire(queue_deadline)
+    if reason:
+        raise _shed(provider, model, f"{provider} {reason}", reason)
+    try:
+        reason = model_limiter.acquire(queue_deadline)
+        if reason:
+            raise _shed(provider, model, f"{model} {reason}", reason)
+        try:
+            started_at = time.monotonic()
+            metrics.UPSTREAM_QUEUE_WAIT.observe(started_at - queued_at, provider)
+            if span is not None:
+                span.set("queue_wait_ms", round((started_at - queued_at) * 1000, 1))
+            timeout = remaining_budget()
+            if timeout <= 0:
+                raise _shed(provider, model, "request deadline exceeded", "deadline")
+            outcome = "error"
+            try:
+                yield timeout
+                outcome = "ok"
+            finally:
+                metrics.UPSTREAM_LATENCY.observe(time.monotonic() - started_at, provider, model, operation, outcome)
+        finally:
+            model_limiter.release()
+    finally:
+        provider_limiter.release()
+
+
+def init_app(app):
+    """Propagate per-request deadlines and turn shed calls into 503s"""
+
+    @app.before_request
+    def _start_deadline():
+        budget = AI_REQUEST_BUDGET
+        header = request.headers.get("X-Request-Timeout")
+        if header:
+            try:
+                budget = min(budget, float(header))
+            except ValueError:
+                pass
+        request.environ["ai_gateway.deadline_token"] = _deadline.set(time.monotonic() + budget)
+
+    @app.teardown_request
+    def _end_deadline(exc=None):
+        token = request.environ.pop("ai_gateway.deadline_token", None)
+        if token is not None:
+            try:
+                _deadline.reset(token)
+            except ValueError:
+                # Set in a different context (e.g. async views); just clear it
+                _deadline.set(None)
+
+    @app.errorhandler(UpstreamOverloaded)
+    def _overloaded(e):
+        response = jsonify(e.to_dict())
+        response.status_code = 503
+        response.headers["Retry-After"] = str(int(max(1, e.retry_after)))
+        return response
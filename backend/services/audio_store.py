@@ -0,0 +1,96 @@
+# backend/services/audio_store.py
+"""
+Content-addressed store for synthesized speech.
+
+Clips are MP3 files named by sha1(voice:text) under AUDIO_STORE_DIR and
+served from /api/audio/<key>.mp3. The pre-render job (core.tts_prerender)
+fills the store ahead of time, so lessons and simulation openers can be
+served without calling TTS at request time.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from flask import has_request_context, request
+from services import metrics
+from config import AUDIO_STORE_DIR, AUDIO_PUBLIC_BASE_URL
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+
+def key_for(text: str, voice: str = "alloy") -> str:
+    return hashlib.sha1(f"{voice}:{text}".encode("utf-8")).hexdigest()
+
+
+def path_for(key: str) -> str:
+    if not _KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid audio key: {key}")
+    # Two-level fan-out keeps directories small
+    return os.path.join(AUDIO_STORE_DIR, key[:2], f"{key}.mp3")
+
+
+def url_path(key: str) -> str:
+    return f"/api/audio/{key}.mp3"
+
+
+def public_url(path: str) -> str:
+    """Absolute URL for a stored clip; the frontend is served from another origin"""
+    if not path or not path.startswith("/"):
+        return path
+    if AUDIO_PUBLIC_BASE_URL:
+        return AUDIO_PUBLIC_BASE_URL.rstrip("/") + path
+    if has_request_context():
+        return request.host_url.rstrip("/") + path
+    return path
+
+
+def exists(text: str, voice: str = "alloy") -> bool:
+    return os.path.exists(path_for(key_for(text, voice)))
+
+
+def load(text: str, voice: str = "alloy"):
+    """Stored MP3 bytes for `text`, or None"""
+    try:
+        with open(path_for(key_for(text, voice)), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def save(text: str, voice: str, data: bytes) -> str:
+    """Store a clip atomically; returns its key"""
+    key = key_for(text, voice)
+    path = path_for(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique per call: two threads may render the same clip at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.fchmod(fd, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return key
+
+
+def stored_url(text: str, voice: str = "alloy"):
+    """Public URL of the stored clip for `text`, or None if it hasn't been rendered"""
+    key = key_for(text, voice)
+    if not os.path.exists(path_for(key)):
+        metrics.cache_miss("audio_store")
+        return None
+    metrics.cache_hit("audio_store")
+    return public_url(url_path(key))
+
+
+def get_or_render(text: str, voice: str = "alloy") -> bytes:
+    """Stored clip for `text`, synthesizing and storing it first if needed"""
+    data = load(text, voice)
+    if data is not None:
+        metrics.cache_hit("audio_store")
+    else:
+        metrics.cache_miss("audio_store")
+        # Imported here so the store can be used without an OpenAI client (e.g. serving files)
+        from services.openai_client import OpenAIService
+        data = OpenAIService.synthesize_speech(text, voice)
+        save(text, voice, data)
+    return data
@@ -1,10 +1,16 @@
 # backend/services/content_filter.py
+import logging
 from services.openai_client import OpenAIService
+from services.ai_gateway import UpstreamOverloaded
+from services import tracing
 from config import INAPPROPRIATE_WORDS
 
+logger = logging.getLogger(__name__)
+
 class ContentFilter:
     
     @staticmethod
+    @tracing.traced("content_filter.check_text")
     def check_text_content(text: str) -> dict:
         """Check if text contains inappropriate content"""
         # Simple keyword filter
@@ -19,6 +25,7 @@ class ContentFilter:
         return {"inappropriate": False}
     
     @staticmethod
+    @tracing.traced("content_filter.check_audio")
     def check_audio_content(audio_bytes: bytes) -> dict:
         """Check if audio contains inappropriate content"""
         try:
@@ -28,12 +35,15 @@ class ContentFilter:
             # Then check the transcription
             return ContentFilter.check_text_content(transcription)
             
+        except UpstreamOverloaded:
+            raise
         except Exception as e:
-            print(f"Error checking audio content: {e}")
+            logger.error("Error checking audio content: %s", e)
             # In case of error, allow the content
             return {"inappropriate": False}
     
     @staticmethod
+    @tracing.traced("content_filter.filter_response")
     def filter_simulation_response(response: str, simulation_type: str) -> str:
         """Filter and adjust AI responses based on simulation type"""
         if simulation_type == "road_rage_sim":
@@ -1,6 +1,205 @@
 # backend/services/gamification.py
-from datetime import datetime, timedelta
-from config import XP_PER_CORRECT_ANSWER, XP_PER_LESSON_COMPLETION, XP_PER_PERFECT_LESSON, LEVELS
+import math
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from config import (
+    XP_PER_CORRECT_ANSWER, XP_PER_LESSON_COMPLETION, XP_PER_PERFECT_LESSON, LEVELS, LEVEL_CURVE_GROWTH, LEVEL_CAP,
+    STREAK_DEFAULT_TIMEZONE,
+)
+
+
+@dataclass(slots=True)
+class LevelInfo:
+    level: int
+    xp: int
+    floor: int  # XP at which `level` starts
+    next_threshold: int  # XP at which the next level starts; None at the cap
+    xp_to_next: int
+    progress: float  # percent of the way from `floor` to `next_threshold`
+
+
+class LevelTable:
+    """
+    XP floors per level: LEVELS for the first levels, then each step is
+    `growth` times the one before, up to `cap` (0 = no cap). Floors are
+    precomputed once, so a lookup is one bisect; XP past the precomputed
+    levels is mapped by inverting the curve in closed form.
+    """
+
+    def __init__(self, levels: dict, growth: float = LEVEL_CURVE_GROWTH, cap: int = LEVEL_CAP, precompute: int = 100):
+        base = [xp for _, xp in sorted(levels.items())]
+        if sorted(levels) != list(range(1, len(base) + 1)) or any(a >= b for a, b in zip(base, base[1:])):
+            raise ValueError("LEVELS must number levels 1..n with increasing XP")
+        if growth < 1:
+            raise ValueError("LEVEL_CURVE_GROWTH must be at least 1")
+        self._base = base
+        self._step = base[-1] - base[-2] if len(base) > 1 else max(base[-1], 100)
+        self.growth = growth
+        self.cap = cap
+        count = cap if cap else max(len(base), precompute)
+        self._floors = [self._formula_floor(level) for level in range(1, count + 1)]
+
+    def _formula_floor(self, level: int) -> int:
+        if level <= len(self._base):
+            return self._base[level - 1]
+        k = level - len(self._base)
+        if self.growth == 1:
+            return self._base[-1] + self._step * k
+        return self._base[-1] + round(self._step * self.growth * (self.growth ** k - 1) / (self.growth - 1))
+
+    def floor(self, level: int) -> int:
+        """XP needed to reach `level`"""
+        if level <= len(self._floors):
+            return self._floors[max(level, 1) - 1]
+        return self._formula_floor(level)
+
+    def level_for(self, xp: int) -> int:
+        if xp < self._floors[-1] or self.cap:
+            return max(1, bisect_right(self._floors, xp))
+        extra = xp - self._base[-1]
+        if self.growth == 1:
+            level = len(self._base) + int(extra // self._step)
+        else:
+            ratio = extra * (self.growth - 1) / (self._step * self.growth) + 1
+            level = len(self._base) + int(math.log(ratio, self.growth))
+        # Correct float rounding at the boundaries
+        while self._formula_floor(level + 1) <= xp:
+            level += 1
+        while self._formula_floor(level) > xp:
+            level -= 1
+        return level
+
+    def info(self, xp: int) -> LevelInfo:
+        floors = self._floors
+        if xp < floors[-1]:
+            # Common case: both floors come from the precomputed table
+            level = max(1, bisect_right(floors, xp))
+            floor, next_threshold = floors[level - 1], floors[level]
+        else:
+            level = self.level_for(xp)
+            floor = self.floor(level)
+            if self.cap and level >= self.cap:
+                return LevelInfo(level, xp, floor, None, 0, 100.0)
+            next_threshold = self.floor(level + 1)
+        # Rounded down, so 100% only ever means the level is complete
+        progress = math.floor(1000 * (xp - floor) / (next_threshold - floor)) / 10
+        return LevelInfo(level, xp, floor, next_threshold, next_threshold - xp, progress)
+
+
+LEVEL_TABLE = LevelTable(LEVELS)
+
+
+@lru_cache(maxsize=1024)
+def streak_zone(name: str = None):
+    """Time zone for a user's `timezone` field; missing or unknown names fall back to STREAK_DEFAULT_TIMEZONE"""
+    try:
+        return ZoneInfo(name or STREAK_DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return streak_zone(None) if name else timezone.utc
+
+
+def valid_timezone(name) -> bool:
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        return False
+    return True
+
+
+def local_time(utc: datetime, zone) -> datetime:
+    """A stored naive-UTC datetime in `zone`"""
+    return utc.replace(tzinfo=timezone.utc).astimezone(zone)
+
+
+def streak_expiry(last_day, zone) -> datetime:
+    """Naive UTC instant a streak last extended on local date `last_day` is lost: when the next day ends"""
+    end = datetime.combine(last_day + timedelta(days=2), time(), tzinfo=zone)
+    return end.astimezone(timezone.utc).replace(tzinfo=None)
+
+# Events the callers emit
+LESSON_ATTEMPTED = "lesson_attempted"
+LESSON_COMPLETED = "lesson_completed"
+STREAK_UPDATED = "streak_updated"
+LEVEL_UP = "level_up"
+SIMULATION_COMPLETED = "simulation_completed"
+
+# Per-user counters kept on the user document (`counters.<name>`) and bumped
+# with $inc when the event happens, so rules never look at history
+LESSONS_COMPLETED = "lessons_completed"  # distinct lessons completed
+PERFECT_LESSONS = "perfect_lessons"  # distinct lessons with a 100% score
+HIGH_SCORE_SIMULATIONS = "high_score_simulations"  # simulations ending with >= SIMULATION_HIGH_SCORE
+
+
+@dataclass(frozen=True, slots=True)
+class AchievementRule:
+    """
+    Awards `achievement` when one of `triggers` fires and the rule holds:
+    `counter` (user counters) or `field` (user document) reaches `threshold`,
+    and/or the event happened during the `hours` window [start, end), which
+    may wrap past midnight. Hours are the user's local time when the caller
+    passes one, UTC otherwise.
+    """
+    achievement: str
+    triggers: tuple
+    counter: str = None
+    field: str = None
+    threshold: int = 1
+    hours: tuple = None
+
+    def holds(self, user: dict, hour: int) -> bool:
+        if self.counter and (user.get("counters") or {}).get(self.counter, 0) < self.threshold:
+            return False
+        if self.field and (user.get(self.field) or 0) < self.threshold:
+            return False
+        if self.hours:
+            start, end = self.hours
+            if not (start <= hour < end if start < end else hour >= start or hour < end):
+                return False
+        return True
+
+
+ACHIEVEMENT_RULES = (
+    AchievementRule("first_lesson", (LESSON_COMPLETED,), counter=LESSONS_COMPLETED, threshold=1),
+    AchievementRule("streak_3", (STREAK_UPDATED,), field="streak", threshold=3),
+    AchievementRule("streak_7", (STREAK_UPDATED,), field="streak", threshold=7),
+    AchievementRule("perfect_10", (LESSON_COMPLETED,), counter=PERFECT_LESSONS, threshold=10),
+    AchievementRule("night_owl", (LESSON_COMPLETED,), hours=(22, 5)),
+    AchievementRule("early_bird", (LESSON_COMPLETED,), hours=(5, 7)),
+    AchievementRule("simulation_master", (SIMULATION_COMPLETED,), counter=HIGH_SCORE_SIMULATIONS, threshold=5),
+    AchievementRule("kannada_champion", (LEVEL_UP,), field="level", threshold=10),
+)
+
+
+class AchievementEngine:
+    """Rules indexed by trigger: an event only evaluates the rules subscribed to it"""
+
+    def __init__(self, rules):
+        self._by_trigger = defaultdict(list)
+        for rule in rules:
+            for trigger in rule.triggers:
+                self._by_trigger[trigger].append(rule)
+
+    def evaluate(self, user: dict, events, hour: int = None) -> list:
+        """Ids of achievements newly earned by `user` (with its counters already updated) for `events`"""
+        earned = user.get("achievements") or ()
+        new = []
+        for event in events:
+            for rule in self._by_trigger.get(event, ()):
+                if rule.achievement in earned or rule.achievement in new:
+                    continue
+                if rule.hours and hour is None:
+                    hour = datetime.utcnow().hour
+                if rule.holds(user, hour):
+                    new.append(rule.achievement)
+        return new
+
+
+achievement_engine = AchievementEngine(ACHIEVEMENT_RULES)
+
 
 class GamificationService:
     
@@ -66,67 +265,74 @@ class GamificationService:
     @staticmethod
     def calculate_level(xp: int) -> int:
         """Calculate user level based on XP"""
-        for level, required_xp in sorted(LEVELS.items(), reverse=True):
-            if xp >= required_xp:
-                return level
-        return 1
+        return LEVEL_TABLE.level_for(xp)
+    
+    @staticmethod
+    def level_info(xp: int) -> LevelInfo:
+        """Level, its XP floor, the next threshold and progress towards it"""
+        return LEVEL_TABLE.info(xp)
     
     @staticmethod
     def xp_for_next_level(current_xp: int) -> tuple:
         """Calculate XP needed for next level"""
-        current_level = GamificationService.calculate_level(current_xp)
-        if current_level >= max(LEVELS.keys()):
+        info = LEVEL_TABLE.info(current_xp)
+        if info.next_threshold is None:
             return 0, 0  # Max level reached
-        
-        next_level = current_level + 1
-        xp_needed = LEVELS[next_level] - current_xp
-        return xp_needed, LEVELS[next_level]
+        return info.xp_to_next, info.next_threshold
     
     @staticmethod
-    def calculate_streak(last_active: datetime) -> bool:
-        """Check if user maintains their streak"""
-        if not last_active:
-            return True
-        
-        now = datetime.utcnow()
-        difference = now - last_active
-        
-        # Allow up to 36 hours to maintain streak
-        return difference <= timedelta(hours=36)
+    def update_streak(streak: int, last_active: datetime, zone, now: datetime = None) -> tuple:
+        """
+        (streak, expires_at) after activity at `now` (naive UTC). A streak
+        counts consecutive calendar days in the user's time zone: a second
+        lesson the same day keeps it, one the next day extends it, anything
+        later starts over. It expires when the day after `now` ends.
+        """
+        now = now or datetime.utcnow()
+        today = local_time(now, zone).date()
+        if not (streak and last_active):
+            streak = 1
+        else:
+            days = (today - local_time(last_active, zone).date()).days
+            if days == 1:
+                streak += 1
+            elif days > 1:
+                streak = 1
+        return streak, streak_expiry(today, zone)
     
     @staticmethod
-    def check_achievements(user_data: dict, action: str, context: dict = None) -> list:
-        """Check if user earned any new achievements"""
-        new_achievements = []
-        current_achievements = user_data.get('achievements', [])
-        
-        # First lesson
-        if action == "lesson_completed" and len(user_data.get('completed_lessons', [])) == 1:
-            if "first_lesson" not in current_achievements:
-                new_achievements.append(ACHIEVEMENTS["first_lesson"]) 
-        
-        # Streak achievements
-        streak = user_data.get('streak', 0)
-        if streak >= 3 and "streak_3" not in current_achievements:
-            new_achievements.append(ACHIEVEMENTS["streak_3"])
-        if streak >= 7 and "streak_7" not in current_achievements:
-            new_achievements.append(ACHIEVEMENTS["streak_7"])
-        
-        # Time-based achievements
-        current_hour = datetime.utcnow().hour
-        if action == "lesson_completed":
-            if current_hour >= 22 or current_hour < 5:
-                if "night_owl" not in current_achievements:
-                    new_achievements.append(ACHIEVEMENTS["night_owl"])
-            elif current_hour < 7:
-                if "early_bird" not in current_achievements:
-                    new_achievements.append(ACHIEVEMENTS["early_bird"])
-        
-        # Level achievement
-        if user_data.get('level', 1) >= 10 and "kannada_champion" not in current_achievements:
-            new_achievements.append(ACHIEVEMENTS["kannada_champion"])
-        
-        return new_achievements
+    def check_achievements(user_data: dict, events, hour: int = None) -> list:
+        """Achievements newly earned for `events`; user_data must already carry the updated counters"""
+        if isinstance(events, str):
+            events = (events,)
+        return [
+            GamificationService.ACHIEVEMENTS[achievement_id]
+            for achievement_id in achievement_engine.evaluate(user_data, events, hour)
+        ]
+    
+    @staticmethod
+    def award_achievements(user: dict, events, hour: int = None) -> tuple:
+        """
+        Applies what `events` unlock to the user dict: achievement ids, their XP
+        and the level reached with it, which can unlock level rules in turn.
+        Returns (new achievements, XP awarded).
+        """
+        new_achievements, awarded = [], 0
+        while True:
+            earned = GamificationService.check_achievements(user, events, hour)
+            if not earned:
+                break
+            new_achievements += earned
+            user['achievements'] = list(user.get('achievements') or []) + [ach['id'] for ach in earned]
+            xp = sum(ach['xp_reward'] for ach in earned)
+            awarded += xp
+            user['xp'] = user.get('xp', 0) + xp
+            level = LEVEL_TABLE.level_for(user['xp'])
+            if level <= user.get('level', 1):
+                break
+            user['level'] = level
+            events = (LEVEL_UP,)
+        return new_achievements, awarded
     
     @staticmethod
     def calculate_lesson_xp(score: float, time_spent: int, first_attempt: bool) -> int:
@@ -145,4 +351,4 @@ class GamificationService:
         if time_spent < 120:
             base_xp = int(base_xp * 1.2)
         
-        return base_xp
\ No newline at end of file
+        return base_xp
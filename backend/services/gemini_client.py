@@ -1,9 +1,71 @@
+import logging
+import importlib.util
 
-import google.generativeai as genai
 from config import GEMINI_API_KEY
+from services import ai_gateway
+from services.lazy import Lazy
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash')
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+# Without GEMINI_API_KEY (or the google-generativeai SDK) Gemini is simply unavailable.
+# The SDK (and grpc) is only imported when Gemini is first used.
+_available = bool(GEMINI_API_KEY) and importlib.util.find_spec("google.generativeai") is not None
+
+def _configure_sdk():
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai
+
+# Every model, with or without a system instruction, comes from the configured SDK
+_genai = Lazy(_configure_sdk, name="gemini_sdk")
+_model = Lazy(lambda: _genai.get().GenerativeModel(GEMINI_MODEL), name="gemini")
+
+def get_model():
+    return _model.get()
+
+def is_available() -> bool:
+    return _available
+
+def to_gemini_contents(messages: list) -> tuple:
+    """
+    Convert OpenAI-style chat messages ({"role", "content"}) to Gemini's format.
+    Returns (system_instruction, contents).
+    """
+    system_parts = []
+    contents = []
+    for message in messages:
+        role = message.get("role")
+        if role == "system":
+            system_parts.append(message["content"])
+            continue
+        contents.append({
+            "role": "model" if role == "assistant" else "user",
+            "parts": [message["content"]]
+        })
+    return "\n\n".join(system_parts) or None, contents
+
+def generate_chat_response(messages: list, temperature: float = 0.7, max_tokens: int = 150,
+                           timeout: float = None) -> str:
+    """
+    Generate a reply for OpenAI-style chat messages. Raises on failure so
+    callers (the LLM router) can fail over.
+    """
+    if not is_available():
+        raise RuntimeError("Gemini is not configured")
+
+    system_instruction, contents = to_gemini_contents(messages)
+    if system_instruction:
+        chat_model = _genai.get().GenerativeModel(GEMINI_MODEL, system_instruction=system_instruction)
+    else:
+        chat_model = get_model()
+    response = chat_model.generate_content(
+        contents,
+        generation_config={"temperature": temperature, "max_output_tokens": max_tokens},
+        request_options={"timeout": timeout} if timeout else None
+    )
+    return response.text
 
 def get_simulation_prompt(simulation_type, history):
     """Creates a detailed system prompt for the Gemini model based on the simulation."""
@@ -58,9 +120,14 @@ def generate_simulation_response(simulation_type: str, history: list) -> str:
         The text response from the Gemini model.
     """
     try:
+        if not is_available():
+            raise RuntimeError("Gemini is not configured")
         prompt = get_simulation_prompt(simulation_type, history)
-        response = model.generate_content(prompt)
+        with ai_gateway.slot("gemini", GEMINI_MODEL, "chat") as timeout:
+            response = get_model().generate_content(prompt, request_options={"timeout": timeout})
         return response.text
+    except ai_gateway.UpstreamOverloaded:
+        raise
     except Exception as e:
-        print(f"Error calling Gemini API: {e}")
+        logger.error("Error calling Gemini API: %s", e)
         return "Sorry, I am having trouble responding right now."
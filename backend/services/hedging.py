@@ -0,0 +1,112 @@
+# backend/services/hedging.py
+"""
+Hedged requests: run a primary upstream call, and if it hasn't answered
+by the time a given percentile of its recent latency has passed, start a
+fallback in parallel and take whichever finishes first.
+
+Attempts are callables taking a threading.Event that is set once the
+attempt has lost; long-running attempts should check it and stop early.
+
+Every call counts its outcome (primary, fallback or failed) in
+hedge_requests_total and its latency in hedge_duration_seconds, labelled
+by policy, and tags the caller's span with hedge.path and hedge.hedged.
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from services import metrics, tracing
+from config import HEDGE_MAX_WORKERS, HEDGE_POLICIES
+
+_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+
+
+class HedgePolicy:
+    def __init__(self, name: str, percentile: float = 90, default_delay: float = 1.5,
+                 min_delay: float = 0.2, max_delay: float = 5.0, window: int = 200):
+        self.name = name
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._primary_latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float:
+        """How long to give the primary before starting the fallback"""
+        with self._lock:
+            samples = sorted(self._primary_latencies)
+        if len(samples) < 20:
+            return self.default_delay
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return min(self.max_delay, max(self.min_delay, samples[index]))
+
+    def _record_primary_latency(self, latency: float):
+        with self._lock:
+            self._primary_latencies.append(latency)
+
+    def _record(self, path: str, latency: float, hedged: bool):
+        metrics.HEDGE_REQUESTS.inc(self.name, path, str(hedged).lower())
+        metrics.HEDGE_LATENCY.observe(latency, self.name, path)
+        span = tracing.current_span()
+        if span is not None:
+            span.set("hedge.path", path)
+            span.set("hedge.hedged", hedged)
+
+    def run(self, primary, fallback):
+        """
+        Run `primary`, hedging with `fallback`, and return the winner's result.
+        Raises the fallback's exception (or the primary's) if both fail.
+        """
+        start = time.monotonic()
+        attempts = {}
+
+        def launch(path, fn):
+            cancelled = threading.Event()
+            # Carry the request context (e.g. the AI deadline) into the worker thread
+            ctx = contextvars.copy_context()
+            future = _executor.submit(ctx.run, fn, cancelled)
+            attempts[future] = (path, cancelled)
+            return future
+
+        primary_future = launch("primary", primary)
+        primary_future.add_done_callback(
+            lambda f: f.exception() is None and self._record_primary_latency(time.monotonic() - start)
+        )
+
+        done, _ = wait([primary_future], timeout=self.hedge_delay())
+        if not done or primary_future.exception() is not None:
+            launch("fallback", fallback)
+
+        pending = set(attempts)
+        errors = {}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, _ = attempts[future]
+                if future.exception() is not None:
+                    errors[path] = future.exception()
+                    # A failed primary should not wait out the hedge delay
+                    if path == "primary" and len(attempts) == 1:
+                        pending.add(launch("fallback", fallback))
+                    continue
+
+                latency = time.monotonic() - start
+                for other, (_, cancelled) in attempts.items():
+                    if other is not future:
+                        cancelled.set()
+                        other.cancel()
+                self._record(path, latency, hedged=len(attempts) > 1)
+                return future.result()
+
+        self._record("failed", time.monotonic() - start, hedged=len(attempts) > 1)
+        raise errors.get("fallback") or errors["primary"]
+
+
+_policies = {name: HedgePolicy(name, **options) for name, options in HEDGE_POLICIES.items()}
+
+
+def get_policy(name: str) -> HedgePolicy:
+    return _policies[name]
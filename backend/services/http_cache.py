@@ -0,0 +1,144 @@
+# backend/services/http_cache.py
+"""
+Precomputed, conditionally-served responses for endpoints that return the
+same bytes to everyone (track catalog, achievements, duel rounds).
+
+A view wrapped in @cached_json is run once per URL and content version. Its
+JSON body is serialized once, hashed into a strong ETag, and compressed
+once per encoding (gzip, plus brotli when the module is installed). After
+that, each request costs a dict lookup: a 304 if If-None-Match matches,
+otherwise the stored body in the best encoding the client accepts.
+Cache-Control comes from HTTP_CACHE_POLICIES, keyed by endpoint name.
+"""
+import gzip
+import hashlib
+import threading
+from functools import wraps
+
+from flask import Response, current_app, request
+from config import HTTP_CACHE_POLICIES, HTTP_CACHE_DEFAULT_POLICY
+from services import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Below this size compression costs more than it saves
+MIN_COMPRESS_SIZE = 512
+
+
+class CachedBody:
+    __slots__ = ("etag", "identity", "encodings")
+
+    def __init__(self, body: bytes):
+        self.identity = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.encodings = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.encodings["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.encodings["br"] = brotli.compress(body, quality=11)
+
+
+_entries = {}
+_entries_lock = threading.Lock()
+
+
+def _accepted_encodings(header: str) -> dict:
+    """Accept-Encoding -> {encoding: q}"""
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def _choose_encoding(entry: CachedBody) -> str:
+    accepted = _accepted_encodings(request.headers.get("Accept-Encoding"))
+    best, best_q = None, 0.0
+    for encoding in ("br", "gzip"):
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in entry.encodings and q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _etag_matches(entry: CachedBody) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return entry.etag in tags
+
+
+def _respond(entry: CachedBody, cache_control: str) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if _etag_matches(entry):
+        return Response(status=304, headers=headers)
+
+    encoding = _choose_encoding(entry)
+    body = entry.encodings[encoding] if encoding else entry.identity
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    response = Response(body, status=200, mimetype="application/json", headers=headers)
+    # Already encoded: keep Werkzeug from touching the body
+    response.direct_passthrough = True
+    return response
+
+
+def cached_json(version=None, cache_control: str = None):
+    """
+    Cache a view's 200 JSON response. `version` is a callable whose result
+    changes when the underlying content does (e.g. the catalog's mtime);
+    other status codes pass through uncached.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            policy = cache_control or HTTP_CACHE_POLICIES.get(request.endpoint, HTTP_CACHE_DEFAULT_POLICY)
+            key = (request.endpoint, tuple(sorted(kwargs.items())), version() if version else None)
+
+            entry = _entries.get(key)
+            if entry is not None:
+                metrics.cache_hit("http_response")
+            else:
+                metrics.cache_miss("http_response")
+                result = view(*args, **kwargs)
+                payload, status = result if isinstance(result, tuple) else (result, 200)
+                if status != 200:
+                    return result
+                if isinstance(payload, Response):
+                    body = payload.get_data()
+                else:
+                    body = current_app.json.dumps(payload).encode("utf-8")
+                entry = CachedBody(body)
+                with _entries_lock:
+                    # Drop entries for older versions of this URL
+                    for stale in [k for k in _entries if k[:2] == key[:2] and k != key]:
+                        del _entries[stale]
+                    _entries[key] = entry
+
+            return _respond(entry, policy)
+
+        return wrapper
+
+    return decorator
+
+
+def clear():
+    with _entries_lock:
+        _entries.clear()
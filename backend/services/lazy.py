@@ -0,0 +1,40 @@
+# backend/services/lazy.py
+import threading
+
+
+class Lazy:
+    """
+    Thread-safe, build-on-first-use holder for expensive clients.
+
+    Usage:
+        _client = Lazy(lambda: OpenAI(api_key=OPENAI_API_KEY))
+        _client.get().chat.completions.create(...)
+
+    A factory that raises is retried on the next get(), so a missing key
+    only breaks the calls that need that client, not app startup.
+    """
+
+    _UNSET = object()
+
+    def __init__(self, factory, name: str = None):
+        self._factory = factory
+        self._value = self._UNSET
+        self._lock = threading.Lock()
+        self.name = name or getattr(factory, "__name__", "lazy")
+
+    def get(self):
+        value = self._value
+        if value is self._UNSET:
+            with self._lock:
+                value = self._value
+                if value is self._UNSET:
+                    value = self._value = self._factory()
+        return value
+
+    @property
+    def initialized(self) -> bool:
+        return self._value is not self._UNSET
+
+    def reset(self):
+        with self._lock:
+            self._value = self._UNSET
@@ -0,0 +1,232 @@
+# backend/services/livekit_client.py
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+from livekit.api import LiveKitAPI, CreateRoomRequest, DeleteRoomRequest
+from config import (
+    LIVEKIT_API_KEY, LIVEKIT_API_SECRET, LIVEKIT_URL,
+    LIVEKIT_ROOM_POOL_SIZE, LIVEKIT_ROOM_POOL_MAX_AGE,
+)
+
+logger = logging.getLogger(__name__)
+
+SIMULATION_TYPES = [
+    "auto_driver_sim",
+    "salary_negotiation_sim",
+    "crush_conversation_sim",
+    "road_rage_sim",
+]
+
+
+def build_room_metadata(simulation_type: str, user_id: str, age_verified: bool) -> dict:
+    """Metadata the voice agent reads from the room when it joins"""
+    return {
+        "simulation_type": simulation_type,
+        "user_id": user_id,
+        "age_verified": age_verified,
+        "created_at": datetime.now().isoformat()
+    }
+
+
+def create_room_request(room_name: str, metadata: dict) -> CreateRoomRequest:
+    return CreateRoomRequest(
+        name=room_name,
+        metadata=json.dumps(metadata),
+        max_participants=2,
+        empty_timeout=300,
+    )
+
+
+class LiveKitClient:
+    """
+    Process-wide LiveKitAPI client.
+
+    Flask runs every async view in its own short-lived event loop, so an
+    aiohttp session can't outlive a request there. The client instead owns
+    a background event loop thread; one LiveKitAPI (and its connection pool)
+    lives on that loop and request handlers hand coroutines to it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._api = None
+        self._pid = None
+
+    def _ensure_loop(self):
+        # Threads don't survive fork, so restart the loop in a new worker process
+        if self._loop is not None and self._pid == os.getpid():
+            return self._loop
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._api = None
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="livekit-api-loop", daemon=True
+                )
+                self._thread.start()
+        return self._loop
+
+    async def _get_api(self) -> LiveKitAPI:
+        # Only ever called on the client's own loop, so no locking is needed
+        if self._api is None:
+            self._api = LiveKitAPI(LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
+        return self._api
+
+    def submit(self, fn):
+        """
+        Schedule `fn(api)` on the client loop.
+        Returns a concurrent.futures.Future, so callers can do other work
+        before waiting on it.
+        """
+        async def runner():
+            return await fn(await self._get_api())
+
+        return asyncio.run_coroutine_threadsafe(runner(), self._ensure_loop())
+
+    async def run(self, fn):
+        """Run `fn(api)` on the client loop and await it from any other loop"""
+        return await asyncio.wrap_future(self.submit(fn))
+
+    def close(self, timeout: float = 5.0):
+        """Close the shared HTTP session and stop the loop thread"""
+        with self._lock:
+            loop, api, thread = self._loop, self._api, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._api = self._thread = None
+
+        if api is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(api.aclose(), loop).result(timeout)
+            except Exception as e:
+                logger.warning(f"Failed to close LiveKit API client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+
+
+class RoomPool:
+    """
+    Warm pool of pre-created rooms, kept per simulation type.
+
+    A pooled room already carries its final metadata (simulation type and
+    participant identity), so handing one out only costs token signing.
+    Note that agents are dispatched to rooms on creation, so each pooled
+    room keeps an agent worker busy; size the pool accordingly. For the
+    same reason a pooled room never empties out: rooms past max_age are
+    deleted explicitly, and start() replaces them before they get there.
+    """
+
+    def __init__(self, client: LiveKitClient, size: int, max_age: float):
+        self.client = client
+        self.size = size
+        self.max_age = max_age
+        self._rooms = {sim: deque() for sim in SIMULATION_TYPES}
+        self._pending = {sim: 0 for sim in SIMULATION_TYPES}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def acquire(self, simulation_type: str, age_verified: bool):
+        """Pop a fresh pooled room, or return None if none is available"""
+        if not self.enabled or simulation_type not in self._rooms:
+            return None
+
+        room = None
+        with self._lock:
+            stale = self._take_stale(simulation_type)
+            rooms = self._rooms[simulation_type]
+            while rooms:
+                candidate = rooms.popleft()
+                if candidate["metadata"]["age_verified"] != age_verified:
+                    rooms.append(candidate)
+                    break
+                room = candidate
+                break
+
+        self._delete(stale)
+        self.refill(simulation_type)
+        return room
+
+    def start(self):
+        """
+        Fill the pool now and keep replacing rooms before they go stale.
+        Call once per process after forking, since pools aren't shared.
+        """
+        if not self.enabled:
+            return
+        self.refill()
+        timer = threading.Timer(self.max_age / 2, self.start)
+        timer.daemon = True
+        timer.start()
+
+    def refill(self, simulation_type: str = None):
+        """Drop stale rooms and top up the pool in the background; never blocks the caller"""
+        if not self.enabled:
+            return
+        for sim in [simulation_type] if simulation_type else SIMULATION_TYPES:
+            with self._lock:
+                stale = self._take_stale(sim)
+                missing = self.size - len(self._rooms[sim]) - self._pending[sim]
+                self._pending[sim] += max(missing, 0)
+            self._delete(stale)
+            for _ in range(missing):
+                self.client.submit(lambda api, sim=sim: self._create_pooled_room(api, sim))
+
+    def _take_stale(self, simulation_type: str) -> list:
+        """Remove rooms older than max_age from the pool; call with the lock held"""
+        rooms = self._rooms[simulation_type]
+        cutoff = time.monotonic() - self.max_age
+        stale = [room for room in rooms if room["pooled_at"] < cutoff]
+        if stale:
+            self._rooms[simulation_type] = deque(room for room in rooms if room["pooled_at"] >= cutoff)
+        return stale
+
+    def _delete(self, rooms: list):
+        # Their agents would otherwise run until SESSION_MAX_DURATION
+        for room in rooms:
+            self.client.submit(lambda api, name=room["room_name"]: self._delete_room(api, name))
+
+    async def _delete_room(self, api: LiveKitAPI, room_name: str):
+        try:
+            await api.room.delete_room(DeleteRoomRequest(room=room_name))
+        except Exception as e:
+            logger.warning(f"Failed to delete stale pooled room {room_name}: {e}")
+
+    async def _create_pooled_room(self, api: LiveKitAPI, simulation_type: str):
+        room_name = f"sim_{simulation_type}_{uuid.uuid4().hex[:8]}"
+        user_id = f"user_{uuid.uuid4().hex[:8]}"
+        metadata = build_room_metadata(simulation_type, user_id, True)
+        try:
+            await api.room.create_room(create_room_request(room_name, metadata))
+            with self._lock:
+                self._rooms[simulation_type].append({
+                    "room_name": room_name,
+                    "user_id": user_id,
+                    "metadata": metadata,
+                    "pooled_at": time.monotonic(),
+                })
+        except Exception as e:
+            logger.warning(f"Failed to pre-create room for {simulation_type}: {e}")
+        finally:
+            with self._lock:
+                self._pending[simulation_type] -= 1
+
+
+# Global instances
+livekit_client = LiveKitClient()
+room_pool = RoomPool(livekit_client, LIVEKIT_ROOM_POOL_SIZE, LIVEKIT_ROOM_POOL_MAX_AGE)
+atexit.register(livekit_client.close)
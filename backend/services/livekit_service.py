@@ -7,6 +7,8 @@ import jwt
 import time
 import json
 
+from services.lazy import Lazy
+
 logger = logging.getLogger(__name__)
 
 class LiveKitService:
@@ -139,5 +141,9 @@ class LiveKitService:
             logger.error(f"Failed to create JWT token: {e}")
             raise e
 
-# Create a global instance
-livekit_service = LiveKitService()
+# Created on first use: the constructor raises without LiveKit credentials
+_livekit_service = Lazy(LiveKitService, name="livekit_service")
+
+def get_livekit_service() -> LiveKitService:
+    return _livekit_service.get()
+
@@ -0,0 +1,217 @@
+# backend/services/llm_router.py
+"""
+Latency-aware router over interchangeable chat backends.
+
+All backends take OpenAI-style messages ({"role", "content"}) and return
+the reply text. The router tracks rolling p50/p95 latency and error rate
+per backend and sends each call to the fastest backend whose circuit is
+not open. If that backend fails, the call fails over to the next one.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from services import ai_gateway, gemini_client, metrics, openai_client, tracing
+from services.ai_gateway import UpstreamOverloaded
+from config import (
+    LLM_ROUTER_BACKENDS, LLM_ROUTER_WINDOW, LLM_ROUTER_EXPLORE_RATE,
+    LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_ERROR_RATE, LLM_CIRCUIT_COOLDOWN,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ChatBackend:
+    name = None
+    provider = None
+    model = None
+
+    def is_available(self) -> bool:
+        return True
+
+    def complete(self, messages: list, temperature: float, max_tokens: int, timeout: float) -> str:
+        raise NotImplementedError
+
+
+class OpenAIChatBackend(ChatBackend):
+    name = "openai"
+    provider = "openai"
+    model = "gpt-4-turbo-preview"
+
+    def complete(self, messages, temperature, max_tokens, timeout):
+        response = openai_client.get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
+        )
+        return response.choices[0].message.content
+
+
+class GeminiChatBackend(ChatBackend):
+    name = "gemini"
+    provider = "gemini"
+    model = gemini_client.GEMINI_MODEL
+
+    def is_available(self):
+        return gemini_client.is_available()
+
+    def complete(self, messages, temperature, max_tokens, timeout):
+        return gemini_client.generate_chat_response(messages, temperature, max_tokens, timeout)
+
+
+class BackendHealth:
+    """Rolling latency/error stats and a circuit breaker for one backend"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, window: int = LLM_ROUTER_WINDOW):
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=20)
+        self._consecutive_failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _percentile(self, p: float):
+        samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    @property
+    def p50(self):
+        with self._lock:
+            return self._percentile(50)
+
+    def allow(self) -> bool:
+        """Whether a call may be sent; moves an expired open circuit to half-open"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= LLM_CIRCUIT_COOLDOWN:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+            self._outcomes.append(True)
+            self._consecutive_failures = 0
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            error_rate = self._outcomes.count(False) / len(self._outcomes)
+            if (self._state == self.HALF_OPEN
+                    or self._consecutive_failures >= LLM_CIRCUIT_FAILURE_THRESHOLD
+                    or (len(self._outcomes) >= 10 and error_rate >= LLM_CIRCUIT_ERROR_RATE)):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_probe(self):
+        """A half-open probe that was never sent (e.g. shed) frees the probe slot"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "p50": self._percentile(50),
+                "p95": self._percentile(95),
+                "error_rate": self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0,
+                "samples": len(self._latencies),
+            }
+
+
+class LLMRouter:
+    def __init__(self, backends: list):
+        self.backends = backends
+        self.health = {backend.name: BackendHealth() for backend in backends}
+
+    def _ranked(self) -> list:
+        """Available backends, fastest first; untried ones go first so they get measured"""
+        available = [b for b in self.backends if b.is_available()]
+        order = {b.name: i for i, b in enumerate(available)}
+
+        def key(backend):
+            p50 = self.health[backend.name].p50
+            return (p50 is not None, p50 or 0.0, order[backend.name])
+
+        ranked = sorted(available, key=key)
+        if len(ranked) > 1 and random.random() < LLM_ROUTER_EXPLORE_RATE:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked
+
+    @tracing.traced("llm.complete")
+    def complete(self, messages: list, temperature: float = 0.7, max_tokens: int = 150) -> str:
+        """Get a reply from the fastest healthy backend, failing over on errors"""
+        last_error = None
+        for backend in self._ranked():
+            health = self.health[backend.name]
+            if not health.allow():
+                continue
+
+            start = time.monotonic()
+            try:
+                with ai_gateway.slot(backend.provider, backend.model, "chat") as timeout:
+                    reply = backend.complete(messages, temperature, max_tokens, timeout)
+            except UpstreamOverloaded as e:
+                # Shed locally, the backend itself is fine
+                health.release_probe()
+                metrics.LLM_LATENCY.observe(time.monotonic() - start, backend.name, "shed")
+                last_error = e
+                continue
+            except Exception as e:
+                health.record_failure()
+                metrics.LLM_LATENCY.observe(time.monotonic() - start, backend.name, "error")
+                logger.error("LLM backend %s failed: %s", backend.name, e)
+                last_error = e
+                continue
+
+            latency = time.monotonic() - start
+            span = tracing.current_span()
+            if span is not None:
+                span.set("llm.backend", backend.name)
+            health.record_success(latency)
+            metrics.LLM_LATENCY.observe(latency, backend.name, "ok")
+            return reply
+
+        if last_error is None:
+            raise RuntimeError("No LLM backend available")
+        raise last_error
+
+    def stats(self) -> dict:
+        return {name: health.stats() for name, health in self.health.items()}
+
+    def _quantiles(self) -> dict:
+        """Rolling p50/p95 per backend, as the router ranks them, for /metrics"""
+        return {
+            (name, quantile): stats[key]
+            for name, stats in self.stats().items()
+            for key, quantile in (("p50", "0.5"), ("p95", "0.95"))
+        }
+
+
+_BACKENDS = {
+    "openai": OpenAIChatBackend,
+    "gemini": GeminiChatBackend,
+}
+
+router = LLMRouter([_BACKENDS[name]() for name in LLM_ROUTER_BACKENDS])
+metrics.gauge(
+    "llm_backend_latency_seconds", "Rolling LLM backend latency quantiles the router ranks by",
+    ("backend", "quantile"), router._quantiles,
+)
@@ -0,0 +1,442 @@
+# backend/services/metrics.py
+"""
+Counters and histograms in the Prometheus text format, served at /metrics.
+
+Recording is lock-free: every thread writes to its own shard of each
+metric (a plain dict reached through a threading.local), and a scrape sums
+the shards. A request thread pays a couple of dict operations per sample.
+
+Under gunicorn every worker has its own registry. With METRICS_DIR set,
+workers also write JSON snapshots there (every METRICS_FLUSH_INTERVAL
+seconds, on scrape and on exit), and a scrape merges them all so whichever
+worker answers reports the whole server. Snapshots left by workers that
+have exited are folded into one archive file, so counters keep increasing
+across worker restarts.
+
+Usage:
+    REQUESTS = metrics.counter("things_total", "Things done", ("kind",))
+    REQUESTS.inc("big")
+    with LATENCY.time("openai"):
+        ...
+    metrics.gauge("queue_depth", "Items waiting", ("queue",), lambda: {("jobs",): len(jobs)})
+"""
+import bisect
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, g, request
+from pymongo import monitoring
+from config import METRICS_ENABLED, METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast cached routes up to speech calls near AI_REQUEST_BUDGET
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            # Once per thread; every later sample from this thread is lock-free
+            with self._shards_lock:
+                self._shards.append(values)
+            return values
+
+    def _snapshot_shards(self) -> list:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # dict.copy() is atomic under the GIL, so writers never need to stop
+        return [shard.copy() for shard in shards]
+
+    def reset(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self) -> dict:
+        """{labels: value} summed over threads"""
+        totals = {}
+        for shard in self._snapshot_shards():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # Per-bucket (non-cumulative) counts, the +Inf bucket last, then sum
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def collect(self) -> dict:
+        """{labels: [per-bucket counts..., sum]} summed over threads"""
+        totals = {}
+        for shard in self._snapshot_shards():
+            for labels, state in shard.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(state)
+                else:
+                    for i, value in enumerate(state):
+                        total[i] += value
+        return totals
+
+
+class Gauge(_Metric):
+    """
+    A value read at scrape time from `read()` ({labels: value}). Every
+    worker reports its own series under a pid label, and exited workers'
+    gauges are dropped instead of archived.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple, read):
+        super().__init__(name, help, tuple(labelnames) + ("pid",))
+        self._read = read
+
+    def collect(self) -> dict:
+        pid = str(os.getpid())
+        return {(*labels, pid): value for labels, value in self._read().items() if value is not None}
+
+
+def _register(metric):
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, help: str, labelnames: tuple = ()) -> Counter:
+    return _register(Counter(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, labelnames, buckets))
+
+
+def gauge(name: str, help: str, labelnames: tuple, read) -> Gauge:
+    return _register(Gauge(name, help, labelnames, read))
+
+
+def timed(metric: Histogram, *labels):
+    """Decorator recording each call's duration in `metric`"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with metric.time(*labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Shared metrics recorded from several modules
+
+HTTP_REQUESTS = counter("http_requests_total", "HTTP requests by route and status", ("endpoint", "method", "status"))
+HTTP_LATENCY = histogram("http_request_duration_seconds", "HTTP request latency by route", ("endpoint", "method"))
+UPSTREAM_LATENCY = histogram(
+    "upstream_request_duration_seconds", "Upstream AI call latency (after getting a slot)",
+    ("provider", "model", "operation", "outcome"),
+)
+UPSTREAM_QUEUE_WAIT = histogram(
+    "upstream_queue_wait_seconds", "Time spent waiting for an upstream slot", ("provider",),
+    buckets=(0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+)
+UPSTREAM_SHED = counter("upstream_shed_total", "Upstream calls shed instead of queued", ("provider", "reason"))
+SERVICE_LATENCY = histogram(
+    "openai_service_duration_seconds", "OpenAIService method latency, including hedging", ("method",)
+)
+LLM_LATENCY = histogram("llm_completion_duration_seconds", "Routed LLM completions", ("backend", "outcome"))
+HEDGE_REQUESTS = counter(
+    "hedge_requests_total", "Hedged calls by policy, winning path and whether the fallback ran", ("policy", "path", "hedged")
+)
+HEDGE_LATENCY = histogram("hedge_duration_seconds", "Hedged call latency by policy and winning path", ("policy", "path"))
+MONGO_LATENCY = histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection", ("collection", "command", "outcome"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+CACHE_REQUESTS = counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+
+
+def cache_hit(cache: str):
+    CACHE_REQUESTS.inc(cache, "hit")
+
+
+def cache_miss(cache: str):
+    CACHE_REQUESTS.inc(cache, "miss")
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command by collection; pass to MongoClient(event_listeners=[...])"""
+
+    def __init__(self):
+        # (connection, request id) -> (collection, command); started/succeeded run on one thread
+        self._pending = {}
+
+    @staticmethod
+    def _collection(event) -> str:
+        target = event.command.get(event.command_name)
+        if isinstance(target, str):
+            return target
+        # getMore carries the cursor id there and the collection separately
+        return event.command.get("collection", "")
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = (self._collection(event), event.command_name)
+
+    def _finish(self, event, outcome: str):
+        collection, command = self._pending.pop((event.connection_id, event.request_id), ("", event.command_name))
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, collection, command, outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+# --- Exposition ---
+
+def _as_snapshot(merged: dict) -> dict:
+    return {name: {**data, "values": [[list(k), v] for k, v in data["values"].items()]} for name, data in merged.items()}
+
+
+def _merge(into: dict, snapshot: dict):
+    """Add one snapshot ({name: {meta..., "values": [[labels, value]]}}) into `into`"""
+    for name, data in snapshot.items():
+        target = into.setdefault(name, {**data, "values": {}})
+        for labels, value in data["values"]:
+            labels = tuple(labels)
+            current = target["values"].get(labels)
+            if current is None:
+                target["values"][labels] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                for i, v in enumerate(value):
+                    current[i] += v
+            else:
+                target["values"][labels] = current + value
+
+
+def snapshot() -> dict:
+    """This process's metrics in a JSON-friendly form"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    data = {}
+    for metric in metrics:
+        entry = {"type": metric.type, "help": metric.help, "labelnames": list(metric.labelnames)}
+        if metric.type == "histogram":
+            entry["buckets"] = list(metric.buckets)
+        entry["values"] = [[list(labels), value] for labels, value in metric.collect().items()]
+        data[metric.name] = entry
+    return data
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render(merged: dict) -> str:
+    lines = []
+    for name in sorted(merged):
+        data = merged[name]
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        names = data["labelnames"]
+        for labels, value in sorted(data["values"].items()):
+            if data["type"] == "histogram":
+                cumulative = 0
+                for bound, count in zip(list(data["buckets"]) + ["+Inf"], value[:-1]):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(names, labels)} {value[-1]}")
+                lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_labels(names, labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# --- Multi-process (gunicorn) aggregation ---
+
+_ARCHIVE = "archive.json"
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"worker-{pid}.json")
+
+
+def _write_json(path: str, data: dict):
+    # The flusher thread and worker_exit can write the same snapshot at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def flush():
+    """Write this worker's snapshot to METRICS_DIR"""
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write_json(_snapshot_path(os.getpid()), snapshot())
+
+
+def collect_all() -> dict:
+    """Merged metrics for every worker (just this process without METRICS_DIR)"""
+    merged = {}
+    if not METRICS_DIR:
+        _merge(merged, snapshot())
+        return merged
+
+    flush()
+    with open(os.path.join(METRICS_DIR, ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(METRICS_DIR, _ARCHIVE)
+        archive = {}
+        _merge(archive, _read_json(archive_path))
+        archived = False
+        for filename in os.listdir(METRICS_DIR):
+            if not (filename.startswith("worker-") and filename.endswith(".json")):
+                continue
+            path = os.path.join(METRICS_DIR, filename)
+            pid = int(filename[len("worker-"):-len(".json")])
+            if _pid_alive(pid):
+                _merge(merged, _read_json(path))
+            else:
+                # Fold finished workers into the archive so counters stay monotonic;
+                # their gauges describe a process that is gone
+                finished = _read_json(path)
+                _merge(archive, {name: data for name, data in finished.items() if data.get("type") != "gauge"})
+                os.remove(path)
+                archived = True
+        if archived:
+            _write_json(archive_path, _as_snapshot(archive))
+    _merge(merged, _as_snapshot(archive))
+    return merged
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _start_flusher():
+    """Periodic snapshots, one thread per worker process (restarted after fork)"""
+    global _flusher_pid
+    if not METRICS_DIR or _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(METRICS_FLUSH_INTERVAL)
+                try:
+                    flush()
+                except Exception as e:
+                    logger.error("Failed to write metrics snapshot: %s", e)
+
+        threading.Thread(target=run, name="metrics-flush", daemon=True).start()
+
+
+def init_app(app):
+    """Time every request and serve /metrics"""
+    if not METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        _start_flusher()
+
+    @app.after_request
+    def _record(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            # Label by route (endpoint), never the raw path, to keep cardinality fixed
+            endpoint = request.endpoint or "unmatched"
+            HTTP_LATENCY.observe(time.perf_counter() - start, endpoint, request.method)
+            HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(render(collect_all()), mimetype="text/plain; version=0.0.4")
@@ -1,14 +1,41 @@
 # backend/services/openai_client.py
-import openai
-from openai import OpenAI
-import tempfile
+import logging
 import base64
 from config import OPENAI_API_KEY
+from services import ai_gateway, hedging, metrics, pronunciation, tracing
+from services.ai_gateway import UpstreamOverloaded
+from services.lazy import Lazy
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
+
+def _create_client():
+    # The SDK import alone is most of the app's import time; defer it too
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+# Built on first use: a missing key only fails the calls that need OpenAI
+_client = Lazy(_create_client, name="openai")
+
+def get_client():
+    return _client.get()
 
 class OpenAIService:
     @staticmethod
+    def _transcribe(model: str, audio_data: bytes, language: str, cancelled) -> str:
+        if cancelled.is_set():
+            raise RuntimeError("transcription cancelled")
+        with ai_gateway.slot("openai", model, "transcription") as timeout:
+            return get_client().audio.transcriptions.create(
+                model=model,
+                file=("audio.webm", audio_data),
+                language=language,
+                response_format="text",
+                timeout=timeout
+            )
+
+    @staticmethod
+    @metrics.timed(metrics.SERVICE_LATENCY, "transcribe_audio")
+    @tracing.traced("openai.transcribe_audio")
     def transcribe_audio(audio_data: bytes, language: str = "kn") -> str:
         """
         Transcribe audio using OpenAI's latest transcription model
@@ -17,41 +44,53 @@ class OpenAIService:
             language: Language code (default: 'kn' for Kannada)
         Returns:
             Transcribed text
+        Whisper is hedged in if the new model is slower than usual or fails.
         """
         try:
-            # Save audio data to a temporary file
-            with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-                     
-            # Open the file and send to the new transcription model
-            with open(temp_file_path, "rb") as audio_file:
-                transcript = client.audio.transcriptions.create(
-                    model="gpt-4o-mini-transcribe",  # Updated model
-                    file=audio_file,
-                    language=language,
-                    response_format="text"
-                )
-                     
-            return transcript
-                     
+            return hedging.get_policy("transcription").run(
+                lambda cancelled: OpenAIService._transcribe("gpt-4o-mini-transcribe", audio_data, language, cancelled),
+                lambda cancelled: OpenAIService._transcribe("whisper-1", audio_data, language, cancelled),
+            )
+        except UpstreamOverloaded:
+            raise
         except Exception as e:
-            print(f"Error in transcription: {e}")
-            # Fallback to original Whisper if new model fails
-            try:
-                with open(temp_file_path, "rb") as audio_file:
-                    transcript = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        language=language,
-                        response_format="text"
-                    )
-                return transcript
-            except Exception as fallback_e:
-                print(f"Fallback transcription also failed: {fallback_e}")
-                return ""
+            logger.error("Transcription failed on both models: %s", e)
+            return ""
+
+    @staticmethod
+    def _synthesize(model: str, text: str, voice: str, cancelled) -> bytes:
+        with ai_gateway.slot("openai", model, "speech") as timeout:
+            with get_client().audio.speech.with_streaming_response.create(
+                model=model,
+                voice=voice,
+                input=text,
+                response_format="mp3",
+                timeout=timeout
+            ) as response:
+                chunks = []
+                for chunk in response.iter_bytes():
+                    # Stop downloading as soon as the other attempt has won
+                    if cancelled.is_set():
+                        raise RuntimeError("speech synthesis cancelled")
+                    chunks.append(chunk)
+                return b"".join(chunks)
 
     @staticmethod
+    @metrics.timed(metrics.SERVICE_LATENCY, "synthesize_speech")
+    @tracing.traced("openai.synthesize_speech")
+    def synthesize_speech(text: str, voice: str = "alloy") -> bytes:
+        """
+        Synthesize `text` to MP3 bytes. Raises if both models fail.
+        tts-1 is hedged in if the new model is slower than usual or fails.
+        """
+        return hedging.get_policy("tts").run(
+            lambda cancelled: OpenAIService._synthesize("gpt-4o-mini-tts", text, voice, cancelled),
+            lambda cancelled: OpenAIService._synthesize("tts-1", text, voice, cancelled),
+        )
+
+    @staticmethod
+    @metrics.timed(metrics.SERVICE_LATENCY, "text_to_speech")
+    @tracing.traced("openai.text_to_speech")
     def text_to_speech(text: str, voice: str = "alloy") -> str:
         """
         Convert text to speech using OpenAI's latest TTS model
@@ -62,70 +101,69 @@ class OpenAIService:
             Base64 encoded audio data
         """
         try:
-            response = client.audio.speech.create(
-                model="gpt-4o-mini-tts",  # Updated model
-                voice=voice,
-                input=text,
-                response_format="mp3"
-            )
+            audio_content = OpenAIService.synthesize_speech(text, voice)
                      
             # Convert to base64 for easy transmission
-            audio_content = response.content
             audio_base64 = base64.b64encode(audio_content).decode('utf-8')
-                     
             return f"data:audio/mp3;base64,{audio_base64}"
                      
+        except UpstreamOverloaded:
+            raise
         except Exception as e:
-            print(f"Error in TTS with new model: {e}")
-            # Fallback to original TTS model
-            try:
-                response = client.audio.speech.create(
-                    model="tts-1",
-                    voice=voice,
-                    input=text,
-                    response_format="mp3"
-                )
-                audio_content = response.content
-                audio_base64 = base64.b64encode(audio_content).decode('utf-8')
-                return f"data:audio/mp3;base64,{audio_base64}"
-            except Exception as fallback_e:
-                print(f"Fallback TTS also failed: {fallback_e}")
-                return ""
+            logger.error("TTS failed on both models: %s", e)
+            return ""
 
     @staticmethod
-    def evaluate_pronunciation(original_text: str, user_audio: bytes) -> dict:
+    @metrics.timed(metrics.SERVICE_LATENCY, "evaluate_pronunciation")
+    @tracing.traced("openai.evaluate_pronunciation")
+    def evaluate_pronunciation(original_text: str, user_audio: bytes, detailed_feedback: bool = False) -> dict:
         """
-        Evaluate user's pronunciation by comparing with original text
+        Evaluate user's pronunciation by comparing with original text.
+        Scoring is done locally; `detailed_feedback` adds an LLM-written
+        explanation on top of the local result.
         """
         try:
-            # Transcribe user's audio using the new model
             user_text = OpenAIService.transcribe_audio(user_audio, language="kn")
-                     
-            # Use the latest GPT model for evaluation
-            prompt = f"""
-            Compare these two Kannada texts and rate the pronunciation accuracy:
-            Original: {original_text}
-            User said: {user_text}
-                     
-            Provide a JSON response with:
-            1. accuracy_score (0-100)
-            2. feedback (helpful feedback in English)
-            3. correct (boolean - if pronunciation is acceptable)
-            """
-                     
-            response = client.chat.completions.create(
-                model="gpt-4o",  # Updated to current stable model
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-                     
-            import json
-            return json.loads(response.choices[0].message.content)
-                     
+            result = pronunciation.score_pronunciation(original_text, user_text)
+            result["transcription"] = user_text
+        except UpstreamOverloaded:
+            raise
         except Exception as e:
-            print(f"Error in pronunciation evaluation: {e}")
+            logger.error("Error in pronunciation evaluation: %s", e)
             return {
                 "accuracy_score": 0,
                 "feedback": "Could not evaluate pronunciation",
                 "correct": False
-            }
\ No newline at end of file
+            }
+
+        if detailed_feedback and user_text:
+            try:
+                result["detailed_feedback"] = OpenAIService._pronunciation_feedback(original_text, user_text, result)
+            except UpstreamOverloaded:
+                # The local score is still useful; just skip the extra feedback
+                pass
+            except Exception as e:
+                logger.error("Error generating detailed pronunciation feedback: %s", e)
+        return result
+
+    @staticmethod
+    @metrics.timed(metrics.SERVICE_LATENCY, "pronunciation_feedback")
+    @tracing.traced("openai.pronunciation_feedback")
+    def _pronunciation_feedback(original_text: str, user_text: str, result: dict) -> str:
+        mistakes = [s for s in result["syllables"] if s["status"] != "correct"]
+        prompt = f"""
+            A Kannada learner tried to say: {original_text}
+            They said: {user_text}
+            Score: {result['accuracy_score']}/100
+            Syllable mismatches (expected -> heard): {mistakes}
+
+            In two or three sentences of English, explain how to fix the mismatched sounds.
+            """
+        with ai_gateway.slot("openai", "gpt-4o", "chat") as timeout:
+            response = get_client().chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=150,
+                timeout=timeout
+            )
+        return response.choices[0].message.content
@@ -0,0 +1,294 @@
+# backend/services/pronunciation.py
+"""
+Local pronunciation scoring for Kannada.
+
+Both the reference text and the transcription are split into aksharas
+(written syllables): a consonant followed by a virama is its own
+akshara, except for the ligatures ಕ್ಷ and ಜ್ಞ. This mostly agrees with
+the `letters` tiles in duel_words.json, which sometimes group
+differently for the game (ಫ್ಯಾ is one tile there, ಫ್ + ಯಾ here). The
+two sequences are then aligned with a
+weighted edit distance. Substitution costs come from phonetic features,
+so near misses (ತ/ಥ, ಲ/ಳ, ಇ/ಈ) cost much less than unrelated letters.
+"""
+import unicodedata
+
+from config import PRONUNCIATION_PASS_SCORE
+
+VIRAMA = "್"
+NUKTA = "಼"
+MODIFIERS = {"ಁ", "ಂ", "ಃ"}  # candrabindu, anusvara, visarga
+ZERO_WIDTH = {"‌", "‍"}
+LIGATURES = {"ಕ್ಷ", "ಜ್ಞ"}
+
+# Independent vowels and vowel signs mapped to a common vowel id
+VOWELS = {
+    "ಅ": "a", "ಆ": "aa", "ಇ": "i", "ಈ": "ii", "ಉ": "u", "ಊ": "uu", "ಋ": "r", "ೠ": "rr",
+    "ಎ": "e", "ಏ": "ee", "ಐ": "ai", "ಒ": "o", "ಓ": "oo", "ಔ": "au",
+}
+VOWEL_SIGNS = {
+    "ಾ": "aa", "ಿ": "i", "ೀ": "ii", "ು": "u", "ೂ": "uu", "ೃ": "r", "ೄ": "rr",
+    "ೆ": "e", "ೇ": "ee", "ೈ": "ai", "ೊ": "o", "ೋ": "oo", "ೌ": "au",
+}
+SHORT_LONG = {frozenset(pair) for pair in [("a", "aa"), ("i", "ii"), ("u", "uu"), ("e", "ee"), ("o", "oo"), ("r", "rr")]}
+
+# Consonant -> (place, manner, voiced, aspirated)
+CONSONANTS = {}
+for place, row in [
+    ("velar", "ಕಖಗಘಙ"), ("palatal", "ಚಛಜಝಞ"), ("retroflex", "ಟಠಡಢಣ"),
+    ("dental", "ತಥದಧನ"), ("labial", "ಪಫಬಭಮ"),
+]:
+    for letter, (manner, voiced, aspirated) in zip(row, [
+        ("stop", False, False), ("stop", False, True), ("stop", True, False),
+        ("stop", True, True), ("nasal", True, False),
+    ]):
+        CONSONANTS[letter] = (place, manner, voiced, aspirated)
+CONSONANTS.update({
+    "ಯ": ("palatal", "approximant", True, False),
+    "ರ": ("alveolar", "rhotic", True, False),
+    "ಱ": ("alveolar", "rhotic", True, False),
+    "ಲ": ("dental", "lateral", True, False),
+    "ಳ": ("retroflex", "lateral", True, False),
+    "ೞ": ("retroflex", "lateral", True, False),
+    "ವ": ("labial", "approximant", True, False),
+    "ಶ": ("palatal", "sibilant", False, False),
+    "ಷ": ("retroflex", "sibilant", False, False),
+    "ಸ": ("dental", "sibilant", False, False),
+    "ಹ": ("glottal", "fricative", True, False),
+    "ಫ಼": ("labial", "fricative", False, False),
+    "ಜ಼": ("alveolar", "sibilant", True, False),
+})
+CLOSE_PLACES = {frozenset(p) for p in [("dental", "retroflex"), ("dental", "alveolar"), ("palatal", "retroflex")]}
+
+
+def _consonant_cost(a: str, b: str) -> float:
+    if a == b:
+        return 0.0
+    fa, fb = CONSONANTS.get(a), CONSONANTS.get(b)
+    if not fa or not fb:
+        return 1.0
+    place_a, manner_a, voiced_a, asp_a = fa
+    place_b, manner_b, voiced_b, asp_b = fb
+    if manner_a != manner_b:
+        # ವ/ಬ and ಫ/ಫ಼ style confusions
+        return 0.6 if place_a == place_b else 1.0
+
+    cost = 0.0
+    if place_a != place_b:
+        if frozenset((place_a, place_b)) not in CLOSE_PLACES:
+            return 1.0
+        cost += 0.35
+    if voiced_a != voiced_b:
+        cost += 0.3
+    if asp_a != asp_b:
+        cost += 0.2
+    return min(cost, 1.0)
+
+
+# Precomputed once: consonant pair -> substitution cost
+_CONSONANT_COSTS = {(a, b): _consonant_cost(a, b) for a in CONSONANTS for b in CONSONANTS}
+
+
+def _vowel_cost(a, b) -> float:
+    if a == b:
+        return 0.0
+    if a is None or b is None:
+        # Dead consonant (virama) against a voiced one: ಪೆನ್ vs ಪೆನ
+        return 0.3
+    if frozenset((a, b)) in SHORT_LONG:
+        return 0.2
+    return 0.5
+
+
+class Akshara:
+    __slots__ = ("text", "consonants", "vowel", "modifier")
+
+    def __init__(self, text, consonants, vowel, modifier):
+        self.text = text
+        self.consonants = consonants
+        self.vowel = vowel
+        self.modifier = modifier
+
+    def __repr__(self):
+        return f"Akshara({self.text!r})"
+
+
+def _is_consonant(ch: str) -> bool:
+    return "ಕ" <= ch <= "ಹ" or ch in ("ೞ", "ಱ")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFC", text or "")
+    return "".join(ch for ch in text if ch not in ZERO_WIDTH)
+
+
+def segment(text: str) -> list:
+    """Split text into aksharas; spaces and punctuation are dropped, Latin letters kept one each"""
+    text = normalize(text)
+    result = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        start = i
+
+        if _is_consonant(ch):
+            consonants = [ch]
+            i += 1
+            if i < n and text[i] == NUKTA:
+                consonants[-1] += NUKTA
+                i += 1
+            vowel = "a"
+            if i < n and text[i] == VIRAMA:
+                # Join a following consonant only for the ligatures ಕ್ಷ / ಜ್ಞ
+                if i + 1 < n and text[start:i + 2] in LIGATURES:
+                    consonants.append(text[i + 1])
+                    i += 2
+                else:
+                    vowel = None
+                    i += 1
+            if vowel and i < n and text[i] in VOWEL_SIGNS:
+                vowel = VOWEL_SIGNS[text[i]]
+                i += 1
+        elif ch in VOWELS:
+            consonants = []
+            vowel = VOWELS[ch]
+            i += 1
+        elif ch == VIRAMA:
+            # Stray virama (e.g. "್ರ" in duel_words.json); attach to nothing
+            i += 1
+            continue
+        elif ch.isalpha() and not ("ಀ" <= ch <= "೿"):
+            result.append(Akshara(ch.lower(), (ch.lower(),), "", None))
+            i += 1
+            continue
+        else:
+            i += 1
+            continue
+
+        modifier = None
+        if i < n and text[i] in MODIFIERS:
+            modifier = text[i]
+            i += 1
+        # Length marks and other combining signs ride along with the akshara
+        while i < n and unicodedata.category(text[i]) == "Mn" and text[i] != VIRAMA:
+            i += 1
+
+        result.append(Akshara(text[start:i], tuple(consonants), vowel, modifier))
+    return result
+
+
+def substitution_cost(a: Akshara, b: Akshara) -> float:
+    if a.text == b.text:
+        return 0.0
+    if len(a.consonants) != len(b.consonants):
+        consonant_cost = 0.5 if set(a.consonants) & set(b.consonants) else 1.0
+    else:
+        consonant_cost = 0.0
+        for x, y in zip(a.consonants, b.consonants):
+            consonant_cost += _CONSONANT_COSTS.get((x, y), 0.0 if x == y else 1.0)
+    cost = consonant_cost + _vowel_cost(a.vowel, b.vowel) + (0.2 if a.modifier != b.modifier else 0.0)
+    return min(cost, 1.0)
+
+
+def _indel_cost(a: Akshara) -> float:
+    # Dropping or adding a dead consonant is a smaller slip than a full syllable
+    return 0.6 if a.vowel is None else 1.0
+
+
+def align(reference: list, heard: list):
+    """Weighted edit distance between two akshara lists; returns (distance, operations)"""
+    n, m = len(reference), len(heard)
+    dist = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        dist[i][0] = dist[i - 1][0] + _indel_cost(reference[i - 1])
+    for j in range(1, m + 1):
+        dist[0][j] = dist[0][j - 1] + _indel_cost(heard[j - 1])
+
+    for i in range(1, n + 1):
+        ref = reference[i - 1]
+        row, prev = dist[i], dist[i - 1]
+        for j in range(1, m + 1):
+            hyp = heard[j - 1]
+            row[j] = min(
+                prev[j - 1] + substitution_cost(ref, hyp),
+                prev[j] + _indel_cost(ref),
+                row[j - 1] + _indel_cost(hyp),
+            )
+
+    # Backtrace into per-syllable operations
+    ops = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0:
+            cost = substitution_cost(reference[i - 1], heard[j - 1])
+            if abs(dist[i][j] - (dist[i - 1][j - 1] + cost)) < 1e-9:
+                ops.append((reference[i - 1], heard[j - 1], cost))
+                i, j = i - 1, j - 1
+                continue
+        if i > 0 and abs(dist[i][j] - (dist[i - 1][j] + _indel_cost(reference[i - 1]))) < 1e-9:
+            ops.append((reference[i - 1], None, _indel_cost(reference[i - 1])))
+            i -= 1
+        else:
+            ops.append((None, heard[j - 1], _indel_cost(heard[j - 1])))
+            j -= 1
+    ops.reverse()
+    return dist[n][m], ops
+
+
+def _status(expected, heard, cost) -> str:
+    if expected is None:
+        return "extra"
+    if heard is None:
+        return "missing"
+    if cost == 0:
+        return "correct"
+    return "close" if cost < 0.5 else "wrong"
+
+
+def _summary(score: int, syllables: list) -> str:
+    if score >= 95:
+        return "Excellent pronunciation!"
+    issues = [s for s in syllables if s["status"] in ("wrong", "missing", "close")][:3]
+    if not issues:
+        return "Good job! Just a few extra sounds."
+    parts = []
+    for s in issues:
+        if s["status"] == "missing":
+            parts.append(f"'{s['expected']}' was missing")
+        else:
+            parts.append(f"'{s['expected']}' sounded like '{s['heard']}'")
+    prefix = "Almost there" if score >= PRONUNCIATION_PASS_SCORE else "Keep practicing"
+    return f"{prefix}: " + "; ".join(parts) + "."
+
+
+def score_pronunciation(original_text: str, heard_text: str) -> dict:
+    """Compare what the learner said against the reference; pure CPU, no network"""
+    reference = segment(original_text)
+    heard = segment(heard_text)
+    if not reference:
+        return {"accuracy_score": 0, "feedback": "Nothing to compare against", "correct": False, "syllables": []}
+    if not heard:
+        # Otherwise dead consonants, which are cheap to drop, would leave a partial score
+        return {
+            "accuracy_score": 0,
+            "feedback": "We couldn't hear anything. Please try again.",
+            "correct": False,
+            "syllables": [{"expected": a.text, "heard": None, "status": "missing"} for a in reference],
+        }
+
+    distance, ops = align(reference, heard)
+    score = max(0, round(100 * (1 - distance / max(len(reference), len(heard)))))
+    syllables = [
+        {
+            "expected": expected.text if expected else None,
+            "heard": got.text if got else None,
+            "status": _status(expected, got, cost),
+        }
+        for expected, got, cost in ops
+    ]
+    return {
+        "accuracy_score": score,
+        "feedback": _summary(score, syllables),
+        "correct": score >= PRONUNCIATION_PASS_SCORE,
+        "syllables": syllables,
+    }
@@ -0,0 +1,218 @@
+# backend/services/structured_logging.py
+"""
+Structured, non-blocking logging for the web app.
+
+Request threads only put records on a bounded in-memory queue
+(NonBlockingQueueHandler); a background QueueListener formats them as JSON
+lines and writes them to stdout. A slow stdout, such as a Docker log
+driver under pressure, therefore never stalls a request. If the queue
+fills up, records are dropped and counted instead.
+
+Every record carries the request id (X-Request-Id, generated when the
+client doesn't send one) and the trace id. Repeats of the same warning or
+error (same logger, message template and level) are rate-limited to
+LOG_RATE_LIMIT_BURST per LOG_RATE_LIMIT_WINDOW seconds. The next one let
+through reports how many were suppressed.
+
+Modules log as usual, with %-style arguments so repeats share a template:
+    logger = logging.getLogger(__name__)
+    logger.error("TTS failed for lesson %s: %s", lesson_id, e)
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, request
+from services import tracing
+from config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_RATE_LIMIT_WINDOW, LOG_RATE_LIMIT_BURST
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request and trace ids; runs on the thread that logs"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        record.trace_id = tracing.current_trace_id()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most `burst` records per (logger, template, level) through per
+    `window` seconds, for WARNING and above. Lock-free: counts may be off by
+    one under contention, which is fine for this purpose.
+    """
+
+    def __init__(self, window: float = LOG_RATE_LIMIT_WINDOW, burst: int = LOG_RATE_LIMIT_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        # key -> [window start, emitted in window, suppressed in window]
+        self._state = {}
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or self.burst <= 0:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else repr(record.msg), record.levelno)
+        now = time.monotonic()
+        state = self._state.get(key)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            self._state[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._reported = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self._reported += getattr(record, "dropped", 0)
+
+    def prepare(self, record):
+        # Only resolve what can't cross threads (args, tracebacks); formatting
+        # to JSON happens on the listener thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        # Drops since the last record that made it onto the queue
+        unreported = self.dropped - self._reported
+        if unreported:
+            record.dropped = unreported
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable single-line format for local development"""
+
+    def format(self, record):
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        if getattr(record, "request_id", None):
+            line += f" [req {record.request_id}]"
+        if getattr(record, "suppressed", None):
+            line += f" (+{record.suppressed} similar suppressed)"
+        if getattr(record, "dropped", None):
+            line += f" ({record.dropped} log records dropped)"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+_handler = None
+_listener = None
+
+
+def _output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    return handler
+
+
+def _start_listener():
+    global _listener
+    _handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(_handler.queue, _output_handler(), respect_handler_level=False)
+    _listener.start()
+
+
+def _after_fork():
+    # The listener thread doesn't survive fork (gunicorn preload); give each worker its own
+    if _handler is not None:
+        _start_listener()
+
+
+def configure():
+    """Route all logging through the non-blocking queue; safe to call more than once"""
+    global _handler
+    if _handler is not None:
+        return
+
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    _handler.addFilter(RequestContextFilter())
+    _handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [_handler]
+    root.setLevel(LOG_LEVEL)
+    _start_listener()
+    os.register_at_fork(after_in_child=_after_fork)
+    atexit.register(lambda: _listener and _listener.stop())
+
+
+def init_app(app):
+    """Configure logging and give every request an id"""
+    configure()
+
+    @app.before_request
+    def _assign_request_id():
+        request_id = request.headers.get("X-Request-Id", "")[:128] or uuid.uuid4().hex
+        g.request_id = request_id
+        g.request_id_token = _request_id.set(request_id)
+
+    @app.after_request
+    def _request_id_header(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers["X-Request-Id"] = request_id
+        return response
+
+    @app.teardown_request
+    def _clear_request_id(exc=None):
+        token = g.pop("request_id_token", None)
+        if token is not None:
+            try:
+                _request_id.reset(token)
+            except ValueError:
+                _request_id.set(None)
@@ -0,0 +1,387 @@
+# backend/services/tracing.py
+"""
+Lightweight span tracing for requests, upstream AI calls and MongoDB.
+
+Every request gets a trace id (taken from an incoming W3C `traceparent`
+header when there is one) and a root span; code underneath opens child
+spans with `tracing.span(...)` or `@tracing.traced(...)`. The current span
+lives in a contextvar, so spans opened in hedged attempts (which copy the
+context into worker threads) nest under the right parent.
+
+Spans are always recorded in memory, which costs a few microseconds each.
+When the request finishes, its trace is exported if it was sampled
+(TRACE_SAMPLE_RATE, or the sampled flag of an incoming traceparent) or if
+it took longer than TRACE_SLOW_THRESHOLD. Slow requests are therefore
+always kept. Export happens on a background thread:
+    - TRACE_FILE: OTLP/JSON lines (one ExportTraceServiceRequest per line),
+      rotated at TRACE_FILE_MAX_BYTES
+    - TRACE_OTLP_ENDPOINT: POSTed as OTLP/HTTP JSON to <endpoint>/v1/traces
+
+The last TRACE_RECENT exported traces are also kept in memory for
+/debug/traces, which shows the slowest of them as a text waterfall.
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, g, jsonify, request
+from pymongo import monitoring
+from config import (
+    TRACING_ENABLED, TRACE_SAMPLE_RATE, TRACE_SLOW_THRESHOLD, TRACE_FILE, TRACE_FILE_MAX_BYTES,
+    TRACE_OTLP_ENDPOINT, TRACE_RECENT, TRACE_DEBUG_ENDPOINT,
+)
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "ctrl-vibe-backend"
+
+_current = contextvars.ContextVar("trace_span", default=None)
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans", "sampled")
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: str = None, attributes: dict = None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        # list.append is atomic, so hedged attempts can add spans concurrently
+        trace.spans.append(self)
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self, error: BaseException = None, end_ns: int = None):
+        self.end_ns = end_ns or time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+
+def current_span():
+    return _current.get()
+
+
+def current_trace_id():
+    span = _current.get()
+    return span.trace.trace_id if span else None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Child span of the current one. Outside a trace (e.g. CLI jobs) this is
+    a no-op that yields None.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.finish(e)
+        raise
+    else:
+        child.finish()
+    finally:
+        _current.reset(token)
+
+
+def traced(name: str):
+    """Decorator wrapping each call in a span"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class MongoSpanListener(monitoring.CommandListener):
+    """One span per MongoDB command; pass to MongoClient(event_listeners=[...])"""
+
+    def __init__(self):
+        # pymongo calls started/succeeded on the calling thread, so the current span is the parent
+        self._pending = {}
+
+    def started(self, event):
+        parent = _current.get()
+        if parent is None:
+            return
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        self._pending[(event.connection_id, event.request_id)] = Span(
+            parent.trace, f"mongo {event.command_name} {collection}", parent.span_id,
+            {"db.system": "mongodb", "db.operation": event.command_name, "db.collection": collection},
+        )
+
+    def _finish(self, event, error: str = None):
+        child = self._pending.pop((event.connection_id, event.request_id), None)
+        if child is not None:
+            child.finish(end_ns=child.start_ns + event.duration_micros * 1000)
+            child.error = error
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, str(event.failure))
+
+
+# --- Export ---
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> dict:
+    """An OTLP/JSON ExportTraceServiceRequest for one trace"""
+    spans = []
+    for s in trace.spans:
+        otlp = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 2 if s.parent_id is None else 1,  # SERVER for the root, INTERNAL below it
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            otlp["parentSpanId"] = s.parent_id
+        spans.append(otlp)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "services.tracing"}, "spans": spans}],
+    }]}
+
+
+class Exporter:
+    """Writes finished traces from a queue on a daemon thread; never blocks request threads"""
+
+    def __init__(self, max_queue: int = 1000):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, trace: Trace):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self):
+        # Also restarts the writer in each gunicorn worker after fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                payload = to_otlp(trace)
+                if TRACE_FILE:
+                    self._write_file(payload)
+                if TRACE_OTLP_ENDPOINT:
+                    self._post(payload)
+            except Exception as e:
+                logger.error("Failed to export trace %s: %s", trace.trace_id, e)
+
+    @staticmethod
+    def _write_file(payload: dict):
+        os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+        try:
+            if os.path.getsize(TRACE_FILE) >= TRACE_FILE_MAX_BYTES:
+                os.replace(TRACE_FILE, f"{TRACE_FILE}.1")
+        except OSError:
+            pass
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    @staticmethod
+    def _post(payload: dict):
+        req = urllib.request.Request(
+            TRACE_OTLP_ENDPOINT.rstrip("/") + "/v1/traces",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(req, timeout=5).close()
+
+
+exporter = Exporter()
+_recent = deque(maxlen=TRACE_RECENT)
+
+
+def _parse_traceparent(header: str):
+    """W3C traceparent -> (trace_id, parent_span_id, sampled), or None"""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def start_trace(name: str, traceparent: str = None, **attributes):
+    """Open a root span (remote parent from `traceparent`, if valid); returns (span, context token)"""
+    incoming = _parse_traceparent(traceparent)
+    if incoming:
+        trace_id, parent_id, sampled = incoming
+    else:
+        trace_id, parent_id, sampled = os.urandom(16).hex(), None, random.random() < TRACE_SAMPLE_RATE
+    root = Span(Trace(trace_id, sampled), name, parent_id, attributes)
+    return root, _current.set(root)
+
+
+def end_trace(root: Span, token, error: BaseException = None):
+    root.finish(error)
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Opened in a different context (e.g. async views); just clear it
+        _current.set(None)
+    if root.trace.sampled or root.duration >= TRACE_SLOW_THRESHOLD:
+        _recent.append(root)
+        exporter.submit(root.trace)
+
+
+# --- Debug view ---
+
+def slowest(limit: int = 10) -> list:
+    return sorted(list(_recent), key=lambda root: root.duration, reverse=True)[:limit]
+
+
+def waterfall(root: Span, width: int = 60) -> str:
+    """Text waterfall of one trace: each span's offset and length relative to the root"""
+    total = max(root.end_ns - root.start_ns, 1)
+    children = {}
+    for s in root.trace.spans:
+        if s is not root:
+            children.setdefault(s.parent_id, []).append(s)
+
+    lines = [f"trace {root.trace.trace_id}  {root.name}  {root.duration * 1000:.1f} ms"]
+
+    def walk(s, depth):
+        start = (s.start_ns - root.start_ns) / total
+        length = ((s.end_ns or root.end_ns) - s.start_ns) / total
+        offset = min(width - 1, max(0, int(start * width)))
+        bar = " " * offset + "#" * max(1, min(width - offset, round(length * width)))
+        label = ("  " * depth + s.name)[:40]
+        error = "  !" + s.error if s.error else ""
+        lines.append(f"  {label:<40} |{bar:<{width}}| {(s.duration * 1000):8.1f} ms{error}")
+        for child in sorted(children.get(s.span_id, []), key=lambda c: c.start_ns):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return "\n".join(lines)
+
+
+def _summary(root: Span) -> dict:
+    return {
+        "trace_id": root.trace.trace_id,
+        "name": root.name,
+        "duration_ms": round(root.duration * 1000, 1),
+        "spans": [
+            {
+                "name": s.name,
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "offset_ms": round((s.start_ns - root.start_ns) / 1e6, 1),
+                "duration_ms": round(s.duration * 1000, 1),
+                "attributes": s.attributes,
+                "error": s.error,
+            }
+            for s in sorted(root.trace.spans, key=lambda s: s.start_ns)
+        ],
+    }
+
+
+def init_app(app):
+    """Trace every request; serve /debug/traces when TRACE_DEBUG_ENDPOINT is set"""
+    if not TRACING_ENABLED:
+        return
+
+    @app.before_request
+    def _start_request_trace():
+        root, token = start_trace(
+            f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+            request.headers.get("traceparent"),
+            **{"http.method": request.method, "http.target": request.path},
+        )
+        g.trace_root, g.trace_token = root, token
+
+    @app.after_request
+    def _trace_headers(response):
+        root = g.get("trace_root")
+        if root is not None:
+            root.set("http.status_code", response.status_code)
+            response.headers["X-Trace-Id"] = root.trace.trace_id
+        return response
+
+    @app.teardown_request
+    def _end_request_trace(exc=None):
+        root = g.pop("trace_root", None)
+        if root is not None:
+            end_trace(root, g.pop("trace_token"), exc)
+
+    if TRACE_DEBUG_ENDPOINT:
+        @app.route("/debug/traces")
+        def debug_traces():
+            limit = request.args.get("limit", 10, type=int)
+            traces = slowest(limit)
+            if request.args.get("format") == "json":
+                return jsonify({"traces": [_summary(root) for root in traces], "dropped": exporter.dropped})
+            body = "\n\n".join(waterfall(root) for root in traces) or "No traces recorded yet"
+            return Response(body + "\n", mimetype="text/plain")
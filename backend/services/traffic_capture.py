@@ -0,0 +1,266 @@
+# backend/services/traffic_capture.py
+"""
+Opt-in capture of production request metadata, for replay with
+`python -m loadtest.replay`.
+
+With TRAFFIC_CAPTURE_ENABLED, every /api request is recorded as one JSON
+line. A record holds the route template and path parameters, method,
+status, duration, request and response sizes, and a sanitized copy of the
+body. User ids become keyed pseudonyms (HMAC with TRAFFIC_CAPTURE_SALT),
+so a replay can follow one user across requests without knowing who they
+were. Free-text strings become placeholders of the same UTF-8 size and
+uploaded audio is reduced to its size, content type and length in
+seconds. Only the catalog identifiers and enums in _KEEP_KEYS are stored
+verbatim.
+
+A background thread writes the records to gzip segments
+(traffic-<pid>-<start>.jsonl.gz) in TRAFFIC_CAPTURE_DIR. Segments rotate
+at TRAFFIC_CAPTURE_MAX_BYTES and at most TRAFFIC_CAPTURE_MAX_FILES are
+kept. The writer flushes whenever its queue drains, so an open segment
+stays readable. Request threads never block: when the queue is full,
+records are dropped and counted.
+"""
+import atexit
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import wave
+from glob import glob
+
+from flask import g, request
+from config import (
+    TRAFFIC_CAPTURE_ENABLED, TRAFFIC_CAPTURE_DIR, TRAFFIC_CAPTURE_MAX_BYTES, TRAFFIC_CAPTURE_MAX_FILES,
+    TRAFFIC_CAPTURE_SAMPLE_RATE, TRAFFIC_CAPTURE_SALT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Catalog ids, enums and IANA zone names: needed for a faithful replay, not personal
+_KEEP_KEYS = {
+    "track_id", "lesson_id", "simulation_type", "lesson_type", "type", "role",
+    "voice", "language", "detailed_feedback", "round_id", "key", "timezone",
+}
+# Values that identify a user, stored as pseudonyms
+_ID_KEYS = {"user_id"}
+_OBJECT_ID = re.compile(r"^[0-9a-f]{24}$")
+# Browser MediaRecorder Opus runs at roughly 32 kbps; used when the length can't be read
+_OPUS_BYTES_PER_SECOND = 4000
+# Response bodies larger than this aren't parsed for user ids
+_MAX_RESPONSE_PARSE = 16 * 1024
+
+_salt = (TRAFFIC_CAPTURE_SALT or os.urandom(16).hex()).encode()
+
+
+def pseudonym(value: str) -> str:
+    """Stable within one salt, unlinkable to the real id without it"""
+    return "anon-" + hmac.new(_salt, str(value).encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def sanitize(value, key: str = None):
+    """Copy of a JSON value with ids pseudonymized and free text replaced by placeholders"""
+    if isinstance(value, dict):
+        return {k: sanitize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v, key) for v in value]
+    if isinstance(value, str):
+        if key in _ID_KEYS or _OBJECT_ID.match(value):
+            return pseudonym(value)
+        if key in _KEEP_KEYS:
+            return value
+        # Same UTF-8 size (Kannada is 3 bytes a character), so replayed payloads match the captured ones
+        return "x" * len(value.encode("utf-8"))
+    return value
+
+
+def audio_seconds(file_storage) -> tuple:
+    """(seconds, exact) for an uploaded audio file: read from WAV headers, else estimated from size"""
+    stream = file_storage.stream
+    try:
+        stream.seek(0)
+        with wave.open(stream) as w:
+            return w.getnframes() / float(w.getframerate()), True
+    except (wave.Error, EOFError, OSError, ValueError, ZeroDivisionError):
+        pass
+    return _size(file_storage) / _OPUS_BYTES_PER_SECOND, False
+
+
+def _size(file_storage) -> int:
+    stream = file_storage.stream
+    try:
+        stream.seek(0, os.SEEK_END)
+        return stream.tell()
+    except (OSError, ValueError):
+        return file_storage.content_length or 0
+
+
+def _files():
+    files = []
+    for field, storage in request.files.items(multi=True):
+        entry = {"field": field, "content_type": storage.mimetype, "bytes": _size(storage)}
+        if storage.mimetype.startswith("audio/") or field == "audio":
+            seconds, exact = audio_seconds(storage)
+            entry["audio_seconds"] = round(seconds, 2)
+            if not exact:
+                entry["audio_seconds_estimated"] = True
+        files.append(entry)
+    return files
+
+
+def _form():
+    """Form fields; ones holding JSON (e.g. the converse `data` field) are sanitized structurally"""
+    form, json_fields = {}, []
+    for name, value in request.form.items():
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, (dict, list)):
+            form[name] = sanitize(parsed)
+            json_fields.append(name)
+        else:
+            form[name] = sanitize(value, name)
+    return form, json_fields
+
+
+def _response_user(response):
+    """Pseudonym of a user id the response hands out (guest signup), so replays can map it"""
+    if not response.is_json or response.is_streamed or response.status_code >= 400:
+        return None
+    if (response.content_length or 0) > _MAX_RESPONSE_PARSE:
+        return None
+    body = response.get_json(silent=True)
+    if isinstance(body, dict) and isinstance(body.get("user_id"), str):
+        return pseudonym(body["user_id"])
+    return None
+
+
+def build_record(response, duration: float) -> dict:
+    record = {
+        "ts": round(g.capture_start_wall, 3),
+        "method": request.method,
+        "route": request.url_rule.rule,
+        "endpoint": request.endpoint,
+        "view_args": sanitize(request.view_args or {}),
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 1),
+        "request_bytes": request.content_length or 0,
+        "response_bytes": response.content_length,
+    }
+    if request.args:
+        record["query"] = {k: sanitize(v, k) for k, v in request.args.items()}
+    if request.mimetype == "application/json":
+        record["json"] = sanitize(request.get_json(silent=True))
+    elif request.files or request.form:
+        record["form"], json_fields = _form()
+        if json_fields:
+            record["form_json"] = json_fields
+        record["files"] = _files()
+    issued = _response_user(response)
+    if issued:
+        record["issued_user"] = issued
+    return record
+
+
+class CaptureWriter:
+    """Appends records to rotating gzip segments from a daemon thread"""
+
+    def __init__(self, max_queue: int = 10000):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._raw = None
+        self._io_lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, record: dict):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self):
+        # Also restarts the writer in each gunicorn worker after fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._file = self._raw = None
+                self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                with self._io_lock:
+                    self._write(record)
+                    if self._queue.empty():
+                        self._file.flush()
+            except Exception as e:
+                logger.error("Failed to write traffic capture: %s", e)
+
+    def _write(self, record: dict):
+        if self._file is None or self._raw.tell() >= TRAFFIC_CAPTURE_MAX_BYTES:
+            self._rotate()
+        self._file.write((json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+        os.makedirs(TRAFFIC_CAPTURE_DIR, exist_ok=True)
+        path = os.path.join(TRAFFIC_CAPTURE_DIR, f"traffic-{os.getpid()}-{int(time.time() * 1000)}.jsonl.gz")
+        self._raw = open(path, "wb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+        segments = sorted(glob(os.path.join(TRAFFIC_CAPTURE_DIR, "traffic-*.jsonl.gz")), key=os.path.getmtime)
+        for old in segments[:-TRAFFIC_CAPTURE_MAX_FILES]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def close(self):
+        """Finish the open segment so it ends with a proper gzip trailer"""
+        with self._io_lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._file.close()
+                self._raw.close()
+                self._file = None
+
+
+writer = CaptureWriter()
+
+
+def init_app(app):
+    """Record sanitized metadata for each /api request when TRAFFIC_CAPTURE_ENABLED"""
+    if not TRAFFIC_CAPTURE_ENABLED:
+        return
+    atexit.register(writer.close)
+
+    @app.before_request
+    def _start_capture():
+        if request.path.startswith("/api/") and random.random() < TRAFFIC_CAPTURE_SAMPLE_RATE:
+            g.capture_start = time.perf_counter()
+            g.capture_start_wall = time.time()
+
+    @app.after_request
+    def _capture(response):
+        start = g.pop("capture_start", None)
+        if start is not None and request.url_rule is not None:
+            try:
+                writer.submit(build_record(response, time.perf_counter() - start))
+            except Exception as e:
+                logger.warning("Failed to capture request: %s", e)
+        return response
@@ -0,0 +1,307 @@
+# backend/services/transliteration.py
+"""
+Kannada <-> Latin transliteration and answer normalization.
+
+Transliteration is table-driven. Each mapping table is compiled once, at
+import, into a trie and applied with greedy longest match, so a string is
+converted in a single left-to-right pass.
+
+For answer checking, both scripts are reduced to a *match key*. This is a
+lowercase Latin skeleton that drops distinctions learners (and casual
+romanization) routinely blur: aspiration, dental vs retroflex, vowel
+length, and ಶ/ಷ/ಸ. So "neeru", "niru" and "ನೀರು" all share the key
+"niru". The merges already absorb the slips learners make in Kannada
+script, so answers in that script must match the key exactly.
+Romanized answers also get a bounded edit distance for typos. It never swaps one consonant for
+another or adds or drops a doubled consonant, because that gives a
+different word (avalu/avanu, she/he; halu/hallu, milk/tooth).
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from config import ANSWER_TYPO_RATIO, ANSWER_MAX_TYPOS
+
+VIRAMA = "್"
+NUKTA = "಼"
+ANUSVARA = "ಂ"
+VISARGA = "ಃ"
+ZERO_WIDTH = {"‌", "‍", "﻿"}
+
+# Kannada consonant -> (readable romanization, match key)
+CONSONANTS = {
+    "ಕ": ("k", "k"), "ಖ": ("kh", "k"), "ಗ": ("g", "g"), "ಘ": ("gh", "g"), "ಙ": ("ng", "n"),
+    "ಚ": ("ch", "c"), "ಛ": ("chh", "c"), "ಜ": ("j", "j"), "ಝ": ("jh", "j"), "ಞ": ("ny", "n"),
+    "ಟ": ("T", "t"), "ಠ": ("Th", "t"), "ಡ": ("D", "d"), "ಢ": ("Dh", "d"), "ಣ": ("N", "n"),
+    "ತ": ("t", "t"), "ಥ": ("th", "t"), "ದ": ("d", "d"), "ಧ": ("dh", "d"), "ನ": ("n", "n"),
+    "ಪ": ("p", "p"), "ಫ": ("ph", "p"), "ಬ": ("b", "b"), "ಭ": ("bh", "b"), "ಮ": ("m", "m"),
+    "ಯ": ("y", "y"), "ರ": ("r", "r"), "ಱ": ("r", "r"), "ಲ": ("l", "l"), "ಳ": ("L", "l"),
+    "ೞ": ("zh", "l"), "ವ": ("v", "v"), "ಶ": ("sh", "s"), "ಷ": ("Sh", "s"), "ಸ": ("s", "s"),
+    "ಹ": ("h", "h"), "ಫ಼": ("f", "p"), "ಜ಼": ("z", "j"),
+}
+
+# Vowel id -> (independent letter, vowel sign, readable romanization, match key)
+VOWELS = {
+    "a": ("ಅ", "", "a", "a"), "aa": ("ಆ", "ಾ", "aa", "a"),
+    "i": ("ಇ", "ಿ", "i", "i"), "ii": ("ಈ", "ೀ", "ee", "i"),
+    "u": ("ಉ", "ು", "u", "u"), "uu": ("ಊ", "ೂ", "oo", "u"),
+    "r": ("ಋ", "ೃ", "ru", "ru"),
+    "e": ("ಎ", "ೆ", "e", "e"), "ee": ("ಏ", "ೇ", "E", "e"), "ai": ("ಐ", "ೈ", "ai", "ai"),
+    "o": ("ಒ", "ೊ", "o", "o"), "oo": ("ಓ", "ೋ", "O", "o"), "au": ("ಔ", "ೌ", "au", "au"),
+}
+
+# Latin token -> Kannada consonant / vowel id. Lowercase is the casual
+# spelling learners type; capitals pick the retroflex or long variant.
+LATIN_CONSONANTS = {
+    "k": "ಕ", "kh": "ಖ", "g": "ಗ", "gh": "ಘ",
+    "c": "ಚ", "ch": "ಚ", "chh": "ಛ", "j": "ಜ", "jh": "ಝ",
+    "T": "ಟ", "Th": "ಠ", "D": "ಡ", "Dh": "ಢ", "N": "ಣ",
+    "t": "ತ", "th": "ಥ", "d": "ದ", "dh": "ಧ", "n": "ನ",
+    "p": "ಪ", "ph": "ಫ", "b": "ಬ", "bh": "ಭ", "m": "ಮ",
+    "y": "ಯ", "r": "ರ", "l": "ಲ", "L": "ಳ", "zh": "ೞ", "v": "ವ", "w": "ವ",
+    "sh": "ಶ", "Sh": "ಷ", "s": "ಸ", "h": "ಹ", "f": "ಫ಼", "z": "ಜ಼",
+    "q": "ಕ", "x": "ಕ್ಸ",
+}
+LATIN_VOWELS = {
+    "a": "a", "aa": "aa", "A": "aa", "i": "i", "ii": "ii", "ee": "ii", "I": "ii",
+    "u": "u", "uu": "uu", "oo": "uu", "U": "uu", "R": "r",
+    "e": "e", "E": "ee", "ai": "ai", "o": "o", "O": "oo", "au": "au", "ow": "au",
+}
+
+# Latin token -> match key; the same reductions as the Kannada side
+LATIN_KEYS = {
+    "kh": "k", "gh": "g", "ch": "c", "chh": "c", "jh": "j", "th": "t", "dh": "d",
+    "ph": "p", "bh": "b", "sh": "s", "ksh": "ks", "f": "p", "w": "v", "z": "j",
+    "q": "k", "x": "ks", "aa": "a", "ii": "i", "ee": "i", "uu": "u", "oo": "u",
+    "ow": "au", "y": "y",
+}
+
+
+class Trie:
+    """Longest-match lookup over a fixed mapping, compiled once"""
+
+    __slots__ = ("root",)
+    _VALUE = object()
+
+    def __init__(self, mapping: dict):
+        self.root = {}
+        for source, target in mapping.items():
+            node = self.root
+            for ch in source:
+                node = node.setdefault(ch, {})
+            node[self._VALUE] = target
+
+    def match(self, text: str, start: int):
+        """(value, end) of the longest key starting at `start`, or (None, start)"""
+        node, value, end = self.root, None, start
+        i = start
+        while i < len(text):
+            node = node.get(text[i])
+            if node is None:
+                break
+            i += 1
+            if self._VALUE in node:
+                value, end = node[self._VALUE], i
+        return value, end
+
+
+def _kannada_tables():
+    """Consonant(+nukta)(+virama | +vowel sign) and vowel sequences -> (roman, key, ends_dead)"""
+    table = {}
+    for letter, (roman, key) in CONSONANTS.items():
+        table[letter] = (roman + "a", key + "a", False)
+        table[letter + VIRAMA] = (roman, key, True)
+        for vowel_id, (_, sign, vowel_roman, vowel_key) in VOWELS.items():
+            if sign:
+                table[letter + sign] = (roman + vowel_roman, key + vowel_key, False)
+    for vowel_id, (independent, _, vowel_roman, vowel_key) in VOWELS.items():
+        table[independent] = (vowel_roman, vowel_key, False)
+    return table
+
+
+_KANNADA_TRIE = Trie(_kannada_tables())
+_LATIN_TRIE = Trie({**{k: ("c", v) for k, v in LATIN_CONSONANTS.items()},
+                    **{k: ("v", v) for k, v in LATIN_VOWELS.items()}})
+_LATIN_KEY_TRIE = Trie(LATIN_KEYS)
+_LABIALS = set("ಪಫಬಭಮ")
+_NASALS = {"ನ", "ಮ"}
+_STOPS = set("ಕಖಗಘಚಛಜಝಟಠಡಢತಥದಧಪಫಬಭ")
+# Kannada vowel signs are combining marks, not \w; keep the whole block
+_PUNCTUATION = re.compile(r"[^\w\s\u0C80-\u0CFF]|_")
+_SPACES = re.compile(r"\s+")
+_KEY_CONSONANTS = frozenset("bcdfghjklmnpqrstvwxyz")
+_GEMINATE = re.compile(r"([bcdfghjklmnpqrstvwxyz])\1")
+
+
+def normalize(text: str) -> str:
+    """NFC, no zero-width joiners, collapsed whitespace"""
+    text = unicodedata.normalize("NFC", text or "")
+    text = "".join(ch for ch in text if ch not in ZERO_WIDTH)
+    return _SPACES.sub(" ", text).strip()
+
+
+def is_kannada(ch: str) -> bool:
+    return "ಀ" <= ch <= "೿"
+
+
+def _from_kannada(text: str, field: int) -> str:
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch == ANUSVARA:
+            # Assimilates to the following consonant: ಕಂಬ -> kamba, ಸಂತೋಷ -> santosha
+            nxt = text[i + 1] if i + 1 < n else ""
+            out.append("m" if nxt in _LABIALS or not is_kannada(nxt) else "n")
+            i += 1
+            continue
+        if ch == VISARGA:
+            out.append("h")
+            i += 1
+            continue
+        value, end = _KANNADA_TRIE.match(text, i)
+        if value is None:
+            # Unmapped combining marks are dropped, anything else passes through
+            if not (is_kannada(ch) and unicodedata.category(ch) == "Mn"):
+                out.append(ch)
+            i += 1
+            continue
+        out.append(value[field])
+        i = end
+    return "".join(out)
+
+
+def to_latin(text: str) -> str:
+    """Readable romanization, in the casual style of lessons.json (ನೀರು -> neeru)"""
+    return _from_kannada(normalize(text), 0)
+
+
+def to_kannada(text: str) -> str:
+    """
+    Latin -> Kannada. Lowercase gives the common (dental, short) reading;
+    capitals select retroflex consonants and long vowels (T, D, N, L, Sh, E, O).
+    """
+    out = []
+    pending = False  # last output was a consonant still waiting for its vowel
+    text = normalize(text)
+    i, n = 0, len(text)
+    while i < n:
+        value, end = _LATIN_TRIE.match(text, i)
+        if value is None:
+            value, end = _LATIN_TRIE.match(text.lower(), i)
+        if value is None:
+            if pending:
+                out.append(VIRAMA)
+                pending = False
+            out.append(text[i])
+            i += 1
+            continue
+
+        kind, target = value
+        if kind == "c":
+            if pending:
+                # A nasal before a stop is written as the anusvara: kamba -> ಕಂಬ
+                if out[-1] in _NASALS and target in _STOPS:
+                    out[-1] = ANUSVARA
+                else:
+                    out.append(VIRAMA)
+            out.append(target)
+            pending = True
+        else:
+            independent, sign, _, _ = VOWELS[target]
+            out.append(sign if pending else independent)
+            pending = False
+        i = end
+    if pending:
+        out.append(VIRAMA)
+    return "".join(out)
+
+
+@lru_cache(maxsize=8192)
+def match_key(text: str) -> str:
+    """Script-agnostic key used to compare answers"""
+    text = _PUNCTUATION.sub(" ", normalize(text).lower())
+
+    # Reduce Latin spellings first (the trie only has ASCII keys), then
+    # emit keys for any Kannada, so no key is reduced twice
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        value, end = _LATIN_KEY_TRIE.match(text, i)
+        if value is None:
+            out.append(text[i])
+            i += 1
+        else:
+            out.append(value)
+            i = end
+    text = "".join(out)
+    if any(is_kannada(ch) for ch in text):
+        text = _from_kannada(text, 1)
+    return _SPACES.sub(" ", text).strip()
+
+
+def bounded_distance(a: str, b: str, limit: int, fixed: frozenset = frozenset()) -> int:
+    """
+    Levenshtein distance, or limit + 1 as soon as it must exceed `limit`.
+    Characters in `fixed` can be inserted or deleted but not substituted
+    for one another.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        # Only cells within `limit` of the diagonal can stay under the bound
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        current = [limit + 1] * (len(b) + 1)
+        current[0] = i if i <= limit else limit + 1
+        for j in range(lo, hi + 1):
+            cb = b[j - 1]
+            cost = 0 if ca == cb else limit + 1 if ca in fixed and cb in fixed else 1
+            current[j] = min(previous[j - 1] + cost, previous[j] + 1, current[j - 1] + 1)
+        if min(current[lo - 1:hi + 1]) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[len(b)], limit + 1)
+
+
+def allowed_typos(key: str) -> int:
+    return min(ANSWER_MAX_TYPOS, int(len(key.replace(" ", "")) * ANSWER_TYPO_RATIO))
+
+
+def match_answer(user_answer: str, correct_answers) -> dict:
+    """
+    Compare an answer against one or more accepted answers in either script.
+    Returns {"is_correct", "exact", "matched", "distance"}.
+    """
+    if isinstance(correct_answers, str):
+        correct_answers = [correct_answers]
+
+    user_key = match_key(user_answer)
+    # In Kannada script the key has already absorbed every tolerated slip
+    kannada_input = any(is_kannada(ch) for ch in user_answer or "")
+    best = {"is_correct": False, "exact": False, "matched": None, "distance": None}
+    for answer in correct_answers:
+        key = match_key(answer)
+        if not key:
+            continue
+        limit = 0 if kannada_input else allowed_typos(key)
+        distance = bounded_distance(user_key, key, limit, _KEY_CONSONANTS)
+        if distance > limit:
+            continue
+        if distance and _GEMINATE.sub(r"\1", user_key) == _GEMINATE.sub(r"\1", key):
+            continue  # only the doubling differs
+        if best["distance"] is None or distance < best["distance"]:
+            best = {
+                "is_correct": True,
+                "exact": normalize(user_answer).lower() == normalize(answer).lower(),
+                "matched": answer,
+                "distance": distance,
+            }
+            if distance == 0:
+                break
+    return best
@@ -0,0 +1,44 @@
+# backend/tests/conftest.py
+import os
+import tempfile
+
+import mongomock
+import pytest
+
+# config reads these at import time; build output goes to a scratch directory
+_build = tempfile.mkdtemp(prefix="ctrl-vibe-tests-")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("METRICS_ENABLED", "false")
+os.environ.setdefault("AUDIO_STORE_DIR", os.path.join(_build, "audio"))
+os.environ.setdefault("BUNDLE_DIR", os.path.join(_build, "bundles"))
+os.environ.setdefault("GENERATED_CATALOG_PATH", os.path.join(_build, "lessons.generated.json"))
+os.environ.setdefault("TRACE_FILE", os.path.join(_build, "traces.jsonl"))
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The app on an in-memory mongomock database"""
+    from core import database
+
+    client = mongomock.MongoClient()
+
+    def init_app(app, *args, **kwargs):
+        database.mongo.cx = client
+        database.mongo.db = client["test"]
+
+    database.mongo.init_app = init_app
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def db(app):
+    from core.database import mongo
+    for name in mongo.db.list_collection_names():
+        mongo.db.drop_collection(name)
+    return mongo.db
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
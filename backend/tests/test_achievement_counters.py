@@ -0,0 +1,47 @@
+# backend/tests/test_achievement_counters.py
+import pytest
+from bson import ObjectId
+
+from core import simulation_manager
+from core.database import USERS_COLLECTION
+from models.user import User
+from services.gamification import LESSONS_COMPLETED, HIGH_SCORE_SIMULATIONS
+
+
+@pytest.fixture
+def user_id(db):
+    return str(db[USERS_COLLECTION].insert_one(User(username="tester").to_dict()).inserted_id)
+
+
+def counter(db, user_id, name):
+    return db[USERS_COLLECTION].find_one({"_id": ObjectId(user_id)}).get("counters", {}).get(name, 0)
+
+
+def test_retaking_a_lesson_counts_one_completion(client, db, user_id):
+    for score in (90, 40, 85, 30, 95):
+        response = client.post("/api/game/submit-lesson", json={
+            "user_id": user_id, "track_id": "survival", "lesson_id": "s1", "score": score,
+        })
+        assert response.status_code == 200
+
+    assert counter(db, user_id, LESSONS_COMPLETED) == 1
+    client.post("/api/game/submit-lesson", json={
+        "user_id": user_id, "track_id": "survival", "lesson_id": "s2", "score": 80,
+    })
+    assert counter(db, user_id, LESSONS_COMPLETED) == 2
+
+
+def test_high_score_counts_once_per_session(db, user_id, monkeypatch):
+    service = simulation_manager.OpenAIService
+    monkeypatch.setattr(service, "transcribe_audio", staticmethod(lambda audio, language=None: "ಬೇಡ"))
+    monkeypatch.setattr(service, "synthesize_speech", staticmethod(lambda text, voice="alloy": b"mp3"))
+    monkeypatch.setattr(simulation_manager.llm_router, "complete", lambda history, **kwargs: "ಸರಿ")
+    monkeypatch.setattr(simulation_manager, "check_conversation_end", lambda sim, history: True)
+    monkeypatch.setattr(simulation_manager, "evaluate_simulation", lambda sim, history: (95, {}))
+
+    for sessions in (1, 2):
+        history = simulation_manager.start_simulation("auto_driver_sim", user_id)["history"]
+        for _ in range(3):
+            result = simulation_manager.process_user_turn("auto_driver_sim", list(history), b"audio", user_id)
+            assert result["score"] == 95
+        assert counter(db, user_id, HIGH_SCORE_SIMULATIONS) == sessions
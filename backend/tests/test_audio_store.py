@@ -0,0 +1,50 @@
+# backend/tests/test_audio_store.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from core import lesson_manager
+from services import audio_store
+from services.ai_gateway import UpstreamOverloaded
+
+
+def test_concurrent_saves_of_one_clip():
+    text, voice = "ನಮಸ್ಕಾರ concurrent", "alloy"
+    payloads = [bytes([i]) * 1024 for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = [pool.submit(audio_store.save, text, voice, payloads[i % 8]) for i in range(400)]
+        keys = {future.result() for future in futures}
+
+    assert keys == {audio_store.key_for(text, voice)}
+    assert audio_store.load(text, voice) in payloads
+    directory = os.path.dirname(audio_store.path_for(audio_store.key_for(text, voice)))
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+def test_lesson_audio_does_not_change_the_catalog(client, monkeypatch):
+    rendered = []
+    monkeypatch.setattr(audio_store, "get_or_render", lambda text, voice: rendered.append(text) or b"mp3")
+    catalog_lesson = lesson_manager.get_catalog()["lessons"][("survival", "s1")][1]
+    before = dict(catalog_lesson["content"])
+    etag = client.get("/api/tracks").headers["ETag"]
+
+    response = client.get("/api/lesson/survival/s1")
+
+    assert response.status_code == 200
+    assert rendered == ["ನಮಸ್ಕಾರ"]
+    assert response.get_json()["content"]["audio_url"].startswith("http://localhost/api/audio/")
+    assert catalog_lesson["content"] == before
+    track = client.get("/api/tracks/survival").get_json()
+    assert track["lessons"][0]["content"]["audio_url"] == before["audio_url"]
+    assert client.get("/api/tracks", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_shed_tts_serves_the_lesson_without_audio(client, monkeypatch):
+    def shed(text, voice):
+        raise UpstreamOverloaded("openai", "gpt-4o-mini-tts", "queue_full")
+    monkeypatch.setattr(audio_store, "get_or_render", shed)
+
+    response = client.get("/api/lesson/survival/s1")
+
+    assert response.status_code == 200
+    assert not response.get_json()["content"].get("audio_url")
@@ -0,0 +1,36 @@
+# backend/tests/test_config.py
+import importlib
+
+import dotenv
+import pytest
+
+import config
+
+
+@pytest.fixture
+def load_config(monkeypatch):
+    """Re-import config from the given environment, ignoring any local .env"""
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda *args, **kwargs: False)
+
+    def load(**env):
+        for name in ("FLASK_ENV", "TRACE_DEBUG_ENDPOINT", "LOG_FORMAT"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(config)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(config)
+
+
+@pytest.mark.parametrize("env", [{}, {"FLASK_ENV": "development"}, {"FLASK_ENV": "production"}])
+def test_trace_debug_endpoint_is_opt_in(load_config, env):
+    assert load_config(**env).TRACE_DEBUG_ENDPOINT is False
+    assert load_config(TRACE_DEBUG_ENDPOINT="true", **env).TRACE_DEBUG_ENDPOINT is True
+
+
+@pytest.mark.parametrize("env", [{}, {"FLASK_ENV": "development"}, {"FLASK_ENV": "production"}])
+def test_logs_are_json_unless_text_is_asked_for(load_config, env):
+    assert load_config(**env).LOG_FORMAT == "json"
+    assert load_config(LOG_FORMAT="text", **env).LOG_FORMAT == "text"
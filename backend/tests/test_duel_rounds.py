@@ -0,0 +1,38 @@
+# backend/tests/test_duel_rounds.py
+import random
+import types
+
+import pytest
+
+from core import duel_manager
+from services import http_cache
+
+
+class Group:
+    drawing_count = 1000
+
+    def get_drawing(self, index=None):
+        index = random.randrange(self.drawing_count) if index is None else index
+        image = types.SimpleNamespace(save=lambda buffer, format: buffer.write(f"png {index}".encode()))
+        return types.SimpleNamespace(image=image)
+
+
+@pytest.fixture
+def quickdraw(monkeypatch):
+    data = types.SimpleNamespace(get_drawing_group=lambda label: Group())
+    monkeypatch.setattr(duel_manager, "_quickdraw", types.SimpleNamespace(get=lambda: data))
+    http_cache.clear()
+    yield
+    http_cache.clear()
+
+
+def test_every_worker_serves_the_same_round(client, quickdraw):
+    first = client.get("/api/duel/round/0")
+    http_cache.clear()  # another worker, or this one after a restart
+    second = client.get("/api/duel/round/0")
+
+    assert first.status_code == second.status_code == 200
+    assert first.get_data() == second.get_data()
+    assert first.headers["ETag"] == second.headers["ETag"]
+    http_cache.clear()
+    assert client.get("/api/duel/round/0", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
@@ -0,0 +1,46 @@
+# backend/tests/test_gemini_client.py
+import sys
+import types
+
+import pytest
+
+from services import gemini_client
+
+
+class FakeModel:
+    def __init__(self, sdk, name, system_instruction=None):
+        sdk.models.append((name, system_instruction, sdk.api_key))
+
+    def generate_content(self, contents, **kwargs):
+        return types.SimpleNamespace(text="ಸರಿ")
+
+
+@pytest.fixture
+def sdk(monkeypatch):
+    genai = types.ModuleType("google.generativeai")
+    genai.api_key, genai.models = None, []
+    genai.configure = lambda api_key: setattr(genai, "api_key", api_key)
+    genai.GenerativeModel = lambda name, **kwargs: FakeModel(genai, name, **kwargs)
+    google = types.ModuleType("google")
+    google.generativeai = genai
+    monkeypatch.setitem(sys.modules, "google", google)
+    monkeypatch.setitem(sys.modules, "google.generativeai", genai)
+    monkeypatch.setattr(gemini_client, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(gemini_client, "_available", True)
+    gemini_client._genai.reset()
+    gemini_client._model.reset()
+    yield genai
+    gemini_client._genai.reset()
+    gemini_client._model.reset()
+
+
+def test_system_instruction_model_is_configured(sdk):
+    messages = [{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Hello"}]
+
+    assert gemini_client.generate_chat_response(messages) == "ಸರಿ"
+    assert sdk.models == [(gemini_client.GEMINI_MODEL, "Be brief", "test-key")]
+
+
+def test_plain_model_is_configured(sdk):
+    assert gemini_client.generate_chat_response([{"role": "user", "content": "Hello"}]) == "ಸರಿ"
+    assert sdk.models == [(gemini_client.GEMINI_MODEL, None, "test-key")]
@@ -0,0 +1,35 @@
+# backend/tests/test_hedging.py
+import pytest
+
+from services import metrics, tracing
+from services.hedging import HedgePolicy
+
+
+def slow(result, delay):
+    def attempt(cancelled):
+        if cancelled.wait(delay):
+            raise RuntimeError("cancelled")
+        return result
+    return attempt
+
+
+def fail(cancelled):
+    raise RuntimeError("upstream error")
+
+
+@pytest.mark.parametrize("case, primary, fallback, path, hedged", [
+    ("fast", slow("primary", 0), slow("fallback", 0), "primary", "false"),
+    ("slow", slow("primary", 1), slow("fallback", 0), "fallback", "true"),
+    ("failing", fail, slow("fallback", 0), "fallback", "true"),
+])
+def test_winning_path_reaches_metrics_and_span(case, primary, fallback, path, hedged):
+    policy = HedgePolicy(f"test_{case}", default_delay=0.05)
+    root, token = tracing.start_trace("request")
+    try:
+        assert policy.run(primary, fallback) == path
+    finally:
+        tracing._current.reset(token)
+
+    assert metrics.HEDGE_REQUESTS.collect()[(policy.name, path, hedged)] == 1
+    assert sum(metrics.HEDGE_LATENCY.collect()[(policy.name, path)][:-1]) == 1
+    assert root.attributes["hedge.path"] == path
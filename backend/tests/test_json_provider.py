@@ -0,0 +1,39 @@
+# backend/tests/test_json_provider.py
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from services.json_provider import OrjsonProvider, StdJSONProvider
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+PAYLOAD = {
+    "naive": datetime(2026, 3, 1, 9, 30, 15, 250000),
+    "aware": datetime(2026, 3, 1, 15, 0, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+    "day": date(2026, 3, 1),
+    "id": ObjectId("65f0c0ffee0000000000abcd"),
+    "point": Point(1, 2),
+    "tags": {"ಕನ್ನಡ"},
+}
+
+
+@pytest.mark.parametrize("provider_class", [OrjsonProvider, StdJSONProvider])
+def test_datetimes_carry_an_offset(app, provider_class):
+    decoded = provider_class(app).loads(provider_class(app).dumps(PAYLOAD))
+
+    assert decoded == {
+        "naive": "2026-03-01T09:30:15.250000+00:00",
+        "aware": "2026-03-01T15:00:00+05:30",
+        "day": "2026-03-01",
+        "id": "65f0c0ffee0000000000abcd",
+        "point": {"x": 1, "y": 2},
+        "tags": ["ಕನ್ನಡ"],
+    }
+    assert datetime.fromisoformat(decoded["naive"]).utcoffset() == timedelta(0)
@@ -0,0 +1,47 @@
+# backend/tests/test_lesson_validation.py
+import pytest
+
+
+def validate(client, answers, lesson="s2"):
+    return client.post(f"/api/lesson/survival/{lesson}/validate", json={"answers": answers})
+
+
+def test_grades_against_the_answer_key(client):
+    response = validate(client, {"s2": "ಸ್ವಲ್ಪ ನೀರು ಕೊಡಿ"})
+    assert response.status_code == 200
+    assert response.get_json()["score"] == 100
+
+
+def test_sentence_building_takes_a_word_list(client):
+    words = ["ನೇರವಾಗಿ", "ಹೋಗಿ", "ಮತ್ತು", "ಎಡಕ್ಕೆ", "ತಿರುಗಿ"]
+    response = validate(client, {"s7": words}, lesson="s7")
+    assert response.status_code == 200
+    assert response.get_json()["correct"] == 1
+
+
+def test_missing_answer_is_wrong_not_an_error(client):
+    response = validate(client, {"s2": None})
+    assert response.status_code == 200
+    assert response.get_json()["correct"] == 0
+
+
+@pytest.mark.parametrize("answer", [5, 1.5, True, {"a": "b"}, ["ok", 3]])
+def test_non_string_answers_are_rejected(client, answer):
+    assert validate(client, {"s2": answer}).status_code == 400
+
+
+def test_word_list_only_answers_sentence_building(client):
+    assert validate(client, {"s2": ["ಸ್ವಲ್ಪ", "ನೀರು"]}).status_code == 400
+    mcq = {"lesson_type": "mcq", "user_answer": ["a"], "correct_answer": "a"}
+    assert client.post("/api/validate-answer", json=mcq).status_code == 400
+    key = {"lesson_type": "mcq", "user_answer": "a", "correct_answer": ["a"]}
+    assert client.post("/api/validate-answer", json=key).status_code == 400
+
+
+def test_validate_answer_rejects_non_string(client):
+    response = client.post("/api/validate-answer", json={"lesson_type": "mcq", "user_answer": 5, "correct_answer": "x"})
+    assert response.status_code == 400
+
+
+def test_unknown_lesson(client):
+    assert validate(client, {}, lesson="nope").status_code == 404
@@ -0,0 +1,57 @@
+# backend/tests/test_llm_router.py
+import json
+import os
+
+from services import llm_router, metrics
+from services.llm_router import ChatBackend, LLMRouter
+
+
+class Backend(ChatBackend):
+    provider = "openai"
+    model = "test"
+
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+
+    def complete(self, messages, temperature, max_tokens, timeout):
+        if self.fail:
+            raise RuntimeError("down")
+        return self.name
+
+
+def test_fails_over_and_reports_quantiles(monkeypatch):
+    router = LLMRouter([Backend("flaky", fail=True), Backend("steady")])
+    monkeypatch.setattr(llm_router.random, "random", lambda: 1.0)
+
+    for _ in range(5):
+        assert router.complete([{"role": "user", "content": "ನಮಸ್ಕಾರ"}]) == "steady"
+
+    gauge = metrics.Gauge("test_llm_latency_seconds", "test", ("backend", "quantile"), router._quantiles)
+    values = gauge.collect()
+    pid = str(os.getpid())
+    assert set(values) == {("steady", "0.5", pid), ("steady", "0.95", pid)}
+    assert router.stats()["flaky"]["error_rate"] == 1.0
+
+
+def test_router_quantiles_are_exported():
+    rendered = metrics.render(metrics.collect_all())
+    assert "# TYPE llm_backend_latency_seconds gauge" in rendered
+
+
+def test_exited_workers_gauges_are_not_archived(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    gauge = metrics.Gauge("test_depth", "test", ("queue",), lambda: {("jobs",): 3})
+    counter = metrics.Counter("test_done_total", "test", ("queue",))
+    counter.inc("jobs")
+    finished = {metric.name: {"type": metric.type, "help": metric.help, "labelnames": list(metric.labelnames),
+                              "values": [[list(k), v] for k, v in metric.collect().items()]}
+                for metric in (gauge, counter)}
+    (tmp_path / "worker-999999999.json").write_text(json.dumps(finished))
+    monkeypatch.setattr(metrics, "_pid_alive", lambda pid: pid != 999999999)
+
+    merged = metrics.collect_all()
+
+    assert merged["test_done_total"]["values"] == {("jobs",): 1}
+    assert "test_depth" not in merged
+    assert "test_depth" not in json.loads((tmp_path / "archive.json").read_text())
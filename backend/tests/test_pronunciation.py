@@ -0,0 +1,43 @@
+# backend/tests/test_pronunciation.py
+import json
+import os
+
+import pytest
+
+from services.pronunciation import segment, score_pronunciation
+
+DUEL_WORDS = os.path.join(os.path.dirname(__file__), "..", "content", "duel_words.json")
+# Words whose game tiles are grouped differently from the segmenter on purpose
+SEGMENTED_DIFFERENTLY = {
+    "ನಕ್ಷತ್ರ": ["ನ", "ಕ್ಷ", "ತ್", "ರ"],
+    "ಫ್ಯಾನ್": ["ಫ್", "ಯಾ", "ನ್"],
+}
+
+
+def _duel_words():
+    with open(DUEL_WORDS, encoding="utf-8") as f:
+        return json.load(f)["words"]
+
+
+@pytest.mark.parametrize("word", _duel_words(), ids=lambda w: w["label"])
+def test_segment_matches_duel_tiles(word):
+    expected = SEGMENTED_DIFFERENTLY.get(word["kannada"], word["letters"])
+    assert [a.text for a in segment(word["kannada"])] == expected
+
+
+@pytest.mark.parametrize("heard", ["", "   ", "..."])
+def test_nothing_heard_scores_zero(heard):
+    result = score_pronunciation("ನಮಸ್ಕಾರ", heard)
+    assert result["accuracy_score"] == 0
+    assert not result["correct"]
+    assert {s["status"] for s in result["syllables"]} == {"missing"}
+
+
+def test_exact_match_scores_full():
+    assert score_pronunciation("ನಮಸ್ಕಾರ", "ನಮಸ್ಕಾರ")["accuracy_score"] == 100
+
+
+def test_near_miss_scores_above_unrelated():
+    near = score_pronunciation("ಹಾಲು", "ಹಾಳು")["accuracy_score"]
+    unrelated = score_pronunciation("ಹಾಲು", "ಮನೆ")["accuracy_score"]
+    assert unrelated < near < 100
@@ -0,0 +1,86 @@
+# backend/tests/test_room_pool.py
+import asyncio
+import time
+from concurrent.futures import Future
+
+from services.livekit_client import RoomPool, SIMULATION_TYPES
+
+
+class FakeRoomService:
+    def __init__(self):
+        self.created, self.deleted = [], []
+
+    async def create_room(self, request):
+        self.created.append(request.name)
+
+    async def delete_room(self, request):
+        self.deleted.append(request.room)
+
+
+class FakeAPI:
+    def __init__(self):
+        self.room = FakeRoomService()
+
+
+class InlineClient:
+    """Runs submitted coroutines right away instead of on a background loop"""
+
+    def __init__(self):
+        self.api = FakeAPI()
+
+    def submit(self, fn):
+        future = Future()
+        future.set_result(asyncio.run(fn(self.api)))
+        return future
+
+
+def test_refill_fills_every_simulation_type():
+    client = InlineClient()
+    pool = RoomPool(client, size=2, max_age=60)
+    pool.refill()
+    assert len(client.api.room.created) == 2 * len(SIMULATION_TYPES)
+
+
+def test_stale_rooms_are_deleted_not_handed_out():
+    client = InlineClient()
+    pool = RoomPool(client, size=1, max_age=60)
+    sim = SIMULATION_TYPES[0]
+    pool.refill(sim)
+    stale = pool._rooms[sim][0]
+    stale["pooled_at"] = time.monotonic() - 120
+
+    room = pool.acquire(sim, age_verified=True)
+
+    assert room is None
+    assert client.api.room.deleted == [stale["room_name"]]
+    # and replaced with a fresh one
+    assert len(pool._rooms[sim]) == 1
+    assert pool.acquire(sim, age_verified=True)["room_name"] != stale["room_name"]
+
+
+def test_start_warms_the_pool_and_schedules_the_next_pass(monkeypatch):
+    scheduled = []
+
+    class Timer:
+        def __init__(self, interval, fn):
+            scheduled.append(interval)
+            self.daemon = False
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr("services.livekit_client.threading.Timer", Timer)
+    client = InlineClient()
+    pool = RoomPool(client, size=1, max_age=60)
+    pool.start()
+
+    assert len(client.api.room.created) == len(SIMULATION_TYPES)
+    assert scheduled == [30]
+
+
+def test_disabled_pool_does_nothing():
+    client = InlineClient()
+    pool = RoomPool(client, size=0, max_age=60)
+    pool.start()
+    assert pool.acquire(SIMULATION_TYPES[0], True) is None
+    assert client.api.room.created == []
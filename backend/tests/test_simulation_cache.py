@@ -0,0 +1,40 @@
+# backend/tests/test_simulation_cache.py
+import pytest
+
+from core import simulation_manager
+from services import audio_store
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = {"llm": 0, "tts": 0}
+    service = simulation_manager.OpenAIService
+
+    def complete(history, **kwargs):
+        calls["llm"] += 1
+        return "ಮೆಜೆಸ್ಟಿಕ್‌ಗೆ ನೂರು ರೂಪಾಯಿ"
+
+    def synthesize_speech(text, voice="alloy"):
+        calls["tts"] += 1
+        return b"\xff\xf3" * 20000
+
+    monkeypatch.setattr(service, "transcribe_audio", staticmethod(lambda audio, language=None: "ಮೆಜೆಸ್ಟಿಕ್"))
+    monkeypatch.setattr(service, "synthesize_speech", staticmethod(synthesize_speech))
+    monkeypatch.setattr(simulation_manager.llm_router, "complete", complete)
+    simulation_manager.response_cache.clear()
+    simulation_manager.opener_audio_cache.clear()
+    yield calls
+    simulation_manager.response_cache.clear()
+
+
+def test_cached_replies_keep_audio_in_the_store(upstream):
+    history = simulation_manager.start_simulation("auto_driver_sim")["history"]
+
+    first = simulation_manager.process_user_turn("auto_driver_sim", list(history), b"audio")
+    second = simulation_manager.process_user_turn("auto_driver_sim", list(history), b"audio")
+
+    key = audio_store.key_for(first["text"], simulation_manager.LESSON_TTS_VOICE)
+    assert first["audio_url"] == second["audio_url"] == audio_store.url_path(key)
+    assert upstream == {"llm": 1, "tts": 2}  # the opener and the reply, each once
+    entry = simulation_manager.response_cache.get(simulation_manager.response_cache_key("auto_driver_sim", first["history"][:-1]))
+    assert entry == (first["text"], audio_store.url_path(key))
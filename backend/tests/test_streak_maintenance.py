@@ -0,0 +1,20 @@
+# backend/tests/test_streak_maintenance.py
+from datetime import datetime, timedelta
+
+from core import streak_maintenance
+from core.database import USERS_COLLECTION, LEADERBOARD_COLLECTION
+
+
+def test_reset_expired_keeps_live_streaks(db):
+    now = datetime(2026, 3, 1, 12, 0)
+    expiries = {"expired": now - timedelta(minutes=1), "due": now, "live": now + timedelta(hours=3)}
+    for name, expires_at in expiries.items():
+        user_id = db[USERS_COLLECTION].insert_one({"username": name, "streak": 4, "streak_expires_at": expires_at}).inserted_id
+        db[LEADERBOARD_COLLECTION].insert_one({"user_id": user_id, "username": name, "streak": 4, "streak_expires_at": expires_at})
+
+    totals = streak_maintenance.reset_expired(db, chunk=1, now=now)
+
+    assert totals == {"users": 2, "leaderboard": 2, "chunks": 2}
+    for collection in (USERS_COLLECTION, LEADERBOARD_COLLECTION):
+        streaks = {doc["username"]: doc["streak"] for doc in db[collection].find()}
+        assert streaks == {"expired": 0, "due": 0, "live": 4}
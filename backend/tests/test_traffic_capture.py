@@ -0,0 +1,21 @@
+# backend/tests/test_traffic_capture.py
+import json
+
+from services.traffic_capture import pseudonym, sanitize
+
+
+def test_sanitize_keeps_time_zones_and_hides_people():
+    body = {"user_id": "65f0c0ffee0000000000abcd", "username": "ರಮೇಶ", "timezone": "Asia/Kolkata", "track_id": "survival"}
+
+    assert sanitize(body) == {
+        "user_id": pseudonym("65f0c0ffee0000000000abcd"),
+        "username": "x" * 12,  # ರಮೇಶ is 12 bytes
+        "timezone": "Asia/Kolkata",
+        "track_id": "survival",
+    }
+
+
+def test_placeholders_keep_the_body_size():
+    body = {"answers": {"s2": "ಸ್ವಲ್ಪ ನೀರು ಕೊಡಿ"}, "text": "Hello"}
+    size = len(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+    assert len(json.dumps(sanitize(body), ensure_ascii=False).encode("utf-8")) == size
@@ -0,0 +1,53 @@
+# backend/tests/test_transliteration.py
+import pytest
+
+from services.transliteration import match_answer, match_key, to_kannada, to_latin
+
+
+@pytest.mark.parametrize("text, key", [
+    ("ನೀರು", "niru"),
+    ("neeru", "niru"),
+    ("niru", "niru"),
+    ("ಕಂಬ", "kamba"),
+])
+def test_match_key(text, key):
+    assert match_key(text) == key
+
+
+def test_round_trip():
+    assert to_latin("ನೀರು") == "neeru"
+    assert to_kannada("neeru") == "ನೀರು"
+
+
+@pytest.mark.parametrize("answer, correct", [
+    ("ನೀರು", "ನೀರು"),
+    ("ನಿರು", "ನೀರು"),  # vowel length
+    ("neeru", "ನೀರು"),
+    ("niru", "ನೀರು"),
+    ("namaskaara", "ನಮಸ್ಕಾರ"),
+    ("namaskra", "ನಮಸ್ಕಾರ"),  # dropped vowel
+    ("danyavadagalu", "ಧನ್ಯವಾದಗಳು"),  # aspiration
+    ("dhanyavadaglu", "ಧನ್ಯವಾದಗಳು"),
+])
+def test_accepts_spelling_variants_and_typos(answer, correct):
+    assert match_answer(answer, correct)["is_correct"]
+
+
+@pytest.mark.parametrize("answer, correct", [
+    ("ಅವಳು", "ಅವನು"),  # she / he
+    ("avalu", "ಅವನು"),
+    ("ಅವನು", "ಅವಳು"),
+    ("ಹಾಲು", "ಹಲ್ಲು"),  # milk / tooth
+    ("halu", "ಹಲ್ಲು"),
+    ("ಹಲ್ಲು", "ಹಾಲು"),
+    ("hallu", "ಹಾಲು"),
+    ("namaskata", "ನಮಸ್ಕಾರ"),
+])
+def test_rejects_minimal_pairs(answer, correct):
+    assert not match_answer(answer, correct)["is_correct"]
+
+
+def test_best_of_several_answers():
+    result = match_answer("neeru", ["ಹಾಲು", "ನೀರು"])
+    assert result["matched"] == "ನೀರು"
+    assert result["distance"] == 0
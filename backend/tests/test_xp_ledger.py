@@ -0,0 +1,116 @@
+# backend/tests/test_xp_ledger.py
+import mongomock
+import pytest
+
+from core import xp_ledger
+from core.database import USERS_COLLECTION, LEADERBOARD_COLLECTION, XP_SNAPSHOTS_COLLECTION
+from models.user import User
+
+
+@pytest.fixture
+def ledger(db, monkeypatch):
+    monkeypatch.setattr(xp_ledger, "XP_SNAPSHOT_EVERY", 3)
+
+    # mongomock's bulk_write doesn't accept this pymongo's UpdateOne
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        for op in requests:
+            self.update_one(op._filter, op._doc)
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", bulk_write)
+    xp_ledger.ensure_indexes(db)
+    return db
+
+
+@pytest.fixture
+def user_id(ledger):
+    return ledger[USERS_COLLECTION].insert_one(User(username="tester").to_dict()).inserted_id
+
+
+def earn(db, user_id, *amounts):
+    return xp_ledger.record(user_id, {"$inc": {"xp": sum(amounts)}}, [xp_ledger.xp_event(a, "lesson") for a in amounts], db=db)
+
+
+def held_back(monkeypatch, db, user_id, *amounts):
+    """record() whose events are appended only when the returned callable runs"""
+    held, append = [], xp_ledger._append
+    monkeypatch.setattr(xp_ledger, "_append", lambda *args: held.append(args))
+    earn(db, user_id, *amounts)
+    monkeypatch.setattr(xp_ledger, "_append", append)
+    return lambda: append(*held[0])
+
+
+def xp_on_user(db, user_id):
+    return db[USERS_COLLECTION].find_one({"_id": user_id})["xp"]
+
+
+def test_compaction_waits_for_events_in_flight(ledger, user_id, monkeypatch):
+    earn(ledger, user_id, 5)
+    land = held_back(monkeypatch, ledger, user_id, 60, 40)  # seq 2-3
+    earn(ledger, user_id, 10)                               # seq 4 reaches the snapshot threshold first
+
+    assert ledger[XP_SNAPSHOTS_COLLECTION].count_documents({"seq": {"$gt": 0}}) == 0
+    current, seq = xp_ledger.state(user_id, ledger)
+    assert (current["xp"], seq) == (5, 1)
+
+    land()
+
+    assert xp_on_user(ledger, user_id) == 115
+    assert xp_ledger.state(user_id, ledger)[0]["xp"] == 115
+    assert ledger[XP_SNAPSHOTS_COLLECTION].find_one({"seq": 4})["state"]["xp"] == 115
+
+
+def test_rebuild_skips_users_with_events_in_flight(ledger, user_id, monkeypatch):
+    earn(ledger, user_id, 5)
+    land = held_back(monkeypatch, ledger, user_id, 100)
+
+    stats = xp_ledger.rebuild_chunk(ledger, [user_id])
+
+    assert stats["gaps"] == 1 and stats["changed"] == 0
+    assert xp_on_user(ledger, user_id) == 105
+    land()
+    ledger[USERS_COLLECTION].update_one({"_id": user_id}, {"$set": {"xp": 0}})
+
+    stats = xp_ledger.rebuild_chunk(ledger, [user_id])
+
+    assert stats["gaps"] == 0 and stats["changed"] == 1
+    assert xp_on_user(ledger, user_id) == 105
+
+
+def test_rebuild_leaves_the_leaderboard_to_a_concurrent_lesson(ledger, user_id, monkeypatch):
+    earn(ledger, user_id, 5)
+    ledger[USERS_COLLECTION].update_one({"_id": user_id}, {"$set": {"xp": 0}})
+    ledger[LEADERBOARD_COLLECTION].insert_one({"user_id": user_id, "xp": 0, "level": 1, "streak": 0})
+    bulk_write = mongomock.collection.Collection.bulk_write
+
+    def lesson_lands_first(self, requests, ordered=True, **kwargs):
+        if self.name == USERS_COLLECTION:
+            before = earn(ledger, user_id, 50)
+            ledger[LEADERBOARD_COLLECTION].update_one({"user_id": user_id}, {"$set": {"xp": before["xp"] + 50}})
+        return bulk_write(self, requests, ordered, **kwargs)
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", lesson_lands_first)
+
+    assert xp_ledger.rebuild_chunk(ledger, [user_id])["changed"] == 1
+
+    assert xp_on_user(ledger, user_id) == 50
+    assert ledger[LEADERBOARD_COLLECTION].find_one({"user_id": user_id})["xp"] == 50
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", bulk_write)
+
+    xp_ledger.rebuild_chunk(ledger, [user_id])
+
+    assert xp_on_user(ledger, user_id) == 55
+    assert ledger[LEADERBOARD_COLLECTION].find_one({"user_id": user_id})["xp"] == 55
+
+
+def test_repair_closes_a_gap_left_by_a_crashed_request(ledger, user_id, monkeypatch, caplog):
+    earn(ledger, user_id, 5)
+    held_back(monkeypatch, ledger, user_id, 100)  # its process dies before appending
+    earn(ledger, user_id, 10)
+
+    assert xp_ledger.rebuild(ledger, workers=1)["gaps"] == 1
+    assert str(user_id) in caplog.text
+    assert xp_ledger.repair(ledger, workers=1) == {"chunks": 1, "users": 1, "gaps": 1}
+
+    current, seq = xp_ledger.state(user_id, ledger)
+    assert (current["xp"], seq) == (115, 3)
+    assert xp_ledger.rebuild(ledger, workers=1)["gaps"] == 0
+    earn(ledger, user_id, 1)
+    assert xp_ledger.state(user_id, ledger)[0]["xp"] == xp_on_user(ledger, user_id) == 116
@@ -0,0 +1,16 @@
+# backend/wsgi.py
+"""
+Production entry point:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app the app is built once in the gunicorn master. Read-only
+state loaded here (lesson catalog, transliteration/pronunciation tables,
+duel words) is then shared with every worker through copy-on-write.
+"""
+from app import create_app
+from core import lesson_manager
+
+app = create_app()
+
+# Parse the catalog before workers fork so they don't each load it
+lesson_manager.get_catalog()